@@ -1,5 +1,6 @@
 from celery import Celery
 from celery.schedules import crontab
+from kombu import Queue
 import os
 import sys
 
@@ -22,6 +23,29 @@ def make_celery():
         timezone='Europe/Moscow',
         enable_utc=True,
         worker_hijack_root_logger=False,
+        result_expires=int(os.getenv('CELERY_RESULT_EXPIRES', 3600)),
+    )
+    # Each queue has its own worker (see start.sh): photo alerts are never queued behind
+    # a clip upload or a cleanup run. With Redis a lower priority number is served first.
+    celery.conf.update(
+        task_queues=[Queue('alerts'), Queue('media'), Queue('maintenance')],
+        task_default_queue='maintenance',
+        task_default_priority=5,
+        broker_transport_options={
+            'priority_steps': list(range(10)),
+            'sep': ':',
+            'queue_order_strategy': 'priority',
+        },
+        worker_prefetch_multiplier=1,
+        task_routes={
+            'tasks.drain_alert_outbox': {'queue': 'alerts', 'priority': 0},
+            'tasks.send_telegram_photo*': {'queue': 'alerts', 'priority': 0},
+            'tasks.send_telegram_album_fanout': {'queue': 'alerts', 'priority': 0},
+            'tasks.send_screenshot_*': {'queue': 'alerts', 'priority': 3},
+            'tasks.health_server': {'queue': 'alerts', 'priority': 9},
+            'tasks.drain_media_outbox': {'queue': 'media', 'priority': 0},
+            'tasks.send_telegram_video*': {'queue': 'media', 'priority': 5},
+        },
     )
     celery.conf.update(
         beat_schedule={
@@ -33,6 +57,30 @@ def make_celery():
                 'task': 'celery_task.tasks.delete_logs_weekly',
                 'schedule': crontab(hour=0, minute=1, day_of_week=0),
             },
+            'media-retention': {
+                'task': 'celery_task.tasks.media_retention_daily',
+                'schedule': crontab(hour=0, minute=5),
+            },
+            'recordings-quota-cleanup': {
+                'task': 'celery_task.tasks.recordings_quota_cleanup',
+                'schedule': crontab(minute=f"*/{os.getenv('RETENTION_INTERVAL_MIN', 10)}"),
+            },
+            'motion-digest': {
+                'task': 'celery_task.tasks.motion_digest_daily',
+                'schedule': crontab(hour=0, minute=30),
+            },
+            'alert-outbox-drain': {
+                'task': 'tasks.drain_alert_outbox',
+                'schedule': float(os.getenv('OUTBOX_DRAIN_SEC', 15)),
+            },
+            'media-outbox-drain': {
+                'task': 'tasks.drain_media_outbox',
+                'schedule': float(os.getenv('OUTBOX_DRAIN_SEC', 15)),
+            },
+            'recordings-tiering': {
+                'task': 'celery_task.tasks.recordings_tiering_daily',
+                'schedule': crontab(hour=os.getenv('TIER_HOUR', 3), minute=0),
+            },
         },
     )
     return celery
@@ -1,19 +1,267 @@
 import os
-import shutil
+import re
+from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
-from celery_task.path_utils import get_absolute_recordings_path, get_absolute_logs_path
+from celery_task.path_utils import get_absolute_logs_path, get_absolute_media_path
+from celery_task.throttled_delete import ThrottledDeleter
 from surveillance.schemas.repository import logger
 
 
+class RetentionLayout(ABC):
+    """Base class of a path layout handled by the retention sweep.
+
+    Subclasses yield `(os.DirEntry, datetime)` pairs for every item under
+    `root` whose date can be derived from its name.
+    """
+
+    def __init__(self, name: str, root: str, days: int):
+        self.name = name
+        self.root = root
+        self.days = days
+
+    @abstractmethod
+    def dated_entries(self):
+        """Yield `(os.DirEntry, datetime)` of the dated items under `root`."""
+
+
+class DateFolderLayout(RetentionLayout):
+    """Folders named by date, optionally one level below per-camera folders.
+
+    Examples:
+        media/recordings/<YYYY-MM-DD>/
+        media/screenshots/camera_<id>/<YYYYMMDD>/
+    """
+
+    def __init__(self, name: str, root: str, days: int, date_format: str = '%Y-%m-%d',
+                 per_camera: bool = False):
+        super().__init__(name, root, days)
+        self.date_format = date_format
+        self.per_camera = per_camera
+
+    def _date_folders(self, path: str):
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+                try:
+                    yield entry, datetime.strptime(entry.name, self.date_format)
+                except ValueError:
+                    logger.debug(f"ПРОПУСКАЕМ папку: {entry.path} (не формат даты {self.date_format})")
+
+    def dated_entries(self):
+        if not self.per_camera:
+            yield from self._date_folders(self.root)
+            return
+        with os.scandir(self.root) as cameras:
+            for camera in cameras:
+                if camera.is_dir(follow_symlinks=False):
+                    yield from self._date_folders(camera.path)
+
+
+class TimestampFileLayout(RetentionLayout):
+    """Flat files with a timestamp in their name.
+
+    Examples:
+        logs/celery_worker_<YYYYmmdd_HHMMSS>.log
+        media/current/movie/cam_<id>_<YYYYmmdd_HHMMSS>.mp4
+    """
+
+    def __init__(self, name: str, root: str, days: int, pattern: str,
+                 date_format: str = '%Y%m%d_%H%M%S'):
+        super().__init__(name, root, days)
+        self.pattern = re.compile(pattern)
+        self.date_format = date_format
+
+    def dated_entries(self):
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                match = self.pattern.fullmatch(entry.name)
+                if not match:
+                    continue
+                try:
+                    yield entry, datetime.strptime(match.group(1), self.date_format)
+                except ValueError:
+                    continue
+
+
+def get_retention_layouts(include_media=True, include_logs=True):
+    """Path layouts cleaned by the unified retention task.
+
+    Args:
+        include_media (bool): Recordings, motion screenshots and manual captures.
+        include_logs (bool): Dated log folders and flat Celery log files.
+    """
+    media = get_absolute_media_path()
+    logs = get_absolute_logs_path()
+    layouts = [
+        DateFolderLayout('recordings', os.path.join(media, "recordings"),
+                         int(os.getenv("RETENTION_RECORDINGS_DAYS", 7))),
+        DateFolderLayout('screenshots', os.path.join(media, "screenshots"),
+                         int(os.getenv("RETENTION_SCREENSHOTS_DAYS", 7)),
+                         date_format='%Y%m%d', per_camera=True),
+        DateFolderLayout('manual_screenshots', os.path.join(media, "current", "screenshots"),
+                         int(os.getenv("RETENTION_MANUAL_DAYS", 30)), per_camera=True),
+        TimestampFileLayout('manual_movies', os.path.join(media, "current", "movie"),
+                            int(os.getenv("RETENTION_MANUAL_DAYS", 30)),
+                            pattern=r'cam_.+_(\d{8}_\d{6})\.mp4'),
+        DateFolderLayout('exports', os.path.join(media, "exports"),
+                         int(os.getenv("RETENTION_EXPORTS_DAYS", 1))),
+        DateFolderLayout('alerts', os.path.join(media, "alerts"),
+                         int(os.getenv("RETENTION_ALERTS_DAYS", 2))),
+        DateFolderLayout('logs', logs, int(os.getenv("RETENTION_LOGS_DAYS", 7))),
+        TimestampFileLayout('flat_logs', logs, int(os.getenv("RETENTION_LOGS_DAYS", 7)),
+                            pattern=r'celery_(?:worker|beat)_(\d{8}_\d{6})\.log'),
+    ]
+    return [layout for layout in layouts
+            if (include_logs if layout.name in ('logs', 'flat_logs') else include_media)]
+
+
+def sweep_layouts(layouts, now=None, deleter=None):
+    """Single pass over the given layouts deleting everything past its age threshold.
+
+    Deletion goes through a ThrottledDeleter, so large folders are removed in
+    rate-limited steps instead of one rmtree burst.
+
+    Args:
+        layouts (List[RetentionLayout]): Layouts to process.
+        now (Optional[datetime]): Reference time, defaults to now.
+        deleter (Optional[ThrottledDeleter]): Deleter to use, budgets from env by default.
+
+    Returns:
+        dict: Detailed results of the cleanup operation including:
+            - success (bool): Whether operation completed without errors
+            - deleted (List[dict]): layout, name, date, path and size_mb of deleted items
+            - deleted_count (int): Number of deleted items
+            - freed_bytes (int): Bytes freed
+            - total_space_freed_mb (float): Megabytes freed
+            - layouts (dict): Per-layout deleted count and freed bytes
+            - errors (List[str]): Error messages encountered
+            - error_count (int): Number of errors
+            - timestamp (str): ISO timestamp of completion
+    """
+    now = now or datetime.now()
+    deleter = deleter or ThrottledDeleter()
+    deleted = []
+    errors = []
+    per_layout = {}
+
+    for layout in layouts:
+        stats = per_layout.setdefault(layout.name, {'deleted_count': 0, 'freed_bytes': 0})
+        if not os.path.isdir(layout.root):
+            logger.debug(f"ПРОПУСКАЕМ {layout.name}: папка не существует {layout.root}")
+            continue
+
+        threshold_date = now - timedelta(days=layout.days)
+        try:
+            for entry, item_date in layout.dated_entries():
+                if item_date >= threshold_date:
+                    continue
+                try:
+                    size = deleter.delete(entry.path)
+                except PermissionError as e:
+                    error_msg = f"Нет прав для удаления {entry.path}: {str(e)}"
+                    logger.error(error_msg)
+                    errors.append(error_msg)
+                    continue
+                except Exception as e:
+                    error_msg = f"Ошибка при удалении {entry.path}: {str(e)}"
+                    logger.error(error_msg)
+                    errors.append(error_msg)
+                    continue
+
+                logger.info(f"  УДАЛЕНО ({layout.name}): {entry.name} (дата: {item_date.date()})")
+                deleted.append({
+                    'layout': layout.name,
+                    'name': entry.name,
+                    'date': item_date.strftime('%Y-%m-%d'),
+                    'path': entry.path,
+                    'size_mb': round(size / (1024 * 1024), 3),
+                })
+                stats['deleted_count'] += 1
+                stats['freed_bytes'] += size
+
+        except PermissionError as e:
+            error_msg = f"Нет доступа к {layout.root}: {str(e)}"
+            logger.error(error_msg)
+            errors.append(error_msg)
+
+        except Exception as e:
+            error_msg = f"Ошибка при чтении {layout.root}: {str(e)}"
+            logger.error(error_msg)
+            errors.append(error_msg)
+
+    freed_bytes = sum(stats['freed_bytes'] for stats in per_layout.values())
+    return {
+        'success': len(errors) == 0,
+        'deleted': deleted,
+        'deleted_count': len(deleted),
+        'freed_bytes': freed_bytes,
+        'total_space_freed_mb': round(freed_bytes / (1024 * 1024), 3),
+        'layouts': per_layout,
+        'errors': errors,
+        'error_count': len(errors),
+        'timestamp': now.isoformat(),
+    }
+
+
+def _log_summary(title, result):
+    logger.info("\n" + "=" * 50)
+    logger.info(title)
+    logger.info(f"Удалено: {result['deleted_count']}")
+    logger.info(f"Освобождено: {result['total_space_freed_mb']} МБ")
+    logger.info(f"Ошибок: {result['error_count']}")
+
+    if result['errors']:
+        logger.warning("Ошибки:")
+        for error in result['errors']:
+            logger.warning(f"  • {error}")
+
+    logger.info("=" * 50)
+
+
+def _as_folders(deleted):
+    return [{
+        'folder_name': item['name'],
+        'folder_date': item['date'],
+        'path': item['path'],
+        'size_mb': item['size_mb'],
+    } for item in deleted]
+
+
+def delete_expired_media(include_media=True, include_logs=True, progress=None):
+    """Unified retention pass over recordings, screenshots, manual captures and logs.
+
+    Age thresholds per layout come from RETENTION_RECORDINGS_DAYS,
+    RETENTION_SCREENSHOTS_DAYS, RETENTION_MANUAL_DAYS and RETENTION_LOGS_DAYS.
+
+    Args:
+        include_media (bool): Clean media layouts.
+        include_logs (bool): Clean log layouts.
+        progress (Optional[Callable[[dict], None]]): Progress callback of the deleter.
+
+    Returns:
+        dict: Result of `sweep_layouts`.
+    """
+    logger.info("=" * 50)
+    logger.info("НАЧАЛО ОБЩЕЙ ОЧИСТКИ")
+    result = sweep_layouts(get_retention_layouts(include_media, include_logs),
+                           deleter=ThrottledDeleter(progress=progress))
+    _log_summary("ИТОГИ ОБЩЕЙ ОЧИСТКИ:", result)
+    return result
+
+
 def delete_old_log_files(days_threshold=7):
     """Celery task to delete old log files from logs directory.
 
-    This task removes log folders (in YYYY-MM-DD format) older than
+    This task removes log folders (in YYYY-MM-DD format) and flat
+    `celery_worker_<ts>.log` / `celery_beat_<ts>.log` files older than
     the specified threshold from the main logs directory.
 
     Args:
         days_threshold (int, optional): Number of days to keep log files.
-            Folders older than this threshold will be deleted. Defaults to 30.
+            Items older than this threshold will be deleted. Defaults to 7.
 
     Returns:
         dict: Detailed results of the cleanup operation including:
@@ -21,11 +269,12 @@ def delete_old_log_files(days_threshold=7):
             - threshold_date (str): Date threshold in 'YYYY-MM-DD' format
             - days_threshold (int): Days threshold used
             - logs_path (str): Path to logs directory
-            - deleted_folders (List[dict]): Details of deleted folders
-            - deleted_count (int): Number of folders deleted
+            - deleted_folders (List[dict]): Details of deleted folders and files
+            - deleted_count (int): Number of items deleted
             - errors (List[str]): Error messages encountered
             - error_count (int): Number of errors
             - timestamp (str): ISO timestamp of completion
+            - total_space_freed_mb (float): Megabytes freed
     """
 
     logger.info("=" * 50)
@@ -33,6 +282,7 @@ def delete_old_log_files(days_threshold=7):
 
     logs_path = get_absolute_logs_path()
     logger.info(f"Путь к логам: {logs_path}")
+    threshold_date = datetime.now() - timedelta(days=days_threshold)
 
     if not os.path.exists(logs_path):
         error_msg = f"Папка logs не существует: {logs_path}"
@@ -46,107 +296,37 @@ def delete_old_log_files(days_threshold=7):
             'deleted_count': 0,
             'errors': [error_msg],
             'error_count': 1,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': datetime.now().isoformat(),
+            'total_space_freed_mb': 0,
         }
 
-    threshold_date = datetime.now() - timedelta(days=days_threshold)
-    logger.info(f"Пороговая дата: {threshold_date.strftime('%Y-%m-%d')}")
-
-    deleted_folders = []
-    errors = []
-
-    try:
-        items = os.listdir(logs_path)
-        logger.info(f"Найдено элементов в logs: {len(items)}")
-
-        for folder_name in items:
-            folder_path = os.path.join(logs_path, folder_name)
-
-            if not os.path.isdir(folder_path):
-                logger.debug(f"ПРОПУСКАЕМ файл: {folder_name}")
-                continue
-
-            try:
-                folder_date = datetime.strptime(folder_name, '%Y-%m-%d')
-
-                if folder_date < threshold_date:
-                    logger.info(f"  УДАЛЯЕМ лог-папку: {folder_name} (дата: {folder_date.date()})")
-
-                    try:
-                        shutil.rmtree(folder_path)
-
-                        deleted_folders.append({
-                            'folder_name': folder_name,
-                            'folder_date': folder_date.strftime('%Y-%m-%d'),
-                            'path': folder_path,
-                        })
-
-                        logger.info(f"Лог-папка удалена: {folder_name}")
-
-                    except PermissionError as e:
-                        error_msg = f"Нет прав для удаления {folder_path}: {str(e)}"
-                        logger.error(error_msg)
-                        errors.append(error_msg)
-
-                    except Exception as e:
-                        error_msg = f"Ошибка при удалении {folder_path}: {str(e)}"
-                        logger.error(error_msg)
-                        errors.append(error_msg)
-
-                else:
-                    logger.debug(f"ОСТАВЛЯЕМ лог-папку: {folder_name} "
-                                 f"(дата: {folder_date.date()}, еще актуальна)")
-
-            except ValueError:
-                logger.debug(f"ПРОПУСКАЕМ папку: {folder_name} (не формат даты YYYY-MM-DD)")
-                continue
-
-    except PermissionError as e:
-        error_msg = f"Нет доступа к папке logs: {str(e)}"
-        logger.error(error_msg)
-        errors.append(error_msg)
-
-    except Exception as e:
-        error_msg = f"Ошибка при чтении папки logs: {str(e)}"
-        logger.error(error_msg)
-        errors.append(error_msg)
-
+    sweep = sweep_layouts([
+        DateFolderLayout('logs', logs_path, days_threshold),
+        TimestampFileLayout('flat_logs', logs_path, days_threshold,
+                            pattern=r'celery_(?:worker|beat)_(\d{8}_\d{6})\.log'),
+    ])
     result = {
-        'success': len(errors) == 0,
+        'success': sweep['success'],
         'threshold_date': threshold_date.strftime('%Y-%m-%d'),
         'days_threshold': days_threshold,
         'logs_path': logs_path,
-        'deleted_folders': deleted_folders,
-        'deleted_count': len(deleted_folders),
-        'errors': errors,
-        'error_count': len(errors),
-        'timestamp': datetime.now().isoformat(),
-        'total_space_freed_mb': sum(folder.get('size_mb', 0) for folder in deleted_folders)
+        'deleted_folders': _as_folders(sweep['deleted']),
+        'deleted_count': sweep['deleted_count'],
+        'errors': sweep['errors'],
+        'error_count': sweep['error_count'],
+        'timestamp': sweep['timestamp'],
+        'total_space_freed_mb': sweep['total_space_freed_mb'],
     }
 
-    logger.info("\n" + "=" * 50)
-    logger.info("ИТОГИ ОЧИСТКИ ЛОГОВ:")
-    logger.info(f"Путь к логам: {logs_path}")
-    logger.info(f"Пороговая дата: {threshold_date.strftime('%Y-%m-%d')}")
-    logger.info(f"Удалено папок: {len(deleted_folders)}")
-    logger.info(f"Ошибок: {len(errors)}")
-
-    if errors:
-        logger.warning("Ошибки:")
-        for error in errors:
-            logger.warning(f"  • {error}")
-
-    logger.info("=" * 50)
-
+    _log_summary("ИТОГИ ОЧИСТКИ ЛОГОВ:", sweep)
     return result
 
 
 def delete_old_folders(days_threshold=7):
-    """Celery task to delete old recording folders for specified cameras.
+    """Celery task to delete old recording folders.
 
-    This task removes recording folders older than the specified threshold.
-    It can accept camera IDs directly or automatically discover them from
-    the recordings directory structure.
+    This task removes media/recordings/<YYYY-MM-DD> folders older than
+    the specified threshold.
 
     Args:
         days_threshold (int, optional): Number of days to keep recordings.
@@ -157,107 +337,39 @@ def delete_old_folders(days_threshold=7):
             - success (bool): Whether operation completed without errors
             - threshold_date (str): Date threshold in 'YYYY-MM-DD' format
             - days_threshold (int): Days threshold used
-            - camera_ids (List[str]): Camera IDs processed
             - deleted_folders (List[dict]): Details of deleted folders
             - deleted_count (int): Number of folders deleted
             - errors (List[str]): Error messages encountered
             - error_count (int): Number of errors
             - timestamp (str): ISO timestamp of completion
+            - total_space_freed_mb (float): Megabytes freed
     """
 
     logger.info("=" * 50)
     logger.info(f"НАЧАЛО ОЧИСТКИ. Порог: {days_threshold} дней")
 
-    base_file = os.path.abspath(__file__)
-    base_dir = os.path.dirname(os.path.dirname(base_file))
-
-    recordings_base = os.path.join(base_dir, "media", "recordings")
+    recordings_base = os.path.join(get_absolute_media_path(), "recordings")
     threshold_date = datetime.now() - timedelta(days=days_threshold)
 
-    deleted_folders = []
-    errors = []
-
-    try:
-        items = os.listdir(recordings_base)
-        logger.info(f"Найдено элементов в media/recordings: {len(items)}")
-
-        for folder_name in items:
-            folder_path = os.path.join(recordings_base, folder_name)
-
-            if not os.path.isdir(folder_path):
-                logger.debug(f"ПРОПУСКАЕМ файл: {folder_name}")
-                continue
-
-            try:
-                folder_date = datetime.strptime(folder_name, '%Y-%m-%d')
-
-                if folder_date < threshold_date:
-                    logger.info(f"  УДАЛЯЕМ папку: {folder_name} (дата: {folder_date.date()})")
-
-                    try:
-                        shutil.rmtree(folder_path)
-
-                        deleted_folders.append({
-                            'folder_name': folder_name,
-                            'folder_date': folder_date.strftime('%Y-%m-%d'),
-                            'path': folder_path,
-                        })
-
-                        logger.info(f"Папка с видео удалена: {folder_name}")
-
-                    except PermissionError as e:
-                        error_msg = f"Нет прав для удаления {folder_path}: {str(e)}"
-                        logger.error(error_msg)
-                        errors.append(error_msg)
-
-                    except Exception as e:
-                        error_msg = f"Ошибка при удалении {folder_path}: {str(e)}"
-                        logger.error(error_msg)
-                        errors.append(error_msg)
-
-                else:
-                    logger.debug(f"ОСТАВЛЯЕМ папку: {recordings_base}/{folder_name} "
-                                 f"(дата: {folder_date.date()}, еще актуальна)")
-
-            except ValueError:
-                logger.debug(f"ПРОПУСКАЕМ папку: {recordings_base}/{folder_name} "
-                             f"(не формат даты YYYY-MM-DD)")
-                continue
-
-    except PermissionError as e:
-        error_msg = f"Нет доступа к {recordings_base}: {str(e)}"
-        logger.error(error_msg)
-        errors.append(error_msg)
-
-    except Exception as e:
-        error_msg = f"Ошибка при чтении {recordings_base}: {str(e)}"
+    sweep = sweep_layouts([DateFolderLayout('recordings', recordings_base, days_threshold)])
+    if not os.path.isdir(recordings_base):
+        error_msg = f"Нет доступа к {recordings_base}: папка не существует"
         logger.error(error_msg)
-        errors.append(error_msg)
+        sweep['errors'].append(error_msg)
+        sweep['error_count'] += 1
+        sweep['success'] = False
 
     result = {
-        'success': len(errors) == 0,
+        'success': sweep['success'],
         'threshold_date': threshold_date.strftime('%Y-%m-%d'),
         'days_threshold': days_threshold,
-        'deleted_folders': deleted_folders,
-        'deleted_count': len(deleted_folders),
-        'errors': errors,
-        'error_count': len(errors),
-        'timestamp': datetime.now().isoformat()
+        'deleted_folders': _as_folders(sweep['deleted']),
+        'deleted_count': sweep['deleted_count'],
+        'errors': sweep['errors'],
+        'error_count': sweep['error_count'],
+        'timestamp': sweep['timestamp'],
+        'total_space_freed_mb': sweep['total_space_freed_mb'],
     }
 
-    logger.info("\n" + "=" * 50)
-    logger.info("ИТОГИ ОЧИСТКИ:")
-    logger.info(f"Удалено папок: {len(deleted_folders)}")
-    logger.info(f"Ошибок: {len(errors)}")
-
-    if deleted_folders:
-        logger.info("Удаление прошло успешно.")
-
-    if errors:
-        logger.warning("Ошибки:")
-        for error in errors:
-            logger.warning(f"{error}")
-
-    logger.info("=" * 50)
-
+    _log_summary("ИТОГИ ОЧИСТКИ:", sweep)
     return result
@@ -0,0 +1,61 @@
+import os
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from celery_task.retention_service import BASE_DIR
+from logs.logging_config import get_logger
+from surveillance.schemas.repository import Recordings
+from surveillance.utils.export_utils import ExportError, concat_recordings
+
+logger = get_logger()
+
+
+def get_digest_path(cam_id: str, day: date) -> str:
+    """Absolute path of the condensed motion video of a camera for one day."""
+    return os.path.join(BASE_DIR, "media", "recordings", day.strftime("%Y-%m-%d"), str(cam_id),
+                        f"motion_digest_{cam_id}_{day.strftime('%Y%m%d')}.mp4")
+
+
+async def build_motion_digests(day: Optional[date] = None) -> dict:
+    """Join the motion event clips of every camera for `day` into one video each.
+
+    Clips are concatenated with stream copy, so a digest costs a disk copy
+    rather than an encode. Digests are indexed with kind `digest`, which
+    keeps them under retention and out of window exports.
+
+    Args:
+        day (Optional[date]): Day to condense, yesterday by default.
+
+    Returns:
+        dict: success, created, skipped, errors, day.
+    """
+    day = day or (datetime.now() - timedelta(days=1)).date()
+    start = datetime.combine(day, datetime.min.time())
+    end = start + timedelta(days=1)
+    result = {'success': True, 'created': [], 'skipped': 0, 'errors': [], 'day': day.isoformat()}
+
+    for cam_id in await Recordings.select_camera_ids():
+        rows = await Recordings.select_range(cam_id, start, end, lookback=timedelta(0), limit=10000)
+        events = [row for row in rows if row.kind == "event" and row.tier == "original"]
+        out_path = get_digest_path(cam_id, day)
+        if not events or os.path.exists(out_path):
+            result['skipped'] += 1
+            continue
+
+        paths = [os.path.join(BASE_DIR, row.path) for row in events]
+        try:
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+            await concat_recordings(paths, out_path)
+        except (OSError, ExportError) as e:
+            error_msg = f"Error building motion digest for camera {cam_id}: {e}"
+            logger.error(f"[ERROR] {error_msg}")
+            result['errors'].append(error_msg)
+            continue
+
+        await Recordings.add_recording(cam_id, os.path.relpath(out_path, BASE_DIR), os.path.getsize(out_path),
+                                       events[0].started_at, kind="digest")
+        result['created'].append(out_path)
+
+    result['success'] = not result['errors']
+    logger.info(f"[INFO] Motion digests for {day}: {len(result['created'])} created")
+    return result
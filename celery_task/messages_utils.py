@@ -1,21 +1,21 @@
+import asyncio
+import json
 import os
-import smtplib
-import time
 from datetime import datetime
 from email import encoders
 from email.mime.base import MIMEBase
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from typing import Optional
 import httpx
-import requests
+from celery_task.notification_worker import NotificationWorker, get_notification_worker
+from celery_task.rate_limiter import RateLimited, telegram_retry_after
+from surveillance.utils.media_prep import prepare_clip
 
 
 def send_health_email(subject: str) -> str:
     """Send server health check email."""
-    smtp_server = os.getenv("SMTP_SERVER")
-    smtp_port = os.getenv("SMTP_PORT")
     sender_email = os.getenv("SENDER_EMAIL")
-    sender_password = os.getenv("SENDER_PASSWORD")
     recipient_email = os.getenv("RECIPIENT_EMAIL")
 
     message = "I report. The server, like Grandpa Lenin, is more alive than all the living. ;)"
@@ -25,31 +25,44 @@ def send_health_email(subject: str) -> str:
     msg["To"] = recipient_email
 
     try:
-        with smtplib.SMTP(smtp_server, int(smtp_port)) as server:
-            server.starttls()
-            server.login(sender_email, sender_password)
-            server.send_message(msg)
-            return f"Email sent to {recipient_email}"
+        worker = get_notification_worker()
+        worker.run(worker.smtp.send(msg))
+        return f"Email sent to {recipient_email}"
     except Exception as e:
         return f"Error sending email: {e}"
 
 
 def send_screenshot(cam_id, screenshot_path):
     """Send screenshot email - все в одной функции."""
-    smtp_server = os.getenv("SMTP_SERVER")
-    smtp_port = int(os.getenv("SMTP_PORT") or 587)
+    return send_screenshots(cam_id, [screenshot_path])
+
+
+def build_screenshots_email(cam_id, screenshot_paths, suppressed=0) -> MIMEMultipart:
+    """Build one email with several screenshots of a camera attached.
+
+    Args:
+        cam_id: Camera ID.
+        screenshot_paths: Paths of the screenshots to attach.
+        suppressed: Number of further alerts of the same window that were not attached.
+    """
     sender_email = os.getenv("SENDER_EMAIL")
-    sender_password = os.getenv("SENDER_PASSWORD")
     recipient_email = os.getenv("RECIPIENT_EMAIL")
 
     msg = MIMEMultipart()
     msg["From"] = sender_email
     msg["To"] = recipient_email
     msg["Subject"] = f"Motion detected on camera {cam_id}"
+    if len(screenshot_paths) > 1 or suppressed:
+        msg["Subject"] += f" ({len(screenshot_paths) + suppressed} alerts)"
+        msg.attach(MIMEText(alert_summary(cam_id, len(screenshot_paths), suppressed)))
 
-    with open(screenshot_path, "rb") as f:
-        part = MIMEBase("application", "octet-stream")
-        part.set_payload(f.read())
+    for screenshot_path in screenshot_paths:
+        try:
+            with open(screenshot_path, "rb") as f:
+                part = MIMEBase("application", "octet-stream")
+                part.set_payload(f.read())
+        except FileNotFoundError:
+            continue
         encoders.encode_base64(part)
         part.add_header(
             "Content-Disposition",
@@ -57,14 +70,30 @@ def send_screenshot(cam_id, screenshot_path):
         )
         msg.attach(part)
 
-    with smtplib.SMTP(smtp_server, smtp_port) as server:
-        server.starttls()
-        server.login(sender_email, sender_password)
-        server.send_message(msg)
+    return msg
+
 
+async def email_screenshots(worker: NotificationWorker, cam_id, screenshot_paths, suppressed=0) -> None:
+    """Send the screenshots of a camera in one email over the worker's SMTP pool."""
+    msg = await asyncio.to_thread(build_screenshots_email, cam_id, screenshot_paths, suppressed)
+    await worker.smtp.send(msg)
+
+
+def send_screenshots(cam_id, screenshot_paths, suppressed=0):
+    """Send one email with several screenshots of a camera attached."""
+    worker = get_notification_worker()
+    worker.run(email_screenshots(worker, cam_id, screenshot_paths, suppressed))
     return "Sent"
 
 
+def alert_summary(cam_id, count, suppressed=0):
+    """Caption of a coalesced alert."""
+    text = f"Движение на камере {cam_id} ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')}): {count} снимков"
+    if suppressed:
+        text += f", ещё {suppressed} пропущено"
+    return text
+
+
 def get_telegram_config():
     """Get Telegram bot configuration."""
     return {
@@ -73,71 +102,294 @@ def get_telegram_config():
     }
 
 
-def send_telegram_photo_service(cam_id: str, screenshot_path: str, chat_id: int) -> str:
-    """Send photo to Telegram chat."""
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+async def telegram_post(worker: NotificationWorker, chat_id: int, url: str, **kwargs) -> httpx.Response:
+    """POST to the Bot API within the rate limits of the chat.
+
+    A 429 blocks the chat bucket for every worker for `retry_after` seconds;
+    short waits (up to TELEGRAM_MAX_INLINE_WAIT) are waited out here.
+
+    Raises:
+        RateLimited: The chat is blocked for longer, the send has to be rescheduled.
+    """
+    buckets = worker.limiter.telegram_buckets(chat_id)
+    max_inline_wait = float(os.getenv("TELEGRAM_MAX_INLINE_WAIT", 10))
+    while True:
+        await worker.limiter.acquire(buckets, max_wait=max_inline_wait)
+        response = await worker.http.post(url, **kwargs)
+        retry_after = telegram_retry_after(response)
+        if retry_after is None:
+            return response
+        await worker.limiter.block(buckets[0], retry_after)
+
+
+async def telegram_send_media(worker: NotificationWorker, cam_id: str, media_path: str, chat_id: int,
+                              kind: str = "photo") -> str:
+    """Upload a photo or video to one Telegram chat over the shared client."""
     config = get_telegram_config()
 
     if not config['token']:
         return "TELEGRAM_BOT_TOKEN not found"
 
-    url = f"https://api.telegram.org/bot{config['token']}/sendPhoto"
+    url = f"https://api.telegram.org/bot{config['token']}/{TELEGRAM_MEDIA_METHODS[kind]}"
     caption = f"Движение на камере {cam_id} ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})"
+    data = {"chat_id": chat_id, "caption": caption}
+    if kind == "video":
+        data["supports_streaming"] = True
 
     try:
-        with open(screenshot_path, "rb") as photo_file:
-            files = {"photo": photo_file}
-            data = {"chat_id": chat_id, "caption": caption}
-            response = httpx.post(url, data=data, files=files, timeout=5)
+        if kind == "video":
+            media_path = await asyncio.to_thread(prepare_clip, cam_id, media_path)
+        content = await asyncio.to_thread(_read_file, media_path)
+        timeout = 5 if kind == "photo" else get_telegram_config_video(len(content))['timeout']
+        response = await telegram_post(worker, chat_id, url, data=data,
+                                       files={kind: (os.path.basename(media_path), content)}, timeout=timeout)
+    except FileNotFoundError:
+        return f"File not found: {media_path}"
+    except RateLimited as e:
+        return f"Rate limited by Telegram, retry after {e.retry_after:.0f} s"
+    except httpx.HTTPError as e:
+        return f"Error sending {kind}: {e}"
 
-            if response.status_code == 200:
-                return f"Photo sent to chat {chat_id}"
-            else:
-                return f"Telegram API error: {response.status_code}, {response.text}"
+    if response.status_code == 200:
+        return f"{kind.capitalize()} sent to chat {chat_id}"
+    return f"Telegram API error: {response.status_code}, {response.text}"
 
-    except FileNotFoundError:
-        return f"File not found: {screenshot_path}"
-    except Exception as e:
-        return f"Error sending photo: {e}"
 
+def send_telegram_photo_service(cam_id: str, screenshot_path: str, chat_id: int) -> str:
+    """Send photo to Telegram chat."""
+    worker = get_notification_worker()
+    return worker.run(telegram_send_media(worker, cam_id, screenshot_path, chat_id, kind="photo"))
 
-def get_telegram_config_video():
-    """Get Telegram bot configuration."""
+
+def get_telegram_config_video(size: int = 0):
+    """Get Telegram bot configuration.
+
+    The upload timeout grows with the clip: TELEGRAM_UPLOAD_TIMEOUT seconds
+    plus the time to send `size` bytes at TELEGRAM_UPLOAD_MIN_KBPS, the
+    slowest uplink the clip upload must survive.
+
+    Args:
+        size (int): Size of the clip in bytes.
+    """
+    min_rate = float(os.getenv("TELEGRAM_UPLOAD_MIN_KBPS", 100)) * 1024
     return {
         'token': os.getenv("TELEGRAM_BOT_TOKEN"),
-        'video_delay': int(os.getenv("BOT_SEND_VIDEO", 5)) + 2,
-        'timeout': int(os.getenv("BOT_SEND_VIDEO", 5)) + 3,
+        'timeout': float(os.getenv("TELEGRAM_UPLOAD_TIMEOUT", 30)) + size / min_rate,
     }
 
 
 def send_telegram_video_service(cam_id: str, video_path: str, chat_id: int) -> str:
     """Send video to Telegram chat."""
-    config = get_telegram_config_video()
+    worker = get_notification_worker()
+    return worker.run(telegram_send_media(worker, cam_id, video_path, chat_id, kind="video"))
+
+
+TELEGRAM_MEDIA_METHODS = {
+    "photo": "sendPhoto",
+    "video": "sendVideo",
+    "animation": "sendAnimation",
+    "document": "sendDocument",
+}
+
+
+def extract_telegram_file_id(message: dict) -> tuple[str, str]:
+    """Return (media type, file_id) of the media attached to a sent Telegram message.
+
+    Telegram may store a clip as `video`, `animation` or `document`
+    depending on its codec, so the type found here decides which method
+    re-sends it by reference.
+    """
+    if message.get("photo"):
+        return "photo", message["photo"][-1]["file_id"]
+    for media_type in ("video", "animation", "document"):
+        if message.get(media_type):
+            return media_type, message[media_type]["file_id"]
+    raise KeyError("No media in Telegram response")
 
+
+async def telegram_media_fanout(worker: NotificationWorker, cam_id: str, media_path: str,
+                                chat_ids: list[int], kind: str = "photo") -> dict:
+    """Upload a screenshot or clip once and send it to every chat by file_id.
+
+    The file is uploaded to the first chat that accepts it; the other chats
+    receive the returned `file_id` concurrently, so upstream traffic does not
+    grow with the number of subscribers and the fan-out takes about one
+    round trip.
+
+    Args:
+        worker (NotificationWorker): Worker owning the HTTP client and the rate limiter.
+        cam_id (str): Camera ID used in the caption.
+        media_path (str): Path to the JPEG or mp4 file.
+        chat_ids (list[int]): Telegram chats to notify.
+        kind (str): photo or video.
+
+    Returns:
+        dict: sent (chat IDs), errors (chat ID -> message), retry (chat ID -> seconds
+            Telegram asked to wait), uploaded (bool).
+    """
+    result = {'sent': [], 'errors': {}, 'retry': {}, 'uploaded': False}
+    config = get_telegram_config()
     if not config['token']:
-        return "TELEGRAM_BOT_TOKEN not found"
+        result['errors'] = {chat_id: "TELEGRAM_BOT_TOKEN not found" for chat_id in chat_ids}
+        return result
 
-    time.sleep(config['video_delay'])
+    if kind == "video":
+        # Prepared once and cached, every chat and every retry uploads the same H.264 file
+        media_path = await asyncio.to_thread(prepare_clip, cam_id, media_path)
+    try:
+        content = await asyncio.to_thread(_read_file, media_path)
+    except FileNotFoundError:
+        result['errors'] = {chat_id: f"File not found: {media_path}" for chat_id in chat_ids}
+        return result
 
-    url = f"https://api.telegram.org/bot{config['token']}/sendVideo"
+    base_url = f"https://api.telegram.org/bot{config['token']}"
     caption = f"Движение на камере {cam_id} ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})"
+    timeout = 5 if kind == "photo" else get_telegram_config_video(len(content))['timeout']
+    media_type, file_id = kind, None
 
-    try:
-        with open(video_path, "rb") as video_file:
-            files = {"video": video_file}
-            data = {
-                "chat_id": chat_id,
-                "caption": caption,
-                "supports_streaming": True
-            }
-
-            response = requests.post(url, data=data, files=files, timeout=config['timeout'])
-
-            if response.status_code == 200:
-                return f"Video sent to chat {chat_id}"
+    async def send(chat_id: int) -> Optional[httpx.Response]:
+        data = {"chat_id": chat_id, "caption": caption}
+        if media_type == "video":
+            data["supports_streaming"] = True
+        try:
+            if file_id is None:
+                response = await telegram_post(worker, chat_id, f"{base_url}/{TELEGRAM_MEDIA_METHODS[kind]}",
+                                               data=data, files={kind: (os.path.basename(media_path), content)},
+                                               timeout=timeout)
             else:
-                return f"Telegram API error: {response.status_code}, {response.text}"
+                response = await telegram_post(worker, chat_id, f"{base_url}/{TELEGRAM_MEDIA_METHODS[media_type]}",
+                                               data={**data, media_type: file_id}, timeout=timeout)
+        except RateLimited as e:
+            result['retry'][chat_id] = e.retry_after
+            return None
+        except httpx.HTTPError as e:
+            result['errors'][chat_id] = f"Error sending {kind}: {e}"
+            return None
 
-    except FileNotFoundError:
-        return f"Video file not found: {video_path}"
-    except Exception as e:
-        return f"Error sending video: {e}"
+        if response.status_code != 200:
+            result['errors'][chat_id] = f"Telegram API error: {response.status_code}, {response.text}"
+            return None
+        result['sent'].append(chat_id)
+        return response
+
+    pending = list(chat_ids)
+    while pending and file_id is None:
+        response = await send(pending.pop(0))
+        if response is None:
+            continue
+        result['uploaded'] = True
+        try:
+            media_type, file_id = extract_telegram_file_id(response.json()["result"])
+        except (KeyError, IndexError, ValueError):
+            media_type, file_id = kind, None
+
+    await asyncio.gather(*(send(chat_id) for chat_id in pending))
+    return result
+
+
+def send_telegram_media_fanout(cam_id: str, media_path: str, chat_ids: list[int], kind: str = "photo") -> dict:
+    """Blocking wrapper of `telegram_media_fanout` running on the notification worker."""
+    worker = get_notification_worker()
+    return worker.run(telegram_media_fanout(worker, cam_id, media_path, chat_ids, kind))
+
+
+async def telegram_media_group_fanout(worker: NotificationWorker, cam_id: str, screenshot_paths: list[str],
+                                      chat_ids: list[int], suppressed: int = 0) -> dict:
+    """Send several screenshots as one Telegram album, uploaded once.
+
+    The album is uploaded to the first chat that accepts it and sent to the
+    other chats concurrently by the file_ids of its photos.
+
+    Args:
+        worker (NotificationWorker): Worker owning the HTTP client and the rate limiter.
+        cam_id (str): Camera ID used in the caption.
+        screenshot_paths (list[str]): Up to 10 JPEG files.
+        chat_ids (list[int]): Telegram chats to notify.
+        suppressed (int): Alerts of the same window that were not attached.
+
+    Returns:
+        dict: sent (chat IDs), errors (chat ID -> message), retry (chat ID -> seconds
+            Telegram asked to wait), uploaded (bool).
+    """
+    screenshot_paths = [path for path in screenshot_paths[:10] if os.path.exists(path)]
+    if len(screenshot_paths) == 1 and not suppressed:
+        return await telegram_media_fanout(worker, cam_id, screenshot_paths[0], chat_ids, kind="photo")
+
+    result = {'sent': [], 'errors': {}, 'retry': {}, 'uploaded': False}
+    config = get_telegram_config()
+    if not config['token'] or not screenshot_paths:
+        error = "TELEGRAM_BOT_TOKEN not found" if not config['token'] else "No screenshots found"
+        result['errors'] = {chat_id: error for chat_id in chat_ids}
+        return result
+
+    if len(screenshot_paths) == 1:
+        # An album needs at least two items, send a single photo with the summary instead
+        method, kind = "sendPhoto", "photo"
+    else:
+        method, kind = "sendMediaGroup", "album"
+    url = f"https://api.telegram.org/bot{config['token']}/{method}"
+    caption = alert_summary(cam_id, len(screenshot_paths), suppressed)
+    contents = await asyncio.gather(*(asyncio.to_thread(_read_file, path) for path in screenshot_paths))
+    file_ids: Optional[list[str]] = None
+
+    async def send(chat_id: int) -> Optional[httpx.Response]:
+        try:
+            if kind == "photo":
+                data = {"chat_id": chat_id, "caption": caption}
+                if file_ids:
+                    response = await telegram_post(worker, chat_id, url, data={**data, "photo": file_ids[0]})
+                else:
+                    response = await telegram_post(worker, chat_id, url, data=data, files={
+                        "photo": (os.path.basename(screenshot_paths[0]), contents[0])})
+            elif file_ids:
+                media = [{"type": "photo", "media": file_id} for file_id in file_ids]
+                media[0]["caption"] = caption
+                response = await telegram_post(worker, chat_id, url,
+                                               data={"chat_id": chat_id, "media": json.dumps(media)})
+            else:
+                media = [{"type": "photo", "media": f"attach://photo{i}"} for i in range(len(contents))]
+                media[0]["caption"] = caption
+                files = {f"photo{i}": (os.path.basename(path), content)
+                         for i, (path, content) in enumerate(zip(screenshot_paths, contents))}
+                response = await telegram_post(worker, chat_id, url,
+                                               data={"chat_id": chat_id, "media": json.dumps(media)}, files=files)
+        except RateLimited as e:
+            result['retry'][chat_id] = e.retry_after
+            return None
+        except httpx.HTTPError as e:
+            result['errors'][chat_id] = f"Error sending album: {e}"
+            return None
+
+        if response.status_code != 200:
+            result['errors'][chat_id] = f"Telegram API error: {response.status_code}, {response.text}"
+            return None
+        result['sent'].append(chat_id)
+        return response
+
+    pending = list(chat_ids)
+    while pending and not file_ids:
+        response = await send(pending.pop(0))
+        if response is None:
+            continue
+        result['uploaded'] = True
+        try:
+            messages = response.json()["result"]
+            messages = messages if isinstance(messages, list) else [messages]
+            file_ids = [extract_telegram_file_id(message)[1] for message in messages]
+        except (KeyError, IndexError, ValueError):
+            file_ids = None
+
+    await asyncio.gather(*(send(chat_id) for chat_id in pending))
+    return result
+
+
+def send_telegram_media_group_fanout(cam_id: str, screenshot_paths: list[str], chat_ids: list[int],
+                                     suppressed: int = 0) -> dict:
+    """Blocking wrapper of `telegram_media_group_fanout` running on the notification worker."""
+    worker = get_notification_worker()
+    return worker.run(telegram_media_group_fanout(worker, cam_id, screenshot_paths, chat_ids, suppressed))
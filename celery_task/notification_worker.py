@@ -0,0 +1,186 @@
+import asyncio
+import os
+import threading
+import time
+from email.message import Message
+from typing import Any, Coroutine, Optional
+
+import aiosmtplib
+import httpx
+from celery.signals import worker_shutdown
+
+from celery_task.rate_limiter import RateLimiter
+from logs.logging_config import get_logger
+
+logger = get_logger()
+
+
+class SMTPPool:
+    """A few logged-in SMTP sessions reused across emails.
+
+    A session is opened (connect, STARTTLS, login) only when no idle one is
+    available, and an idle session older than `idle_timeout` is reopened
+    before use, since servers drop quiet connections after a few minutes.
+    """
+
+    def __init__(self, limiter: Optional[RateLimiter] = None, size: Optional[int] = None,
+                 idle_timeout: Optional[float] = None):
+        """Create an empty pool, sessions are opened on demand.
+
+        Args:
+            limiter (Optional[RateLimiter]): Limiter whose SMTP bucket every message waits for.
+            size (Optional[int]): Maximum number of concurrent SMTP sessions.
+            idle_timeout (Optional[float]): Seconds an idle session is trusted to still be open.
+        """
+        self.limiter = limiter
+        self.size = size or int(os.getenv("SMTP_POOL_SIZE", 2))
+        self.idle_timeout = idle_timeout or float(os.getenv("SMTP_IDLE_TIMEOUT", 60))
+        self.idle: list[tuple[aiosmtplib.SMTP, float]] = []
+        self.slots = asyncio.Semaphore(self.size)
+
+    def _new_client(self) -> aiosmtplib.SMTP:
+        return aiosmtplib.SMTP(
+            hostname=os.getenv("SMTP_SERVER"),
+            port=int(os.getenv("SMTP_PORT") or 587),
+            username=os.getenv("SENDER_EMAIL"),
+            password=os.getenv("SENDER_PASSWORD"),
+            start_tls=True,
+            timeout=30,
+        )
+
+    async def _acquire(self) -> aiosmtplib.SMTP:
+        while self.idle:
+            client, released_at = self.idle.pop()
+            if client.is_connected and time.monotonic() - released_at < self.idle_timeout:
+                return client
+            await self._quit(client)
+        client = self._new_client()
+        await client.connect()
+        return client
+
+    async def _quit(self, client: aiosmtplib.SMTP) -> None:
+        try:
+            if client.is_connected:
+                await client.quit()
+        except aiosmtplib.SMTPException:
+            client.close()
+
+    async def send(self, message: Message) -> None:
+        """Send a message over a pooled session, reconnecting once if the session went stale.
+
+        Raises:
+            aiosmtplib.SMTPException: The server rejected the message or is unreachable.
+        """
+        if self.limiter is not None:
+            await self.limiter.acquire(self.limiter.smtp_buckets())
+        async with self.slots:
+            client = await self._acquire()
+            try:
+                await client.send_message(message)
+            except aiosmtplib.SMTPServerDisconnected:
+                stale, client = client, self._new_client()
+                try:
+                    await client.connect()
+                    await client.send_message(message)
+                except BaseException:
+                    client.close()
+                    raise
+                finally:
+                    stale.close()
+            except aiosmtplib.SMTPException:
+                await self._quit(client)
+                raise
+            self.idle.append((client, time.monotonic()))
+
+    async def close(self) -> None:
+        while self.idle:
+            client, _ = self.idle.pop()
+            await self._quit(client)
+
+
+def is_transient_smtp_error(error: Exception) -> bool:
+    """True for SMTP failures worth retrying: connection problems and 4xx answers."""
+    if isinstance(error, aiosmtplib.SMTPResponseException):
+        return error.code < 500
+    return isinstance(error, (aiosmtplib.SMTPException, OSError, asyncio.TimeoutError))
+
+
+class NotificationWorker:
+    """Event loop thread doing all network I/O of notifications for one process.
+
+    The loop owns a persistent `httpx.AsyncClient` (keep-alive and HTTP
+    connection pooling towards the Telegram API) and an `SMTPPool`, so a send
+    costs a request instead of a TCP/TLS handshake and an SMTP login. Celery
+    tasks hand coroutines over with `run()`; when the worker uses the threads
+    pool, sends of many tasks run concurrently on the one loop. All sends
+    wait for their `RateLimiter` buckets.
+    """
+
+    def __init__(self, max_connections: Optional[int] = None):
+        """Start the loop thread.
+
+        Args:
+            max_connections (Optional[int]): Maximum number of open HTTP connections.
+        """
+        self.max_connections = max_connections or int(os.getenv("NOTIFY_HTTP_CONNECTIONS", 20))
+        self.pid = os.getpid()
+        self.loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="notification-worker", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.http = httpx.AsyncClient(
+            timeout=httpx.Timeout(30, connect=5),
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections),
+        )
+        self.limiter = RateLimiter()
+        self.smtp = SMTPPool(self.limiter)
+        self._ready.set()
+        self.loop.run_forever()
+
+    def run(self, coro: Coroutine) -> Any:
+        """Run a coroutine on the worker loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def _close(self) -> None:
+        await self.http.aclose()
+        await self.smtp.close()
+        await self.limiter.close()
+
+    def close(self) -> None:
+        """Close the HTTP and SMTP connections and stop the loop."""
+        try:
+            self.run(self._close())
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=5)
+
+
+_worker: Optional[NotificationWorker] = None
+_worker_lock = threading.Lock()
+
+
+def get_notification_worker() -> NotificationWorker:
+    """Notification worker of the current process, started on first use.
+
+    A worker inherited through fork belongs to the parent process (its thread
+    does not exist in the child), so a new one is started in that case.
+    """
+    global _worker
+    with _worker_lock:
+        if _worker is None or _worker.pid != os.getpid():
+            _worker = NotificationWorker()
+            logger.info("[INFO] Notification worker started")
+        return _worker
+
+
+@worker_shutdown.connect
+def close_notification_worker(**kwargs) -> None:
+    global _worker
+    if _worker is not None and _worker.pid == os.getpid():
+        _worker.close()
+        _worker = None
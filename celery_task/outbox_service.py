@@ -0,0 +1,130 @@
+import asyncio
+import json
+import os
+from datetime import timedelta
+from typing import Optional
+
+from celery_task.messages_utils import email_screenshots, telegram_media_fanout, telegram_media_group_fanout
+from celery_task.notification_worker import NotificationWorker, is_transient_smtp_error
+from logs.logging_config import get_logger
+from surveillance.schemas.repository import Notifications
+
+logger = get_logger()
+
+
+def max_attempts() -> int:
+    return int(os.getenv("NOTIFY_MAX_RETRIES", 20))
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff of a failed delivery, capped at 10 minutes."""
+    return min(600, 10 * 2 ** max(0, attempts - 1))
+
+
+async def deliver_email(worker: NotificationWorker, row, payload: dict) -> None:
+    try:
+        await email_screenshots(worker, payload["cam_id"], payload["paths"], payload.get("suppressed", 0))
+    except Exception as e:
+        failed = not is_transient_smtp_error(e) or row.attempts >= max_attempts()
+        await Notifications.reschedule(row.id, row.claim, retry_delay(row.attempts), str(e), failed=failed)
+        logger.error(f"[ERROR] Email notification {row.id} failed: {e}")
+        return
+    await Notifications.mark_sent(row.id, row.claim)
+
+
+async def deliver_telegram(worker: NotificationWorker, row, payload: dict) -> None:
+    if row.kind == "telegram_album":
+        result = await telegram_media_group_fanout(worker, payload["cam_id"], payload["paths"],
+                                                   payload["chat_ids"], payload.get("suppressed", 0))
+    else:
+        kind = "video" if row.kind == "telegram_video" else "photo"
+        result = await telegram_media_fanout(worker, payload["cam_id"], payload["path"], payload["chat_ids"], kind)
+
+    error = "; ".join(f"{chat_id}: {message}" for chat_id, message in result['errors'].items()) or None
+    if result['retry']:
+        # Deliver again to the chats Telegram asked to wait, the others already have the alert
+        payload = {**payload, "chat_ids": list(result['retry'])}
+        await Notifications.reschedule(row.id, row.claim, max(result['retry'].values()),
+                                       error or "rate limited", payload=json.dumps(payload))
+    elif not result['sent'] and result['errors'] and row.attempts < max_attempts():
+        await Notifications.reschedule(row.id, row.claim, retry_delay(row.attempts), error)
+    elif not result['sent'] and result['errors']:
+        await Notifications.reschedule(row.id, row.claim, 0, error, failed=True)
+    else:
+        await Notifications.mark_sent(row.id, row.claim, error)
+
+
+DELIVERIES = {
+    "email_screenshots": deliver_email,
+    "telegram_album": deliver_telegram,
+    "telegram_photo": deliver_telegram,
+    "telegram_video": deliver_telegram,
+}
+
+# Deliveries drained by the worker of each queue, so a long clip upload never delays photo alerts
+LANES = {
+    "alerts": ["email_screenshots", "telegram_album", "telegram_photo"],
+    "media": ["telegram_video"],
+}
+
+
+def lanes_of(kinds) -> list[str]:
+    """Lanes that have to be drained after alerts of the given kinds were stored."""
+    return [lane for lane, lane_kinds in LANES.items() if set(kinds) & set(lane_kinds)]
+
+
+async def keep_claimed(row, lease: timedelta) -> None:
+    """Renew the claim of a row every third of the lease while it is delivered.
+
+    A clip upload may legitimately take longer than the lease (its timeout
+    grows with the clip size), another drain must not claim it meanwhile.
+    """
+    while True:
+        await asyncio.sleep(lease.total_seconds() / 3)
+        if not await Notifications.renew(row.id, row.claim):
+            return
+
+
+async def deliver(worker: NotificationWorker, row, lease: Optional[timedelta] = None) -> None:
+    delivery = DELIVERIES.get(row.kind)
+    if delivery is None:
+        await Notifications.reschedule(row.id, row.claim, 0, f"Unknown notification kind {row.kind}", failed=True)
+        return
+    heartbeat = asyncio.create_task(keep_claimed(row, lease)) if lease else None
+    try:
+        await delivery(worker, row, json.loads(row.payload))
+    except Exception as e:
+        logger.error(f"[ERROR] Notification {row.id} failed: {e}")
+        await Notifications.reschedule(row.id, row.claim, retry_delay(row.attempts), str(e),
+                                       failed=row.attempts >= max_attempts())
+    finally:
+        if heartbeat is not None:
+            heartbeat.cancel()
+
+
+async def drain_outbox(worker: NotificationWorker, lane: str = "alerts", batch_size: int = 50) -> dict:
+    """Deliver every due alert of one lane of the outbox.
+
+    Alerts are claimed in batches and delivered concurrently on the
+    notification worker loop; each row is marked with the claim token, so a
+    row is marked sent exactly once even if drains overlap. A row whose
+    drain died is claimed again after the lease; the claim of a row being
+    delivered is renewed meanwhile, so a slow upload is not sent twice.
+
+    Args:
+        worker (NotificationWorker): Worker of the current process.
+        lane (str): alerts or media, see LANES.
+        batch_size (int): Alerts claimed at once.
+
+    Returns:
+        dict: delivered (rows handled) and batches.
+    """
+    lease = timedelta(seconds=int(os.getenv("OUTBOX_LEASE_SEC", 300)))
+    stats = {'delivered': 0, 'batches': 0}
+    while True:
+        _, rows = await Notifications.claim(limit=batch_size, lease=lease, kinds=LANES[lane])
+        if not rows:
+            return stats
+        await asyncio.gather(*(deliver(worker, row, lease) for row in rows))
+        stats['delivered'] += len(rows)
+        stats['batches'] += 1
@@ -1,12 +1,18 @@
-import asyncio
 import os
 
+from config.config import run_sync
+
 
 def get_absolute_logs_path():
     """Returns absolute path to logs directory."""
     return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs")
 
 
+def get_absolute_media_path():
+    """Returns absolute path to media directory."""
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "media")
+
+
 def get_absolute_recordings_path(camera_id="1"):
     """Returns absolute path to camera recordings directory."""
     return os.path.join(
@@ -16,10 +22,5 @@ def get_absolute_recordings_path(camera_id="1"):
 
 
 def run_async_task(coro):
-    """Helper to run async code in sync context."""
-
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    result = loop.run_until_complete(coro)
-    loop.close()
-    return result
+    """Helper to run async code in sync context, on the process-wide database loop."""
+    return run_sync(coro)
@@ -0,0 +1,196 @@
+import asyncio
+import math
+import os
+import time
+from typing import Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from logs.logging_config import get_logger
+
+logger = get_logger()
+
+KEY_PREFIX = "surveillance:ratelimit:"
+
+# Take one token from every bucket (hashes of tokens, ts, blocked) or from none.
+# ARGV: now, then rate and capacity of each key.
+# Returns the seconds to wait before retrying, "0" if the tokens were taken.
+TAKE_TOKENS = """
+local now = tonumber(ARGV[1])
+local wait = 0
+local tokens = {}
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i])
+    local capacity = tonumber(ARGV[2 * i + 1])
+    local data = redis.call('HMGET', key, 'tokens', 'ts', 'blocked')
+    local blocked = tonumber(data[3]) or 0
+    if blocked > now then
+        wait = math.max(wait, blocked - now)
+    end
+    local available = tonumber(data[1]) or capacity
+    local ts = tonumber(data[2]) or now
+    available = math.min(capacity, available + math.max(0, now - ts) * rate)
+    if available < 1 then
+        wait = math.max(wait, (1 - available) / rate)
+    end
+    tokens[i] = available
+end
+if wait > 0 then
+    return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i])
+    local capacity = tonumber(ARGV[2 * i + 1])
+    redis.call('HSET', key, 'tokens', tostring(tokens[i] - 1), 'ts', tostring(now))
+    redis.call('EXPIRE', key, math.ceil(capacity / rate) + 60)
+end
+return "0"
+"""
+
+
+class RateLimited(Exception):
+    """Raised when a send would have to wait longer than the caller accepts.
+
+    Attributes:
+        retry_after (float): Seconds until the send may be retried.
+    """
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limited, retry after {retry_after:.1f} s")
+        self.retry_after = retry_after
+
+
+class Bucket:
+    """Rate and burst of one limited resource.
+
+    Attributes:
+        name (str): Redis key suffix, e.g. "telegram:global" or "telegram:chat:<id>".
+        rate (float): Tokens added per second.
+        capacity (float): Maximum burst.
+    """
+
+    def __init__(self, name: str, rate: float, capacity: Optional[float] = None):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+
+
+class RateLimiter:
+    """Token buckets for Telegram and SMTP shared by all workers through Redis.
+
+    Every send takes a token from each bucket it is subject to (the per-chat
+    bucket and the global Telegram bucket, or the SMTP bucket) in one atomic
+    step, so a send that has to wait for one bucket does not use up a token
+    of another. It waits instead of failing when a bucket is empty, so sends go out as fast as
+    the upstream allows. A 429 answer blocks the bucket for `retry_after`
+    seconds for every worker. If Redis is unreachable the buckets are kept
+    in process, which keeps one worker within the limits.
+    """
+
+    def __init__(self, url: Optional[str] = None):
+        """Create the limiter, the Redis connection is opened on first use.
+
+        Args:
+            url (Optional[str]): Redis URL, the Celery broker by default.
+        """
+        self.redis = aioredis.Redis.from_url(url or os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+                                             socket_timeout=1, socket_connect_timeout=1)
+        self.take_tokens = self.redis.register_script(TAKE_TOKENS)
+        self.global_rate = float(os.getenv("TELEGRAM_GLOBAL_RATE", 30))
+        self.chat_rate = float(os.getenv("TELEGRAM_CHAT_RATE", 1))
+        self.group_rate = float(os.getenv("TELEGRAM_GROUP_RATE_PER_MIN", 20)) / 60
+        self.smtp_rate = float(os.getenv("SMTP_RATE_PER_MIN", 30)) / 60
+        self._local: dict[str, list[float]] = {}
+        self._redis_retry_at = 0.0
+
+    def telegram_buckets(self, chat_id: int) -> list[Bucket]:
+        """Buckets of a Telegram send, the per-chat bucket first (group chats have negative IDs)."""
+        if int(chat_id) < 0:
+            chat = Bucket(f"telegram:chat:{chat_id}", self.group_rate, capacity=3)
+        else:
+            chat = Bucket(f"telegram:chat:{chat_id}", self.chat_rate)
+        return [chat, Bucket("telegram:global", self.global_rate)]
+
+    def smtp_buckets(self) -> list[Bucket]:
+        return [Bucket("smtp", self.smtp_rate, capacity=5)]
+
+    def _take_local(self, buckets: list[Bucket], now: float) -> float:
+        wait = 0.0
+        states = []
+        for bucket in buckets:
+            tokens, ts, blocked = self._local.setdefault(bucket.name, [bucket.capacity, now, 0.0])
+            if blocked > now:
+                wait = max(wait, blocked - now)
+            tokens = min(bucket.capacity, tokens + max(0.0, now - ts) * bucket.rate)
+            if tokens < 1:
+                wait = max(wait, (1 - tokens) / bucket.rate)
+            states.append((bucket, tokens, blocked))
+        if wait > 0:
+            return wait
+        for bucket, tokens, blocked in states:
+            self._local[bucket.name] = [tokens - 1, now, blocked]
+        return 0.0
+
+    async def _take(self, buckets: list[Bucket]) -> float:
+        now = time.time()
+        if now < self._redis_retry_at:
+            return self._take_local(buckets, now)
+        args = [now]
+        for bucket in buckets:
+            args += [bucket.rate, bucket.capacity]
+        try:
+            wait = await self.take_tokens(keys=[KEY_PREFIX + bucket.name for bucket in buckets], args=args)
+            return float(wait)
+        except redis.RedisError as e:
+            # Do not pay a connection timeout per send while Redis is down
+            self._redis_retry_at = now + 30
+            logger.warning(f"[WARNING] Rate limiter falls back to local buckets for 30 s: {e}")
+            return self._take_local(buckets, now)
+
+    async def acquire(self, buckets: list[Bucket], max_wait: Optional[float] = None) -> float:
+        """Wait until a token of every bucket is taken, all at once.
+
+        Args:
+            buckets (list[Bucket]): Buckets of the send.
+            max_wait (Optional[float]): Longest single wait accepted.
+
+        Returns:
+            float: Seconds spent waiting.
+
+        Raises:
+            RateLimited: A bucket is blocked for longer than `max_wait`.
+        """
+        waited = 0.0
+        while (wait := await self._take(buckets)) > 0:
+            if max_wait is not None and wait > max_wait:
+                raise RateLimited(wait)
+            await asyncio.sleep(wait)
+            waited += wait
+        return waited
+
+    async def block(self, bucket: Bucket, seconds: float) -> None:
+        """Block a bucket for everyone, used when the upstream answers with retry_after."""
+        until = time.time() + seconds
+        if time.time() >= self._redis_retry_at:
+            try:
+                key = KEY_PREFIX + bucket.name
+                await self.redis.hset(key, "blocked", str(until))
+                await self.redis.expire(key, math.ceil(seconds) + 60)
+            except redis.RedisError:
+                self._redis_retry_at = time.time() + 30
+        local = self._local.setdefault(bucket.name, [bucket.capacity, time.time(), 0.0])
+        local[2] = max(local[2], until)
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+def telegram_retry_after(response) -> Optional[float]:
+    """Seconds Telegram asks to wait before retrying, None if the answer is not a 429."""
+    if response.status_code != 429:
+        return None
+    try:
+        return float(response.json()["parameters"]["retry_after"])
+    except (KeyError, TypeError, ValueError):
+        return float(response.headers.get("Retry-After", 1))
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from celery_task.throttled_delete import ThrottledDeleter
+from logs.logging_config import get_logger
+from surveillance.schemas.repository import Recordings
+from surveillance.utils.thumbnail_strip import get_strip_path
+
+logger = get_logger()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class RetentionPolicy:
+    """Byte budget plus optional per-camera minimum and maximum ages.
+
+    Configured through the environment:
+        RETENTION_MAX_BYTES: total budget for indexed recordings (0 disables the quota)
+        RETENTION_MIN_AGE_HOURS: recordings younger than this are never deleted by the quota
+        RETENTION_MAX_AGE_DAYS: recordings older than this are always deleted (0 disables)
+        RETENTION_CAMERA_POLICY: JSON overrides per camera, e.g.
+            {"1": {"min_age_hours": 48, "max_age_days": 30}}
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, min_age_hours: Optional[float] = None,
+                 max_age_days: Optional[float] = None, camera_policy: Optional[Dict[str, dict]] = None):
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("RETENTION_MAX_BYTES", 0))
+        self.min_age_hours = (min_age_hours if min_age_hours is not None
+                              else float(os.getenv("RETENTION_MIN_AGE_HOURS", 24)))
+        self.max_age_days = (max_age_days if max_age_days is not None
+                             else float(os.getenv("RETENTION_MAX_AGE_DAYS", 0)))
+        if camera_policy is None:
+            try:
+                camera_policy = json.loads(os.getenv("RETENTION_CAMERA_POLICY") or "{}")
+            except json.JSONDecodeError as e:
+                logger.error(f"[ERROR] Invalid RETENTION_CAMERA_POLICY: {e}")
+                camera_policy = {}
+        self.camera_policy = {str(cam_id): policy for cam_id, policy in camera_policy.items()}
+
+    def min_age(self, cam_id: str) -> timedelta:
+        hours = self.camera_policy.get(str(cam_id), {}).get("min_age_hours", self.min_age_hours)
+        return timedelta(hours=float(hours))
+
+    def max_age(self, cam_id: str) -> Optional[timedelta]:
+        days = self.camera_policy.get(str(cam_id), {}).get("max_age_days", self.max_age_days)
+        return timedelta(days=float(days)) if days else None
+
+
+def _remove_file(path: str, deleter: ThrottledDeleter) -> int:
+    """Delete a recording file, its thumbnail strip and empty parent folders, return freed bytes."""
+    full_path = os.path.join(BASE_DIR, path)
+    try:
+        size = deleter.delete_file(full_path)
+    except FileNotFoundError:
+        return 0
+    try:
+        size += deleter.delete_file(get_strip_path(full_path))
+    except FileNotFoundError:
+        pass
+
+    parent = os.path.dirname(full_path)
+    for _ in range(2):
+        try:
+            os.rmdir(parent)
+        except OSError:
+            break
+        parent = os.path.dirname(parent)
+    return size
+
+
+def _delete_batch(rows, result: dict, deleter: ThrottledDeleter) -> list[int]:
+    deleted_ids = []
+    for row in rows:
+        try:
+            result['freed_bytes'] += _remove_file(row.path, deleter)
+            deleted_ids.append(row.id)
+        except OSError as e:
+            error_msg = f"Error deleting {row.path}: {e}"
+            logger.error(f"[ERROR] {error_msg}")
+            result['errors'].append(error_msg)
+    result['deleted_count'] += len(deleted_ids)
+    return deleted_ids
+
+
+async def enforce_disk_quota(policy: Optional[RetentionPolicy] = None, batch_size: int = 100,
+                             deleter: Optional[ThrottledDeleter] = None) -> dict:
+    """Delete the oldest recordings until the index fits into the byte budget.
+
+    Works on the recording index only, so a run costs a few indexed queries
+    instead of a walk over the whole media tree. The paced deletion of each
+    batch sleeps between files, so it runs in a worker thread instead of on
+    the shared database loop.
+
+    Args:
+        policy (Optional[RetentionPolicy]): Retention settings, read from env by default.
+        batch_size (int): Number of rows fetched per query.
+        deleter (Optional[ThrottledDeleter]): Rate-limited deleter, budgets from env by default.
+
+    Returns:
+        dict: success, total_bytes, max_bytes, deleted_count, freed_bytes, errors, timestamp.
+    """
+    policy = policy or RetentionPolicy()
+    deleter = deleter or ThrottledDeleter()
+    now = datetime.now()
+    result = {'success': True, 'total_bytes': 0, 'max_bytes': policy.max_bytes,
+              'deleted_count': 0, 'freed_bytes': 0, 'errors': [], 'timestamp': now.isoformat()}
+
+    for cam_id in await Recordings.select_camera_ids():
+        max_age = policy.max_age(cam_id)
+        if max_age is None:
+            continue
+        while True:
+            rows = await Recordings.select_older_than(cam_id, now - max_age, limit=batch_size)
+            if not rows:
+                break
+            deleted_ids = await asyncio.to_thread(_delete_batch, rows, result, deleter)
+            await Recordings.delete_by_ids(deleted_ids)
+            if len(deleted_ids) < len(rows):
+                break
+
+    total = await Recordings.select_total_size()
+    result['total_bytes'] = total
+
+    if policy.max_bytes:
+        offset = 0
+        while total > policy.max_bytes:
+            rows = await Recordings.select_oldest(limit=batch_size, offset=offset)
+            if not rows:
+                break
+
+            to_delete = []
+            for row in rows:
+                if total <= policy.max_bytes:
+                    break
+                if now - row.started_at < policy.min_age(row.cam_id):
+                    offset += 1
+                    continue
+                to_delete.append(row)
+                total -= row.size
+
+            deleted_ids = await asyncio.to_thread(_delete_batch, to_delete, result, deleter)
+            await Recordings.delete_by_ids(deleted_ids)
+            failed = [row for row in to_delete if row.id not in deleted_ids]
+            total += sum(row.size for row in failed)
+            offset += len(failed)
+
+        result['total_bytes'] = total
+        if total > policy.max_bytes:
+            logger.warning(f"[WARNING] Recordings use {total} bytes, budget {policy.max_bytes}: "
+                           f"remaining files are protected by minimum age")
+
+    result['success'] = not result['errors']
+    logger.info(f"[INFO] Quota cleanup: deleted {result['deleted_count']} recordings, "
+                f"freed {result['freed_bytes'] / (1024 * 1024):.1f} MB, "
+                f"indexed total {result['total_bytes']} bytes")
+    return result
@@ -1,11 +1,20 @@
+import math
 import os
 import sys
 from celery_task.celery_app import celery
-from celery_task.cleanup_service import delete_old_folders, delete_old_log_files
+from datetime import datetime, timedelta
+from celery_task.cleanup_service import delete_old_folders, delete_old_log_files, delete_expired_media
+from celery_task.digest_service import build_motion_digests
 from celery_task.messages_utils import send_health_email, send_screenshot, send_telegram_photo_service, \
-    send_telegram_video_service
+    send_telegram_video_service, send_telegram_media_fanout, send_screenshots, \
+    send_telegram_media_group_fanout
+from celery_task.notification_worker import get_notification_worker, is_transient_smtp_error
+from celery_task.outbox_service import drain_outbox, lanes_of
 from celery_task.path_utils import run_async_task
-from surveillance.schemas.repository import OldFiles
+from celery_task.retention_service import enforce_disk_quota
+from celery_task.throttled_delete import ThrottledDeleter
+from celery_task.tiering_service import tier_old_recordings
+from surveillance.schemas.repository import OldFiles, Recordings, Notifications
 from dotenv import load_dotenv
 import logging
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -22,10 +31,47 @@ def health_server(subject: str):
     return result
 
 
-@celery.task(name="tasks.send_screenshot_email")
-def send_screenshot_email(cam_id: str, screenshot_path: str):
+NOTIFY_MAX_RETRIES = int(os.getenv("NOTIFY_MAX_RETRIES", 20))
+
+
+def retry_email(task, error: Exception):
+    """Reschedule an email task with exponential backoff if the SMTP failure is transient."""
+    if not is_transient_smtp_error(error):
+        raise error
+    countdown = min(600, 10 * 2 ** task.request.retries)
+    logger.warning(f"Email failed ({error}), retrying in {countdown} s")
+    return task.retry(exc=error, countdown=countdown)
+
+
+def retry_telegram(task, result: dict, *args, **kwargs):
+    """Reschedule the chats Telegram answered with a long retry_after.
+
+    The task is retried with `args`, the chats to retry and `kwargs`, after
+    the longest retry_after Telegram asked for.
+    """
+    if result['retry'] and task.request.retries < NOTIFY_MAX_RETRIES:
+        countdown = math.ceil(max(result['retry'].values()))
+        logger.warning(f"Telegram asked to wait {countdown} s, retrying chats {list(result['retry'])}")
+        task.retry(args=(*args, list(result['retry'])), kwargs=kwargs, countdown=countdown)
+    return result
+
+
+@celery.task(name="tasks.send_screenshot_email", bind=True, max_retries=NOTIFY_MAX_RETRIES)
+def send_screenshot_email(self, cam_id: str, screenshot_path: str):
     """Celery task to send screenshots."""
-    return send_screenshot(cam_id, screenshot_path)
+    try:
+        return send_screenshot(cam_id, screenshot_path)
+    except Exception as e:
+        raise retry_email(self, e)
+
+
+@celery.task(name="tasks.send_screenshot_digest_email", bind=True, max_retries=NOTIFY_MAX_RETRIES)
+def send_screenshot_digest_email(self, cam_id: str, screenshot_paths: list[str], suppressed: int = 0):
+    """Celery task to send the screenshots of one alert window in a single email."""
+    try:
+        return send_screenshots(cam_id, screenshot_paths, suppressed)
+    except Exception as e:
+        raise retry_email(self, e)
 
 
 @celery.task(name="tasks.send_telegram_photo")
@@ -40,6 +86,51 @@ def send_telegram_video(cam_id: str, video_path: str, chat_id: int) -> str:
     return send_telegram_video_service(cam_id, video_path, chat_id)
 
 
+@celery.task(name="tasks.send_telegram_photo_fanout", bind=True, max_retries=NOTIFY_MAX_RETRIES)
+def send_telegram_photo_fanout(self, cam_id: str, screenshot_path: str, chat_ids: list[int]) -> dict:
+    """Celery task to upload a photo once and send it to all chats."""
+    result = send_telegram_media_fanout(cam_id, screenshot_path, chat_ids, kind="photo")
+    return retry_telegram(self, result, cam_id, screenshot_path)
+
+
+@celery.task(name="tasks.send_telegram_album_fanout", bind=True, max_retries=NOTIFY_MAX_RETRIES)
+def send_telegram_album_fanout(self, cam_id: str, screenshot_paths: list[str], chat_ids: list[int],
+                               suppressed: int = 0) -> dict:
+    """Celery task to send the screenshots of one alert window as a Telegram album to all chats."""
+    result = send_telegram_media_group_fanout(cam_id, screenshot_paths, chat_ids, suppressed)
+    return retry_telegram(self, result, cam_id, screenshot_paths, suppressed=suppressed)
+
+
+@celery.task(name="tasks.send_telegram_video_fanout", bind=True, max_retries=NOTIFY_MAX_RETRIES)
+def send_telegram_video_fanout(self, cam_id: str, video_path: str, chat_ids: list[int]) -> dict:
+    """Celery task to upload a finished video once and send it to all chats."""
+    result = send_telegram_media_fanout(cam_id, video_path, chat_ids, kind="video")
+    return retry_telegram(self, result, cam_id, video_path)
+
+
+@celery.task(name="tasks.drain_alert_outbox", ignore_result=True)
+def drain_alert_outbox():
+    """Celery task delivering the screenshot alerts waiting in the notification outbox."""
+    worker = get_notification_worker()
+    return worker.run(drain_outbox(worker, "alerts"))
+
+
+@celery.task(name="tasks.drain_media_outbox", ignore_result=True)
+def drain_media_outbox():
+    """Celery task delivering the video clips waiting in the notification outbox."""
+    worker = get_notification_worker()
+    return worker.run(drain_outbox(worker, "media"))
+
+
+DRAIN_TASKS = {"alerts": drain_alert_outbox, "media": drain_media_outbox}
+
+
+def kick_outbox_drains(kinds) -> None:
+    """Wake the workers draining the lanes of newly stored alerts."""
+    for lane in lanes_of(kinds):
+        DRAIN_TASKS[lane].delay()
+
+
 @celery.task
 def video_cleanup_weekly():
     """Celery task for performing weekly cleanup of old recordings."""
@@ -51,7 +142,9 @@ def video_cleanup_weekly():
         return {'success': True, 'skipped': True, 'reason': 'disabled'}
 
     logger.info("Weekly video cleanup started")
-    return delete_old_folders()
+    result = delete_old_folders()
+    run_async_task(Recordings.delete_started_before(datetime.now() - timedelta(days=result['days_threshold'])))
+    return result
 
 
 @celery.task
@@ -66,3 +159,66 @@ def delete_logs_weekly():
 
     logger.info("Weekly logs cleanup started")
     return delete_old_log_files()
+
+
+def report_progress(task):
+    """Progress callback for ThrottledDeleter publishing stats as task state."""
+    def progress(stats):
+        ThrottledDeleter.log_progress(stats)
+        task.update_state(state='PROGRESS', meta=stats)
+    return progress
+
+
+@celery.task(bind=True, soft_time_limit=3300, time_limit=3600)
+def recordings_quota_cleanup(self):
+    """Celery task keeping recordings within the configured disk budget."""
+
+    cleanup_enabled = run_async_task(OldFiles.select_status_old_video())
+
+    if not cleanup_enabled:
+        logger.info("Recordings quota cleanup is disabled")
+        return {'success': True, 'skipped': True, 'reason': 'disabled'}
+
+    deleter = ThrottledDeleter(progress=report_progress(self))
+    return run_async_task(enforce_disk_quota(deleter=deleter))
+
+
+@celery.task(bind=True, soft_time_limit=3300, time_limit=3600)
+def media_retention_daily(self):
+    """Celery task for the unified retention of recordings, screenshots, manual captures and logs."""
+
+    media_enabled = run_async_task(OldFiles.select_status_old_video())
+    logs_enabled = run_async_task(OldFiles.select_status_old_logs())
+
+    if not media_enabled and not logs_enabled:
+        logger.info("Media retention is disabled")
+        return {'success': True, 'skipped': True, 'reason': 'disabled'}
+
+    logger.info("Media retention started")
+    result = delete_expired_media(include_media=bool(media_enabled), include_logs=bool(logs_enabled),
+                                  progress=report_progress(self))
+    if media_enabled:
+        days = int(os.getenv("RETENTION_RECORDINGS_DAYS", 7))
+        run_async_task(Recordings.delete_started_before(datetime.now() - timedelta(days=days)))
+    run_async_task(Notifications.delete_finished_before(
+        datetime.now() - timedelta(days=int(os.getenv("OUTBOX_KEEP_DAYS", 7)))))
+    return result
+
+
+@celery.task(soft_time_limit=3300, time_limit=3600)
+def recordings_tiering_daily():
+    """Celery task re-encoding aging recordings into the compact tier."""
+
+    logger.info("Recordings tiering started")
+    return run_async_task(tier_old_recordings())
+
+
+@celery.task(soft_time_limit=3300, time_limit=3600)
+def motion_digest_daily():
+    """Celery task building yesterday's condensed motion-only video per camera."""
+
+    if os.getenv("MOTION_DIGEST_ENABLED", "false").lower() != "true":
+        return {'success': True, 'skipped': True, 'reason': 'disabled'}
+
+    logger.info("Motion digest started")
+    return run_async_task(build_motion_digests())
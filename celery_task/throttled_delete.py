@@ -0,0 +1,126 @@
+import os
+import time
+from typing import Callable, Optional
+
+from logs.logging_config import get_logger
+from surveillance.utils.io_pressure import get_write_latency
+
+logger = get_logger()
+
+
+class ThrottledDeleter:
+    """Deletes files one by one within a bytes/s and files/s budget.
+
+    Whole folders are removed file by file instead of one `shutil.rmtree`
+    burst, and deletion pauses while live recordings report a high write
+    latency, so cleanup does not starve concurrent VideoWriter I/O.
+    """
+
+    def __init__(self, bytes_per_sec: Optional[int] = None, files_per_sec: Optional[float] = None,
+                 latency_threshold_ms: Optional[float] = None, max_yield_sec: Optional[float] = None,
+                 progress: Optional[Callable[[dict], None]] = None, progress_every: int = 100):
+        """Configure budgets, read from the environment by default.
+
+        Args:
+            bytes_per_sec (Optional[int]): Deletion budget in bytes per second (0 = unlimited).
+            files_per_sec (Optional[float]): Deletion budget in files per second (0 = unlimited).
+            latency_threshold_ms (Optional[float]): Recording write latency that makes deletion yield.
+            max_yield_sec (Optional[float]): Longest continuous pause before deletion resumes anyway.
+            progress (Optional[Callable[[dict], None]]): Called with `stats()` every `progress_every` files.
+            progress_every (int): Progress reporting period in files.
+        """
+        self.bytes_per_sec = (bytes_per_sec if bytes_per_sec is not None
+                              else int(os.getenv("RETENTION_DELETE_BYTES_PER_SEC", 50 * 1024 * 1024)))
+        self.files_per_sec = (files_per_sec if files_per_sec is not None
+                              else float(os.getenv("RETENTION_DELETE_FILES_PER_SEC", 200)))
+        self.latency_threshold_ms = (latency_threshold_ms if latency_threshold_ms is not None
+                                     else float(os.getenv("RECORDING_LATENCY_THRESHOLD_MS", 50)))
+        self.max_yield_sec = (max_yield_sec if max_yield_sec is not None
+                              else float(os.getenv("RETENTION_MAX_YIELD_SEC", 60)))
+        self.progress = progress or self.log_progress
+        self.progress_every = progress_every
+
+        self.deleted_files = 0
+        self.freed_bytes = 0
+        self.yielded_sec = 0.0
+        self._started = time.monotonic()
+        self._last_latency_check = 0.0
+
+    def stats(self) -> dict:
+        return {
+            'deleted_files': self.deleted_files,
+            'freed_bytes': self.freed_bytes,
+            'yielded_sec': round(self.yielded_sec, 1),
+            'elapsed_sec': round(time.monotonic() - self._started, 1),
+        }
+
+    def delete(self, path: str) -> int:
+        """Delete a file or a folder tree, return freed bytes."""
+        if os.path.isdir(path) and not os.path.islink(path):
+            return self._delete_tree(path)
+        return self.delete_file(path)
+
+    def delete_file(self, path: str, size: Optional[int] = None) -> int:
+        """Delete one file within the budget, return its size."""
+        self._yield_to_recordings()
+        if size is None:
+            size = os.lstat(path).st_size
+        os.remove(path)
+
+        self.deleted_files += 1
+        self.freed_bytes += size
+        self._pace()
+        if self.deleted_files % self.progress_every == 0:
+            self.progress(self.stats())
+        return size
+
+    def _delete_tree(self, path: str) -> int:
+        freed = 0
+        folders = []
+        stack = [path]
+        while stack:
+            folder = stack.pop()
+            folders.append(folder)
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        freed += self.delete_file(entry.path, entry.stat(follow_symlinks=False).st_size)
+        for folder in reversed(folders):
+            os.rmdir(folder)
+        return freed
+
+    def _pace(self) -> None:
+        """Sleep until the deleted amount fits both budgets."""
+        target = 0.0
+        if self.bytes_per_sec:
+            target = max(target, self.freed_bytes / self.bytes_per_sec)
+        if self.files_per_sec:
+            target = max(target, self.deleted_files / self.files_per_sec)
+        elapsed = time.monotonic() - self._started - self.yielded_sec
+        if target > elapsed:
+            time.sleep(target - elapsed)
+
+    def _yield_to_recordings(self) -> None:
+        """Pause while recordings report a write latency above the threshold."""
+        now = time.monotonic()
+        if not self.latency_threshold_ms or now - self._last_latency_check < 0.5:
+            return
+        self._last_latency_check = now
+
+        paused = 0.0
+        while paused < self.max_yield_sec:
+            latency = get_write_latency()
+            if latency is None or latency <= self.latency_threshold_ms:
+                break
+            if not paused:
+                logger.info(f"[INFO] Recording write latency {latency:.0f} ms, cleanup paused")
+            time.sleep(1)
+            paused += 1
+        self.yielded_sec += paused
+
+    @staticmethod
+    def log_progress(stats: dict) -> None:
+        logger.info(f"[INFO] Cleanup progress: {stats['deleted_files']} files, "
+                    f"{stats['freed_bytes'] / (1024 * 1024):.1f} MB, paused {stats['yielded_sec']} s")
@@ -0,0 +1,175 @@
+import asyncio
+import os
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional
+
+import ffmpeg
+
+from celery_task.retention_service import BASE_DIR
+from logs.logging_config import get_logger
+from surveillance.schemas.repository import Recordings
+
+logger = get_logger()
+
+TIER_MODES = ("compact", "timelapse")
+
+
+class TieringPolicy:
+    """Settings of the compact storage tier.
+
+    Configured through the environment:
+        TIER_AFTER_DAYS: recordings older than this are re-encoded (0 disables tiering)
+        TIER_MODE: compact (lower bitrate and resolution) or timelapse (keyframes only)
+        TIER_MAX_HEIGHT: output height limit in pixels, smaller videos keep their size
+        TIER_BITRATE: target video bitrate, e.g. 300k
+        TIER_TIMELAPSE_FPS: playback rate of keyframe-only timelapses
+        TIER_WORKERS: number of concurrent encoders
+        TIER_NICE: niceness added to encoder processes
+    """
+
+    def __init__(self, after_days: Optional[float] = None, mode: Optional[str] = None,
+                 max_height: Optional[int] = None, bitrate: Optional[str] = None,
+                 timelapse_fps: Optional[int] = None, workers: Optional[int] = None,
+                 nice: Optional[int] = None):
+        self.after_days = after_days if after_days is not None else float(os.getenv("TIER_AFTER_DAYS", 0))
+        self.mode = mode or os.getenv("TIER_MODE", "compact")
+        if self.mode not in TIER_MODES:
+            logger.error(f"[ERROR] Unknown TIER_MODE '{self.mode}', using 'compact'")
+            self.mode = "compact"
+        self.max_height = max_height if max_height is not None else int(os.getenv("TIER_MAX_HEIGHT", 480))
+        self.bitrate = bitrate or os.getenv("TIER_BITRATE", "300k")
+        self.timelapse_fps = (timelapse_fps if timelapse_fps is not None
+                              else int(os.getenv("TIER_TIMELAPSE_FPS", 25)))
+        self.workers = max(1, workers if workers is not None else int(os.getenv("TIER_WORKERS", 1)))
+        self.nice = nice if nice is not None else int(os.getenv("TIER_NICE", 19))
+
+    def build_command(self, src: str, dst: str) -> list[str]:
+        """ffmpeg command line re-encoding `src` into `dst` for the configured mode."""
+        if self.mode == "timelapse":
+            stream = ffmpeg.input(src, skip_frame="nokey").filter("setpts", f"N/{self.timelapse_fps}/TB")
+            rate = {"r": self.timelapse_fps}
+        else:
+            stream = ffmpeg.input(src)
+            rate = {}
+        stream = stream.filter("scale", -2, f"min({self.max_height},ih)")
+        return (stream
+                .output(dst, vcodec="libx264", preset="veryfast", video_bitrate=self.bitrate,
+                        pix_fmt="yuv420p", an=None, movflags="+faststart", threads=1, **rate)
+                .overwrite_output()
+                .global_args("-v", "error", "-nostdin")
+                .compile())
+
+
+def _transcode(command: list[str], nice: int) -> None:
+    """Run one encoder at a lowered CPU priority (blocking, called from the pool).
+
+    The priority is set by `nice` itself: a `preexec_fn` is not safe in a
+    process with threads.
+    """
+    if nice and shutil.which("nice"):
+        command = ["nice", "-n", str(nice), *command]
+    subprocess.run(command, check=True, capture_output=True)
+
+
+def _swap(src: str, dst: str, backup: str) -> None:
+    """Put `src` in place of `dst`, keeping the original as `backup`."""
+    os.replace(dst, backup)
+    try:
+        os.replace(src, dst)
+    except OSError:
+        os.replace(backup, dst)
+        raise
+
+
+async def _tier_recording(row, policy: TieringPolicy, pool: ThreadPoolExecutor, loop, result: dict) -> bool:
+    """Re-encode one recording, return False if it stays in the original tier."""
+    full_path = os.path.join(BASE_DIR, row.path)
+    tmp_path = f"{os.path.splitext(full_path)[0]}.{policy.mode}.tmp.mp4"
+    if not os.path.exists(full_path):
+        logger.warning(f"[WARNING] Recording {row.path} is missing, dropped from the index")
+        return await Recordings.delete_by_ids([row.id])
+    try:
+        await loop.run_in_executor(pool, _transcode, policy.build_command(full_path, tmp_path), policy.nice)
+        new_size = os.path.getsize(tmp_path)
+    except (OSError, subprocess.CalledProcessError) as e:
+        stderr = getattr(e, "stderr", b"") or b""
+        error_msg = f"Error transcoding {row.path}: {e} {stderr.decode(errors='replace').strip()}"
+        logger.error(f"[ERROR] {error_msg}")
+        result['errors'].append(error_msg)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+    if new_size >= row.size:
+        os.remove(tmp_path)
+        result['skipped_count'] += 1
+        return await Recordings.update_tier(row.id, row.size, policy.mode)
+
+    backup_path = f"{full_path}.orig"
+    try:
+        await asyncio.to_thread(_swap, tmp_path, full_path, backup_path)
+    except OSError as e:
+        error_msg = f"Error replacing {row.path}: {e}"
+        logger.error(f"[ERROR] {error_msg}")
+        result['errors'].append(error_msg)
+        os.remove(tmp_path)
+        return False
+
+    if not await Recordings.update_tier(row.id, new_size, policy.mode):
+        os.replace(backup_path, full_path)
+        return False
+    os.remove(backup_path)
+    result['tiered_count'] += 1
+    result['saved_bytes'] += row.size - new_size
+    return True
+
+
+async def tier_old_recordings(policy: Optional[TieringPolicy] = None, batch_size: int = 20) -> dict:
+    """Re-encode recordings older than `TIER_AFTER_DAYS` into the compact tier.
+
+    Each file is encoded next to the original and swapped in with
+    `os.replace`; the original is kept aside until the index row is
+    committed and put back if the commit fails, so the index never points at
+    a half-written file or at a tier the file is not in.
+
+    Encoders are ffmpeg subprocesses launched from a thread pool, the
+    threads only wait for them.
+
+    Args:
+        policy (Optional[TieringPolicy]): Tiering settings, read from env by default.
+        batch_size (int): Number of rows fetched per query.
+
+    Returns:
+        dict: success, tiered_count, skipped_count, saved_bytes, errors, timestamp.
+    """
+    policy = policy or TieringPolicy()
+    now = datetime.now()
+    result = {'success': True, 'tiered_count': 0, 'skipped_count': 0, 'saved_bytes': 0,
+              'errors': [], 'timestamp': now.isoformat()}
+    if not policy.after_days:
+        result['skipped'] = True
+        return result
+    if shutil.which("ffmpeg") is None:
+        logger.error("[ERROR] ffmpeg is not installed, tiering skipped")
+        result['success'] = False
+        result['errors'].append("ffmpeg not found")
+        return result
+
+    loop = asyncio.get_running_loop()
+    before = now - timedelta(days=policy.after_days)
+    offset = 0
+    with ThreadPoolExecutor(max_workers=policy.workers) as pool:
+        while True:
+            rows = await Recordings.select_for_tiering(before, limit=batch_size, offset=offset)
+            if not rows:
+                break
+            done = await asyncio.gather(*(_tier_recording(row, policy, pool, loop, result) for row in rows))
+            offset += done.count(False)
+
+    result['success'] = not result['errors']
+    logger.info(f"[INFO] Tiering: {result['tiered_count']} recordings moved to '{policy.mode}', "
+                f"saved {result['saved_bytes'] / (1024 * 1024):.1f} MB")
+    return result
@@ -60,15 +60,40 @@ CELERY_BEAT_LOGFILE="$LOG_DIR/celery_beat.log"
 
 CELERY_WORKER_NAME="worker_$(date +%s)_${RANDOM}_$$"
 
-echo "[INFO] Starting Celery worker with log file: $CELERY_WORKER_LOGFILE"
+echo "[INFO] Starting Celery maintenance worker with log file: $CELERY_WORKER_LOGFILE"
 celery -A celery_task worker \
     --loglevel=info \
     -n "${CELERY_WORKER_NAME}@%h" \
-    --concurrency=1 \
+    -Q maintenance \
+    --concurrency="${MAINTENANCE_CONCURRENCY:-1}" \
     --logfile="$CELERY_WORKER_LOGFILE" \
     --time-limit=300 \
     --soft-time-limit=280 &
 echo "$!" > "$LOG_DIR/celery_worker.pid"
+
+CELERY_ALERTS_LOGFILE="$LOG_DIR/celery_alerts.log"
+
+echo "[INFO] Starting Celery alerts worker with log file: $CELERY_ALERTS_LOGFILE"
+celery -A celery_task worker \
+    --loglevel=info \
+    -n "alerts_${CELERY_WORKER_NAME}@%h" \
+    -Q alerts \
+    --pool=threads \
+    --concurrency="${ALERTS_CONCURRENCY:-32}" \
+    --logfile="$CELERY_ALERTS_LOGFILE" &
+echo "$!" > "$LOG_DIR/celery_alerts.pid"
+
+CELERY_MEDIA_LOGFILE="$LOG_DIR/celery_media.log"
+
+echo "[INFO] Starting Celery media worker with log file: $CELERY_MEDIA_LOGFILE"
+celery -A celery_task worker \
+    --loglevel=info \
+    -n "media_${CELERY_WORKER_NAME}@%h" \
+    -Q media \
+    --pool=threads \
+    --concurrency="${MEDIA_CONCURRENCY:-4}" \
+    --logfile="$CELERY_MEDIA_LOGFILE" &
+echo "$!" > "$LOG_DIR/celery_media.pid"
 sleep 2
 
 echo "[INFO] Starting Celery beat with log file: $CELERY_BEAT_LOGFILE"
@@ -83,5 +108,7 @@ echo "[INFO] All processes started. Check logs/start.log and celery logs for det
 echo "[INFO] Processes:"
 echo "  Surveillance (Hypercorn): $(cat main.pid)"
 echo "  Bot: $(cat bot.pid)"
-echo "  Celery Worker: $(cat "$LOG_DIR/celery_worker.pid")"
+echo "  Celery Maintenance Worker: $(cat "$LOG_DIR/celery_worker.pid")"
+echo "  Celery Alerts Worker: $(cat "$LOG_DIR/celery_alerts.pid")"
+echo "  Celery Media Worker: $(cat "$LOG_DIR/celery_media.pid")"
 echo "  Celery Beat: $(cat "$LOG_DIR/celery_beat.pid")"
@@ -5,11 +5,19 @@ import os
 from collections import defaultdict
 from datetime import datetime
 import time
-from typing import Dict, Optional, Tuple, Any
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 import cv2
 import numpy as np
 from concurrent.futures import ThreadPoolExecutor
-from surveillance.schemas.repository import Cameras
+from surveillance.schemas.repository import Cameras, Recordings
+from surveillance.utils.heatmap_utils import MotionHeatmap
+from surveillance.utils.motion_gate import MotionGate
+from surveillance.utils.screenshot_writer import ScreenshotWriter
+from surveillance.utils.thumbnail_strip import ThumbnailStripWriter
+from surveillance.utils.continuous_recording import ContinuousRecording
+from surveillance.utils.event_recorder import EventRecorder
+from surveillance.utils.video_writer import ThreadedVideoWriter
+from surveillance.utils.io_pressure import publish_write_latency
 from logs.logging_config import get_logger
 logger = get_logger()
 
@@ -21,11 +29,17 @@ class CameraManager:
     `async_lock` assertion you were hitting.
     """
 
-    def __init__(self, max_queue_size: int = 10, fps: float = 30.0):
-        """Initialize CameraManager by loading configs and setting up runtime structures."""
+    def __init__(self, max_queue_size: int = 10, fps: float = 30.0,
+                 on_clip_ready: Optional[Callable[[str, str], Awaitable[None]]] = None):
+        """Initialize CameraManager by loading configs and setting up runtime structures.
+
+        Args:
+            max_queue_size (int): Frame queue size of every subscriber.
+            fps (float): Frame rate of the recordings.
+            on_clip_ready (Optional[Callable]): Coroutine called with (cam_id, path) of every finished event clip.
+        """
         camera_config_json = Cameras.select_all_cameras_to_json()
         self.recording_flags = {}
-        self.recording_tasks = {}
         self.last_screenshot_times = {}
         self.tracked_objects = {}
         self.next_object_id = 0
@@ -55,6 +69,21 @@ class CameraManager:
         self.background_subtractors = {
             cam_id: cv2.createBackgroundSubtractorMOG2() for cam_id in self.camera_configs
         }
+        self.heatmaps: Dict[str, MotionHeatmap] = {
+            cam_id: MotionHeatmap(cam_id) for cam_id in self.camera_configs
+        }
+        self.heatmap_persist_period = float(os.getenv("HEATMAP_PERSIST_SEC", 60))
+        self.heatmap_task: Optional[asyncio.Task] = None
+        self.io_pressure_task: Optional[asyncio.Task] = None
+        self.screenshot_writer = ScreenshotWriter()
+        self.thumbnail_writer = ThumbnailStripWriter()
+        self.event_recorders: Dict[str, EventRecorder] = {}
+        self.event_tasks: set[asyncio.Task] = set()
+        self.active_writers: Dict[str, ThreadedVideoWriter] = {}
+        self.recording_mode = os.getenv("RECORDING_MODE", "full")
+        self.motion_gates: Dict[str, MotionGate] = {}
+        self.continuous_recordings: Dict[str, ContinuousRecording] = {}
+        self.on_clip_ready = on_clip_ready
 
 
     async def initialize(self, timeout_per_camera: int = 5) -> None:
@@ -67,6 +96,39 @@ class CameraManager:
                  for cam_id, url in self.camera_configs.items()]
         await asyncio.gather(*tasks)
 
+        if self.heatmap_task is None or self.heatmap_task.done():
+            self.heatmap_task = asyncio.create_task(self._persist_heatmaps(), name="heatmap-persist")
+        if self.io_pressure_task is None or self.io_pressure_task.done():
+            self.io_pressure_task = asyncio.create_task(self._publish_io_pressure(), name="io-pressure")
+
+        autostart = os.getenv("CONTINUOUS_RECORDING", "").strip()
+        cam_ids = self.cameras if autostart == "all" else [c.strip() for c in autostart.split(",") if c.strip()]
+        for cam_id in list(cam_ids):
+            self.start_continuous_recording(cam_id)
+
+
+    async def _publish_io_pressure(self, period: float = 2.0) -> None:
+        """Publish the worst write latency of active recordings so cleanup can back off."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(period)
+            if not self.active_writers:
+                continue
+            latency_ms = max(out.write_latency for out in list(self.active_writers.values())) * 1000
+            await loop.run_in_executor(self.executor, publish_write_latency, latency_ms)
+
+
+    async def _persist_heatmaps(self) -> None:
+        """Periodically save every camera heatmap to disk."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.heatmap_persist_period)
+            for cam_id, heatmap in list(self.heatmaps.items()):
+                try:
+                    await loop.run_in_executor(self.executor, heatmap.save)
+                except OSError as e:
+                    logger.error(f"[ERROR] Failed to persist heatmap for {cam_id}: {e}")
+
 
     async def load_camera_configs(self) -> bool:
         """Reload camera configs from DB, start new readers and stop removed ones.
@@ -74,7 +136,7 @@ class CameraManager:
         Returns:
             bool: True if configs reloaded successfully, False on error.
         """
-        camera_config_json = Cameras.select_all_cameras_to_json()
+        camera_config_json = await asyncio.to_thread(Cameras.select_all_cameras_to_json)
         if not camera_config_json:
             logger.info("[WARN] Camera configuration not found in database.")
             return False
@@ -89,6 +151,7 @@ class CameraManager:
             if cam_id not in self.camera_configs:
                 self.camera_configs[cam_id] = url
                 self.background_subtractors[cam_id] = cv2.createBackgroundSubtractorMOG2()
+                self.heatmaps.setdefault(cam_id, MotionHeatmap(cam_id))
                 await self._start_camera_reader(cam_id, url, timeout=5)
 
         for cam_id in list(self.camera_configs.keys()):
@@ -96,6 +159,7 @@ class CameraManager:
                 await self._stop_camera_reader(cam_id)
                 del self.camera_configs[cam_id]
                 self.background_subtractors.pop(cam_id, None)
+                self.heatmaps.pop(cam_id, None)
 
         return True
 
@@ -152,17 +216,14 @@ class CameraManager:
 
         loop = asyncio.get_running_loop()
         subtractor = self.background_subtractors[cam_id]
-        screenshot_path = None
         video_path: Optional[str] = None
 
-        def detect(frm: np.ndarray) -> tuple[np.ndarray, Optional[str], bool]:
-            """Motion detection with object tracking, screenshot saving, and record trigger."""
-            nonlocal screenshot_path
-
+        def detect(frm: np.ndarray) -> tuple[np.ndarray, bool]:
+            """Motion detection with object tracking, screenshot hand-off, and record trigger."""
             processed = frm.copy()
             now = time.time()
             last_time = self.last_screenshot_times.get(cam_id, 0)
-            should_record = False
+            motion_in_zone = False
 
             if save_screenshot or send_video_tg or show_zone:
                 try:
@@ -170,6 +231,9 @@ class CameraManager:
                     kernel = np.ones((5, 5), np.uint8)
                     fg_mask = cv2.morphologyEx(fg_mask, cv2.MORPH_OPEN, kernel)
                     fg_mask = cv2.dilate(fg_mask, kernel, iterations=2)
+                    heatmap = self.heatmaps.get(cam_id)
+                    if heatmap is not None:
+                        heatmap.update(fg_mask)
                     contours, _ = cv2.findContours(fg_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
                     min_area = 1500
@@ -194,6 +258,7 @@ class CameraManager:
                         obj_in_zone = True
                         if has_points:
                             obj_in_zone = zone_x1 <= cx <= zone_x2 and zone_y1 <= cy <= zone_y2
+                        motion_in_zone = motion_in_zone or obj_in_zone
 
                         matched_id = None
                         for obj_id, data in object_data.items():
@@ -210,21 +275,12 @@ class CameraManager:
                             self.count_object += 1
 
                             if save_screenshot and (now - last_time) > 2:
-                                try:
-                                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                                    save_dir = f"media/screenshots/camera_{cam_id}/{timestamp[:8]}/"
-                                    os.makedirs(save_dir, exist_ok=True)
-                                    filename = os.path.join(save_dir, f"motion_{timestamp}.jpg")
-
-                                    cv2.imwrite(filename, frm)
-                                    if os.path.exists(filename):
-                                        screenshot_path = filename
-                                        self.last_screenshot_times[cam_id] = now
-                                except cv2.error:
-                                    pass
-
-                            if send_video_tg and not self.recording_flags.get(cam_id, False):
-                                should_record = True
+                                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                                save_dir = f"media/screenshots/camera_{cam_id}/{timestamp[:8]}/"
+                                filename = os.path.join(save_dir, f"motion_{timestamp}.jpg")
+                                if self.screenshot_writer.submit(cam_id, frm, filename, box=(x, y, w, h)):
+                                    last_time = now
+                                    self.last_screenshot_times[cam_id] = now
 
                         elif matched_id is not None:
                             object_data[matched_id]["position"] = (cx, cy)
@@ -259,82 +315,143 @@ class CameraManager:
                 except cv2.error:
                     pass
 
-            if self.recording_flags.get(cam_id):
+            if self.recording_flags.get(cam_id) or cam_id in self.continuous_recordings:
                 cv2.putText(processed, "REC", (10, 30),
                             cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 1)
 
-            return processed, screenshot_path, should_record
+            return processed, motion_in_zone
 
         try:
-            processed, screenshot_path, should_record = await asyncio.wait_for(
+            processed, motion_in_zone = await asyncio.wait_for(
                 loop.run_in_executor(self.executor, detect, frame),
                 timeout=0.1
             )
         except asyncio.TimeoutError:
             processed = frame
-            screenshot_path = None
-            should_record = False
+            motion_in_zone = False
 
-        if send_video_tg and should_record and not self.recording_flags.get(cam_id, False):
-            self.recording_flags[cam_id] = True
-            video_path = self.generate_video_path(cam_id)
+        screenshot_path = self.screenshot_writer.pop_ready(cam_id)
 
-            async def record_and_reset():
-                try:
-                    await self.record_video(cam_id, video_path, duration_sec=int(os.getenv("BOT_SEND_VIDEO", 5)))
-                except cv2.error:
-                    pass
-                finally:
-                    self.recording_flags[cam_id] = False
+        gate = self.motion_gates.get(cam_id)
+        if gate is not None and motion_in_zone:
+            gate.mark_motion(time.time())
 
-            asyncio.create_task(record_and_reset())
-        else:
-            video_path = None
+        if send_video_tg and motion_in_zone:
+            self._notify_event_motion(cam_id)
+
+        recorder = self.event_recorders.get(cam_id)
+        video_path = recorder.pop_completed() if recorder else None
 
         return processed, screenshot_path, video_path
 
 
-    @staticmethod
-    def generate_video_path(cam_id: str) -> str:
-        now = datetime.now()
-        filename = f"camera_{cam_id}_{now.strftime('%Y%m%d_%H%M%S')}.mp4"
-        current_stamp = now.strftime("%Y-%m-%d")
-        save_path = os.path.join("media", "recordings", f"{current_stamp}", cam_id)
-        os.makedirs(save_path, exist_ok=True)
-        return os.path.join(save_path, filename)
+    def _notify_event_motion(self, cam_id: str) -> None:
+        """Open a new event clip or extend the one in progress."""
+        recorder = self.event_recorders.setdefault(cam_id, EventRecorder(cam_id))
+        if recorder.state == EventRecorder.IDLE and self.recording_flags.get(cam_id, False):
+            return
+        if recorder.motion(time.time()):
+            self.recording_flags[cam_id] = True
+            recorder.clip_path = self.generate_video_path(cam_id)
+            task = asyncio.create_task(self._record_event(cam_id, recorder), name=f"event-{cam_id}")
+            self.event_tasks.add(task)
+            task.add_done_callback(self.event_tasks.discard)
 
 
-    async def record_video(self, cam_id: str, full_path: str, duration_sec: int = 5) -> Optional[str]:
-        cam_data = self.cameras.get(cam_id)
-        if not cam_data:
-            return None
+    async def _record_event(self, cam_id: str, recorder: EventRecorder) -> None:
+        """Write frames into the event clip until the recorder deadline passes."""
+        full_path = recorder.clip_path
+        frames = self.subscribe_frames(cam_id)
+        out: Optional[ThreadedVideoWriter] = None
+        try:
+            if frames is None:
+                return
+            while not recorder.should_stop(time.time()):
+                try:
+                    frame = await asyncio.wait_for(frames.get(), timeout=1)
+                except asyncio.TimeoutError:
+                    continue
+                if out is None:
+                    out = self._open_writer(full_path, frame)
+                out.write(frame)
+        except cv2.error as e:
+            logger.error(f"[ERROR] Event recording failed for {cam_id}: {e}")
+            full_path = None
+        finally:
+            self.unsubscribe_frames(cam_id, frames)
+            if out is None or not await self._release_writer(out):
+                full_path = None
+            recorder.finish(full_path)
+            self.recording_flags[cam_id] = False
+            if full_path:
+                await self._index_recording(cam_id, full_path, datetime.fromtimestamp(recorder.started_at),
+                                            kind="event")
+                await self._clip_ready(cam_id, full_path)
 
-        cam_data: Optional[Dict[str, Any]] = self.cameras.get(cam_id)
-        queue: asyncio.Queue = cam_data["queue"]
 
+    async def _clip_ready(self, cam_id: str, full_path: str) -> None:
+        """Hand a finished event clip over to `on_clip_ready` (e.g. the Telegram upload)."""
+        if self.on_clip_ready is None:
+            return
         try:
-            frame = await asyncio.wait_for(queue.get(), timeout=int(os.getenv("BOT_SEND_VIDEO")))
-        except asyncio.TimeoutError:
-            return None
+            await self.on_clip_ready(cam_id, full_path)
+        except Exception as e:
+            logger.error(f"[ERROR] Clip handoff failed for {full_path}: {e}")
 
-        height, width = frame.shape[:2]
-        fourcc = cv2.VideoWriter.fourcc(*'mp4v')
-        out = cv2.VideoWriter(full_path, fourcc, self.fps, (width, height))
 
-        loop = asyncio.get_running_loop()
-        end_time = time.time() + duration_sec
+    def _open_writer(self, full_path: str, first_frame: np.ndarray) -> ThreadedVideoWriter:
+        """Open a threaded writer sized for `first_frame` and register it."""
+        height, width = first_frame.shape[:2]
+        out = ThreadedVideoWriter(full_path, self.fps, (width, height))
+        self.active_writers[full_path] = out
+        return out
 
 
-        while time.time() < end_time:
-            try:
-                frame = await asyncio.wait_for(queue.get(), timeout=2)
-                await loop.run_in_executor(self.executor, out.write, frame)
-            except asyncio.TimeoutError:
-                continue
+    async def _release_writer(self, out: ThreadedVideoWriter) -> bool:
+        """Flush and release a writer without blocking the event loop.
+
+        Returns:
+            bool: True if the finished file was renamed into place.
+        """
+        try:
+            return await asyncio.to_thread(out.release)
+        finally:
+            self.active_writers.pop(out.path, None)
+
+
+    def writer_stats(self) -> list[dict]:
+        """Counters of every active recording writer."""
+        return [
+            {
+                "path": path,
+                "pending": out.queue.qsize(),
+                "written": out.written,
+                "dropped": out.dropped,
+                "write_latency_ms": round(out.write_latency * 1000, 2),
+            }
+            for path, out in list(self.active_writers.items())
+        ]
+
+
+    async def _index_recording(self, cam_id: str, path: str, started_at: datetime, kind: str = "segment") -> None:
+        """Register a finished recording in the index and queue its thumbnail strip."""
+        try:
+            size = os.path.getsize(path)
+        except OSError as e:
+            logger.error(f"[ERROR] Recording {path} not found for indexing: {e}")
+            return
+        await Recordings.add_recording(cam_id, path, size, started_at, kind)
+        self.thumbnail_writer.submit(path)
 
-        await loop.run_in_executor(self.executor, out.release)
 
-        return full_path
+    @staticmethod
+    def generate_video_path(cam_id: str, now: Optional[datetime] = None, prefix: str = "camera") -> str:
+        now = now or datetime.now()
+        filename = f"{prefix}_{cam_id}_{now.strftime('%Y%m%d_%H%M%S')}.mp4"
+        current_stamp = now.strftime("%Y-%m-%d")
+        save_path = os.path.join("media", "recordings", f"{current_stamp}", cam_id)
+        os.makedirs(save_path, exist_ok=True)
+        return os.path.join(save_path, filename)
 
 
     async def _start_camera_reader(self, cam_id: str, url: str, timeout: int) -> None:
@@ -345,7 +462,9 @@ class CameraManager:
 
         queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue_size)
         stop_event = asyncio.Event()
-        self.cameras[cam_id] = {"cap": cap, "queue": queue, "stop_event": stop_event}
+        subscribers: set[asyncio.Queue] = set()
+        self.cameras[cam_id] = {"cap": cap, "queue": queue, "stop_event": stop_event,
+                                "subscribers": subscribers}
 
         async def reader():
             """Camera reading loop with graceful shutdown"""
@@ -368,12 +487,46 @@ class CameraManager:
                     except asyncio.QueueEmpty:
                         pass
                 await queue.put(frame)
+                for sub in list(subscribers):
+                    if sub.full():
+                        try:
+                            sub.get_nowait()
+                        except asyncio.QueueEmpty:
+                            pass
+                    sub.put_nowait(frame)
                 await asyncio.sleep(self.frame_period)
 
         task = asyncio.create_task(reader(), name=f"reader-{cam_id}")
         self.cameras[cam_id]["task"] = task
 
 
+    def subscribe_frames(self, cam_id: str) -> Optional[asyncio.Queue]:
+        """Register an extra frame queue fed by the camera reader.
+
+        Recorders use their own queue so they do not steal frames from the
+        stream consumers of the main queue.
+
+        Args:
+            cam_id (str): Camera ID.
+
+        Returns:
+            Optional[asyncio.Queue]: Subscriber queue or None if the camera is not running.
+        """
+        cam_entry = self.cameras.get(cam_id)
+        if not cam_entry:
+            return None
+        sub: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue_size)
+        cam_entry["subscribers"].add(sub)
+        return sub
+
+
+    def unsubscribe_frames(self, cam_id: str, sub: Optional[asyncio.Queue]) -> None:
+        """Remove a subscriber queue registered with `subscribe_frames`."""
+        cam_entry = self.cameras.get(cam_id)
+        if cam_entry and sub is not None:
+            cam_entry["subscribers"].discard(sub)
+
+
     async def _stop_camera_reader(self, cam_id: str) -> None:
         """Stop the reader task and release resources for a specific camera.
 
@@ -457,117 +610,209 @@ class CameraManager:
         return None
 
 
-    async def start_continuous_recording(self, cam_id: str):
-        """Starts continuous video recording for 30 seconds until stop command."""
-        if self.recording_flags.get(cam_id):
-            return None
-
-        self.recording_flags[cam_id] = True
-
-        cam_data = self.cameras.get(cam_id)
-        if not cam_data:
-            return None
+    async def get_heatmap_png(self, cam_id: str, width: int, height: int) -> Optional[bytes]:
+        """Render the activity heatmap of a camera as a PNG overlay.
 
-        queue: asyncio.Queue = cam_data["queue"]
+        Args:
+            cam_id (str): Camera ID.
+            width (int): Overlay width.
+            height (int): Overlay height.
 
-        try:
-            frame = await asyncio.wait_for(queue.get(), timeout=5)
-        except asyncio.TimeoutError:
-            self.recording_flags[cam_id] = False
+        Returns:
+            Optional[bytes]: PNG data or None if the camera has no heatmap.
+        """
+        heatmap = self.heatmaps.get(cam_id)
+        if heatmap is None:
             return None
-
-        height, width = frame.shape[:2]
-        fourcc = cv2.VideoWriter.fourcc(*'mp4v')
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"cam_{cam_id}_{timestamp}.mp4"
-        full_path = os.path.join("media", "current", "movie", filename)
-
-        out = cv2.VideoWriter(full_path, fourcc, self.fps, (width, height))
         loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, heatmap.render_overlay, width, height)
 
-        font = cv2.FONT_HERSHEY_SIMPLEX
-        text = "REC"
-        font_scale = 1.0
-        thickness = 3
-        color = (0, 0, 255)
-
-        text_size = cv2.getTextSize(text, font, font_scale, thickness)[0]
-        text_x = 10
-        text_y = 30 + text_size[1]
-
-        circle_center = (text_x - 15, text_y - 10)
-        circle_radius = 5
-
-        frame_with_text = frame.copy()
-        cv2.circle(frame_with_text, circle_center, circle_radius, (0, 0, 255), -1)
-        cv2.putText(frame_with_text, text, (text_x, text_y), font, font_scale, color, thickness)
-        await loop.run_in_executor(self.executor, out.write, frame_with_text)
-
-        while self.recording_flags.get(cam_id):
-            try:
-                frame = await asyncio.wait_for(queue.get(), timeout=2)
-
-                frame_with_text = frame.copy()
-                cv2.circle(frame_with_text, circle_center, circle_radius, (0, 0, 255), -1)
-                cv2.putText(frame_with_text, text, (text_x, text_y), font, font_scale, color, thickness)
 
-                await loop.run_in_executor(self.executor, out.write, frame_with_text)
-            except asyncio.TimeoutError:
-                continue
+    def start_continuous_recording(self, cam_id: str) -> bool:
+        """Start 24/7 recording of a camera in wall-clock aligned segments.
 
-        await loop.run_in_executor(self.executor, out.release)
+        Returns:
+            bool: True if started, False if already running or the camera is not running.
+        """
+        current = self.continuous_recordings.get(cam_id)
+        if current is not None and current.task and not current.task.done():
+            return False
+        if cam_id not in self.cameras:
+            return False
 
-        return full_path
+        recording = ContinuousRecording(cam_id)
+        recording.task = asyncio.create_task(self._run_continuous_recording(recording),
+                                              name=f"recording-{cam_id}")
+        self.continuous_recordings[cam_id] = recording
+        logger.info(f"[INFO] Continuous recording started for {cam_id}")
+        return True
 
 
-    async def record_loop(self, cam_id: str):
-        """Continuous loop of 30s video recordings while flag is True."""
-        while self.recording_flags.get(cam_id, False):
-            full_path = self.generate_video_path(cam_id)
+    async def _run_continuous_recording(self, recording: ContinuousRecording) -> None:
+        """Write frames into segments, rolling over exactly at segment boundaries.
 
-            cam_entry = self.cameras.get(cam_id)
-            if cam_entry and 'current_frame' in cam_entry:
-                frame = cam_entry['current_frame']
-                if frame is not None:
-                    cv2.putText(frame, "REC", (10, 30),
-                                cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 3)
+        The frame that crosses a boundary opens the next segment, while the
+        previous writer is flushed and indexed in the background, so no frame
+        is lost between segments.
+        """
+        cam_id = recording.cam_id
+        frames = self.subscribe_frames(cam_id)
+        gate = None
+        if self.recording_mode == "timelapse":
+            gate = self.motion_gates.setdefault(cam_id, MotionGate())
+        out: Optional[ThreadedVideoWriter] = None
+        skipped_at_open = 0
+        closing: set[asyncio.Task] = set()
+
+        def close_segment() -> None:
+            kind = "timelapse" if gate and gate.skipped > skipped_at_open else "segment"
+            task = asyncio.create_task(self._close_segment(recording, out, recording.segment_started_at, kind))
+            closing.add(task)
+            task.add_done_callback(closing.discard)
 
-            try:
-                await self.record_video(cam_id, full_path, duration_sec=30)
-            except asyncio.CancelledError:
-                logger.info(f"[INFO] Recording cancelled for {cam_id}")
-                break
-            except Exception as e:
-                logger.error(f"[ERROR] Failed to record video for {cam_id}: {e}")
-                await asyncio.sleep(5)
+        try:
+            while not recording.stop_event.is_set():
+                cam_entry = self.cameras.get(cam_id)
+                if frames is None or cam_entry is None or frames not in cam_entry["subscribers"]:
+                    # Camera reader restarted (reinitialize), follow the new one
+                    self.unsubscribe_frames(cam_id, frames)
+                    frames = self.subscribe_frames(cam_id)
+                    if frames is None:
+                        await asyncio.sleep(1)
+                        continue
+                try:
+                    frame = await asyncio.wait_for(frames.get(), timeout=0.5)
+                except asyncio.TimeoutError:
+                    frame = None
+                now = time.time()
+
+                if out is not None and now >= recording.next_rollover:
+                    close_segment()
+                    out = None
+                if frame is None:
+                    continue
 
-        logger.info(f"[INFO] Recording loop exited for {cam_id}")
+                try:
+                    if out is None:
+                        started = self._segment_start_time(recording, now)
+                        recording.segment_started_at = datetime.fromtimestamp(started)
+                        recording.next_rollover = recording.next_boundary(now)
+                        recording.segment_path = self.generate_video_path(cam_id, recording.segment_started_at,
+                                                                           prefix="segment")
+                        out = self._open_writer(recording.segment_path, frame)
+                        skipped_at_open = gate.skipped if gate else 0
+                        recording.segments += 1
+                    elif gate is not None and not gate.should_write(frame, now):
+                        continue
+                    out.write(frame)
+                    recording.frames += 1
+                except cv2.error as e:
+                    recording.errors += 1
+                    recording.last_error = str(e)
+                    logger.error(f"[ERROR] Continuous recording failed for {cam_id}: {e}")
+                    await asyncio.sleep(1)
+        finally:
+            self.unsubscribe_frames(cam_id, frames)
+            if out is not None:
+                close_segment()
+            if closing:
+                await asyncio.gather(*closing)
+            recording.segment_path = None
+            recording.next_rollover = None
+            logger.info(f"[INFO] Continuous recording stopped for {cam_id}")
 
-        task = asyncio.create_task(self.record_loop(cam_id), name=f"recording-{cam_id}")
-        self.recording_tasks[cam_id] = task
 
+    @staticmethod
+    def _segment_start_time(recording: ContinuousRecording, now: float) -> float:
+        """Start time of a segment opened at `now`: the boundary, unless recording just began mid-segment."""
+        boundary = recording.segment_start(now)
+        if recording.segments == 0 or now - boundary > 1.0:
+            return now
+        return boundary
 
-    async def stop_continuous_recording(self, cam_id: str):
-        """Stops the current continuous recording of the camera."""
-        if not self.recording_flags.get(cam_id):
-            return
 
-        self.recording_flags[cam_id] = False
+    async def _close_segment(self, recording: ContinuousRecording, out: ThreadedVideoWriter,
+                             started_at: datetime, kind: str) -> None:
+        """Flush a finished segment and add it to the recording index."""
+        try:
+            if await self._release_writer(out):
+                await self._index_recording(recording.cam_id, out.path, started_at, kind=kind)
+        except Exception as e:
+            recording.errors += 1
+            recording.last_error = str(e)
+            logger.error(f"[ERROR] Failed to close segment {out.path}: {e}")
 
-        task = self.recording_tasks.pop(cam_id, None)
-        if task is None:
-            return
 
-        if not asyncio.isfuture(task) and not asyncio.iscoroutine(task):
-            return
+    async def stop_continuous_recording(self, cam_id: str) -> bool:
+        """Stop continuous recording of a camera and wait until the last segment is flushed.
 
+        Returns:
+            bool: True if a recording was stopped.
+        """
+        recording = self.continuous_recordings.pop(cam_id, None)
+        if recording is None:
+            return False
+        recording.stop_event.set()
         try:
-            await task
+            await recording.task
         except asyncio.CancelledError:
             logger.debug(f"[DEBUG] Recording task for {cam_id} was cancelled")
         except Exception as e:
             logger.error(f"[ERROR] Error while stopping recording for {cam_id}: {e}")
+        return True
+
+
+    async def stop_all_continuous_recordings(self) -> None:
+        """Stop and flush every continuous recording (used on shutdown)."""
+        await asyncio.gather(*(self.stop_continuous_recording(cam_id)
+                               for cam_id in list(self.continuous_recordings)))
+
+
+    async def close(self) -> None:
+        """Stop recordings, background tasks, camera readers and worker threads of this manager.
+
+        Used on shutdown and after the manager is replaced on reload, so the
+        next manager does not write the same segment paths or open a second
+        capture of the same camera, and no thread of the old one is left
+        behind. Queued screenshots and thumbnail strips are written first.
+        """
+        await self.stop_all_continuous_recordings()
+        for task in (self.heatmap_task, self.io_pressure_task):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self.heatmap_task = self.io_pressure_task = None
+
+        loop = asyncio.get_running_loop()
+        for cam_id, heatmap in list(self.heatmaps.items()):
+            try:
+                await loop.run_in_executor(self.executor, heatmap.save)
+            except OSError as e:
+                logger.error(f"[ERROR] Failed to persist heatmap for {cam_id}: {e}")
+        await asyncio.gather(*(self._stop_camera_reader(cam_id) for cam_id in list(self.cameras)))
+
+        # Event clips in progress end with their post-roll and hand their file
+        # to the thumbnail writer, so they are awaited before it stops
+        if self.event_tasks:
+            await asyncio.gather(*self.event_tasks, return_exceptions=True)
+        await asyncio.to_thread(self.screenshot_writer.close)
+        await asyncio.to_thread(self.thumbnail_writer.close)
+        await asyncio.to_thread(self.executor.shutdown, wait=True)
+
+
+    def recording_status(self) -> list[dict]:
+        """Status of every continuous recording together with its writer counters."""
+        writers = {stats["path"]: stats for stats in self.writer_stats()}
+        result = []
+        for recording in list(self.continuous_recordings.values()):
+            status = recording.status()
+            status["writer"] = writers.get(recording.segment_path)
+            result.append(status)
+        return result
 
 
     async def reinitialize_camera(self, cam_id: str) -> bool:
@@ -580,7 +825,7 @@ class CameraManager:
         Returns:
             True if the camera was successfully reinitialized, False otherwise.
         """
-        camera_config_json = Cameras.reinit_camera(cam_id)
+        camera_config_json = await asyncio.to_thread(Cameras.reinit_camera, cam_id)
         if not camera_config_json:
             return False
         try:
@@ -592,6 +837,7 @@ class CameraManager:
             await self._stop_camera_reader(cam_id)
             self.camera_configs.pop(cam_id, None)
             self.background_subtractors.pop(cam_id, None)
+            self.heatmaps.pop(cam_id, None)
             return False
 
         if cam_id in self.cameras:
@@ -599,6 +845,7 @@ class CameraManager:
 
         self.camera_configs[cam_id] = single_config[cam_id]
         self.background_subtractors[cam_id] = cv2.createBackgroundSubtractorMOG2()
+        self.heatmaps.setdefault(cam_id, MotionHeatmap(cam_id))
 
         await self._start_camera_reader(cam_id, self.camera_configs[cam_id], timeout=5)
         return True
@@ -13,16 +13,21 @@ from quart import (Quart, request, jsonify, render_template, make_response, Resp
                    get_flashed_messages, send_file)
 import signal
 import jwt
-from datetime import datetime
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
 from celery_task import tasks
-from surveillance.schemas.repository import Cameras, User, OldFiles
+from surveillance.schemas.repository import Cameras, User, OldFiles, Recordings, ControlPanel
 from surveillance.camera_manager import CameraManager
 from logs.logging_config import get_logger
 from surveillance.utils.rtsp_utils import mask_rtsp_credentials, check_rtsp, PASSWORD_PATTERN
 from surveillance.utils.hash_utils import hash_password
 from surveillance.utils.jwt_utils import token_required_camera, token_required, create_token
+from surveillance.utils.alert_coalescer import AlertCoalescer
+from surveillance.utils.control_snapshot import SnapshotCache
+from surveillance.utils.export_utils import CONTINUOUS_KINDS, ExportError, export_window, get_export_path
+from surveillance.utils.notification_outbox import NotificationOutbox
+from surveillance.utils.thumbnail_strip import get_strip_path, read_strip_index, read_thumbnail
 
 logger = get_logger()
 
@@ -38,18 +43,73 @@ app = Quart(__name__)
 app.secret_key = os.urandom(24)
 
 app.template_folder = "templates"
-camera_manager: CameraManager = CameraManager()
 
 
-@app.before_serving
-async def setup_camera_manager():
+notification_outbox = NotificationOutbox(kick=tasks.kick_outbox_drains)
+
+CONTROL_PAGE_SIZE = int(os.getenv("CONTROL_PAGE_SIZE", 50))
+control_snapshot = SnapshotCache(lambda: ControlPanel.select_snapshot(page_size=CONTROL_PAGE_SIZE))
+
+
+def dispatch_alerts(cam_id: str, screenshot_paths: list[str], suppressed: int, context: dict) -> None:
+    """Queue one coalesced batch of motion screenshots for the enabled channels."""
+    if context.get("send_email"):
+        notification_outbox.put("email_screenshots", cam_id=cam_id, paths=screenshot_paths, suppressed=suppressed)
+    if context.get("send_tg") and context.get("chat_ids"):
+        notification_outbox.put("telegram_album", cam_id=cam_id, paths=screenshot_paths,
+                                chat_ids=context["chat_ids"], suppressed=suppressed)
+
+
+alert_coalescer = AlertCoalescer(dispatch_alerts)
+
+
+async def send_clip_to_telegram(cam_id: str, video_path: str) -> None:
+    """Queue the upload of a finished event clip; called once the file is complete."""
+    chat_ids = await User.get_allowed_chat_ids()
+    if chat_ids:
+        notification_outbox.put("telegram_video", cam_id=cam_id, path=video_path, chat_ids=chat_ids)
+
+
+def create_camera_manager() -> CameraManager:
+    """CameraManager with finished clips handed to Telegram, used at startup and on reload."""
+    return CameraManager(on_clip_ready=send_clip_to_telegram)
+
+
+camera_manager: CameraManager = create_camera_manager()
+
+
+async def replace_camera_manager() -> None:
+    """Swap the running manager for one built from the current configuration.
+
+    The new manager is built first, so an invalid configuration raises
+    ValueError while the old manager keeps its cameras and recordings. Only
+    then is the old one closed and the new one started.
+    """
     global camera_manager
-    camera_manager = CameraManager()
-    if not camera_manager:
-        return
+    new_manager = create_camera_manager()
+    await camera_manager.close()
+    # The new heatmaps were loaded before the old manager saved its latest state
+    for heatmap in new_manager.heatmaps.values():
+        await asyncio.to_thread(heatmap.load)
+    camera_manager = new_manager
     await camera_manager.initialize()
 
 
+@app.before_serving
+async def setup_camera_manager():
+    notification_outbox.start()
+    # main() may have started the module-level manager already
+    await replace_camera_manager()
+
+
+@app.after_serving
+async def shutdown_camera_manager():
+    alert_coalescer.flush_all()
+    if camera_manager:
+        await camera_manager.close()
+    await notification_outbox.stop()
+
+
 @app.route('/video/<cam_id>')
 @token_required_camera
 async def video_feed(cam_id):
@@ -74,7 +134,7 @@ async def video_feed(cam_id):
 
         try:
             while True:
-                frame, screenshot_path, video_path = await camera_manager.get_frame_with_motion_detection(
+                frame, screenshot_path, _ = await camera_manager.get_frame_with_motion_detection(
                     cam_id=cam_id,
                     save_screenshot=save_screenshot,
                     send_video_tg=send_video_tg,
@@ -91,16 +151,9 @@ async def video_feed(cam_id):
 
                 empty_in_row = 0
 
-                if send_email and screenshot_path:
-                    tasks.send_screenshot_email.delay(cam_id, screenshot_path)
-
-                if send_tg and screenshot_path:
-                    for chat_id in allowed_ids:
-                        tasks.send_telegram_notification.delay(cam_id, screenshot_path, chat_id)
-
-                if send_video_tg and video_path:
-                    for chat_id in allowed_ids:
-                        tasks.send_telegram_video.delay(cam_id, video_path, chat_id)
+                if screenshot_path and (send_email or (send_tg and allowed_ids)):
+                    alert_coalescer.add(cam_id, screenshot_path, send_email=send_email, send_tg=send_tg,
+                                        chat_ids=allowed_ids)
 
                 width, height = map(int, os.getenv("SIZE_VIDEO").split(","))
                 frame = cv2.resize(frame, (width, height))
@@ -133,6 +186,7 @@ async def update_route():
     cam_host = form_data.get("cam_host")
     subnet_mask = form_data.get("subnet_mask")
     await Cameras.update_find_camera(cam_host, subnet_mask)
+    control_snapshot.invalidate()
     return redirect(url_for('control'))
 
 
@@ -189,20 +243,47 @@ async def scan_network_for_rtsp():
 @token_required
 async def control():
     """control panel."""
-    all_cameras = await Cameras.select_all_cam()
-    all_users = await User.select_all_users()
-    current_range = await Cameras.select_find_cam()
-    old_files_weekly = await OldFiles.select_status_old_video()
-    old_files_logs = await OldFiles.select_status_old_logs()
+    snapshot = await control_snapshot.get()
+    all_cameras = snapshot["cameras"]
     masked_urls = {cam.id: mask_rtsp_credentials(cam.path_to_cam) for cam in all_cameras}
     user_host = os.getenv("HOST")
     user_port = os.getenv("PORT")
 
     messages = get_flashed_messages(with_categories=True)
-    return await render_template('control.html', all_cameras=all_cameras, all_users=all_users,
+    return await render_template('control.html', all_cameras=all_cameras, all_users=snapshot["users"],
+                                 cameras_total=snapshot["cameras_total"], users_total=snapshot["users_total"],
                                  host=user_host, port=user_port, messages=messages, status='admin',
-                                 current_range=current_range, masked_urls=masked_urls,
-                                 old_files_weekly=old_files_weekly, old_files_logs=old_files_logs)
+                                 current_range=snapshot["current_range"], masked_urls=masked_urls,
+                                 old_files_weekly=snapshot["old_files_weekly"],
+                                 old_files_logs=snapshot["old_files_logs"])
+
+
+def page_response(html: str, offset: int, count: int, total: int) -> Response:
+    """Rows of a lazily loaded list; X-Next-Offset is empty after the last page."""
+    next_offset = offset + count
+    return Response(html, headers={"X-Next-Offset": str(next_offset) if next_offset < total else ""})
+
+
+@app.route('/control/cameras')
+@token_required
+async def control_cameras():
+    """next page of the camera list of the control panel."""
+    offset = max(0, request.args.get("offset", 0, type=int))
+    cameras, total = await ControlPanel.select_cameras_page(offset, CONTROL_PAGE_SIZE)
+    masked_urls = {cam.id: mask_rtsp_credentials(cam.path_to_cam) for cam in cameras}
+    html = await render_template('control/camera_rows.html', cameras=cameras, masked_urls=masked_urls,
+                                 host=os.getenv("HOST"), port=os.getenv("PORT"))
+    return page_response(html, offset, len(cameras), total)
+
+
+@app.route('/control/users')
+@token_required
+async def control_users():
+    """next page of the user list of the control panel."""
+    offset = max(0, request.args.get("offset", 0, type=int))
+    users, total = await ControlPanel.select_users_page(offset, CONTROL_PAGE_SIZE)
+    html = await render_template('control/user_rows.html', users=users)
+    return page_response(html, offset, len(users), total)
 
 
 @app.route('/delete_camera/<int:ssid>', methods=['GET', 'POST'])
@@ -210,6 +291,7 @@ async def control():
 async def delete_camera(ssid):
     """deleting camera by id"""
     success = await Cameras.drop_camera(ssid)
+    control_snapshot.invalidate()
     if success:
         return redirect(url_for('control'))
     return jsonify({"error": "Camera not found"}), 404
@@ -223,6 +305,7 @@ async def delete_user(ssid):
         await flash("Superadmin is not deleted", "admin_not_deleted")
         return redirect(url_for('control'))
     success = await User.drop_user(ssid)
+    control_snapshot.invalidate()
     if success:
         await flash("User successfully deleted", "user_deleted")
         return redirect(url_for('control'))
@@ -250,6 +333,7 @@ async def add_new_camera():
         return redirect(url_for("control"))
     q = await Cameras.add_new_cam(new_cam, int(motion_detection), int(visible_cam), int(screen_cam),
                                int(send_email), int(send_tg))
+    control_snapshot.invalidate()
     if q is False:
         await flash("Camera not added: such URL already exists or an error occurred!",
                     "camera_error")
@@ -273,6 +357,7 @@ async def add_new_user():
         return redirect(url_for("control"))
     pswrd = hash_password(password)
     q = await User.add_new_user(user, pswrd, status, tg_id, active)
+    control_snapshot.invalidate()
     if q is False:
         await flash("This user already exists!", "user_error")
         return redirect(url_for("control"))
@@ -300,6 +385,7 @@ async def edit_cam():
     await Cameras.edit_camera(ssid, path_to_cam, motion_detection, visible_camera, screen_cam,
                            send_mail, send_telegram, send_video_tg,
                            )
+    control_snapshot.invalidate()
     await flash("Camera updated successfully!", "user_success")
     return redirect(url_for("control"))
 
@@ -312,6 +398,7 @@ async def celery_old_video():
     old_video = form_data.get("weekly_recordings_cleanup")
 
     await OldFiles.celery_old_video(old_video)
+    control_snapshot.invalidate()
     return redirect(url_for("control"))
 
 
@@ -323,6 +410,7 @@ async def celery_old_logs_cleanup():
     old_logs = form_data.get("old_logs_cleanup")
 
     await OldFiles.celery_old_logs(old_logs)
+    control_snapshot.invalidate()
     return redirect(url_for("control"))
 
 
@@ -390,10 +478,8 @@ async def login():
 @app.route('/reload-cameras', methods=['GET', 'POST'])
 async def reload_cameras():
     """reload all cameras"""
-    global camera_manager
     try:
-        camera_manager = CameraManager()
-        await camera_manager.initialize()
+        await replace_camera_manager()
         if request.method == 'GET':
             return redirect('index')
         return Response(
@@ -464,6 +550,130 @@ async def camera_snapshot():
     return await send_file(io.BytesIO(buffer.tobytes()), mimetype='image/jpeg')
 
 
+@app.route("/heatmap/<cam_id>", methods=['GET'])
+@token_required_camera
+async def camera_heatmap(cam_id):
+    """Motion heatmap of the camera as a transparent PNG overlay."""
+    if camera_manager is None:
+        return "CameraManager not initialized", 500
+    width, height = map(int, os.getenv("SIZE_VIDEO").split(","))
+    png = await camera_manager.get_heatmap_png(cam_id, width, height)
+    if png is None:
+        return "Heatmap not available", 404
+    return await send_file(io.BytesIO(png), mimetype='image/png')
+
+
+def parse_time_window():
+    """Read `from`/`to` ISO timestamps from the query string, return (start, end) or None."""
+    try:
+        start = datetime.fromisoformat(request.args["from"])
+        end = datetime.fromisoformat(request.args["to"])
+    except (KeyError, ValueError):
+        return None
+    if end <= start:
+        return None
+    return start, end
+
+
+def recording_lookback():
+    """Longest duration of one recording, used to find the one covering a window start."""
+    return timedelta(seconds=int(os.getenv("PLAYBACK_LOOKBACK_SEC", 300)))
+
+
+@app.route("/recordings/<cam_id>", methods=['GET'])
+@token_required_camera
+async def list_recordings(cam_id):
+    """Indexed recordings of a camera overlapping the `from`-`to` window."""
+    window = parse_time_window()
+    if window is None:
+        return jsonify({"message": "Expected ISO 'from' and 'to' query parameters"}), 400
+    rows = await Recordings.select_range(cam_id, *window, lookback=recording_lookback())
+    return jsonify([{
+        "id": row.id,
+        "started_at": row.started_at.isoformat(),
+        "size": row.size,
+        "kind": row.kind,
+        "tier": row.tier,
+        "url": url_for('recording_file', rec_id=row.id),
+        "thumbnails": url_for('recording_thumbnails', rec_id=row.id),
+    } for row in rows])
+
+
+@app.route("/recordings/file/<int:rec_id>", methods=['GET'])
+@token_required_camera
+async def recording_file(rec_id):
+    """Serve a recording with HTTP byte range support for seeking in the player."""
+    row = await Recordings.select_by_id(rec_id)
+    if row is None:
+        return jsonify({"message": "Recording not found"}), 404
+    full_path = os.path.join(os.path.dirname(script_dir), row.path)
+    if not os.path.isfile(full_path):
+        return jsonify({"message": "Recording file is missing"}), 404
+    response = await send_file(full_path, mimetype='video/mp4', conditional=True)
+    response.response.buffer_size = 256 * 1024
+    return response
+
+
+@app.route("/recordings/file/<int:rec_id>/thumbnails", methods=['GET'])
+@token_required_camera
+async def recording_thumbnails(rec_id):
+    """Offsets of the thumbnail strip of a recording, one entry every few seconds."""
+    row = await Recordings.select_by_id(rec_id)
+    if row is None:
+        return jsonify({"message": "Recording not found"}), 404
+    strip_path = get_strip_path(os.path.join(os.path.dirname(script_dir), row.path))
+    try:
+        index = await asyncio.to_thread(read_strip_index, strip_path)
+    except (OSError, ValueError):
+        return jsonify({"message": "Thumbnails not available"}), 404
+    return jsonify([{
+        "t": time_ms / 1000,
+        "url": url_for('recording_thumbnail', rec_id=rec_id, index=i),
+    } for i, (time_ms, _, _) in enumerate(index)])
+
+
+@app.route("/recordings/file/<int:rec_id>/thumbnails/<int:index>", methods=['GET'])
+@token_required_camera
+async def recording_thumbnail(rec_id, index):
+    """One JPEG out of the thumbnail strip of a recording."""
+    row = await Recordings.select_by_id(rec_id)
+    if row is None:
+        return jsonify({"message": "Recording not found"}), 404
+    strip_path = get_strip_path(os.path.join(os.path.dirname(script_dir), row.path))
+    try:
+        jpeg = await asyncio.to_thread(read_thumbnail, strip_path, index)
+    except OSError:
+        jpeg = None
+    if jpeg is None:
+        return jsonify({"message": "Thumbnail not available"}), 404
+    response = await send_file(io.BytesIO(jpeg), mimetype='image/jpeg')
+    response.cache_control.max_age = 86400
+    return response
+
+
+@app.route("/recordings/<cam_id>/export", methods=['GET'])
+@token_required_camera
+async def export_recordings(cam_id):
+    """Export the `from`-`to` window of a camera as one mp4 without re-encoding."""
+    window = parse_time_window()
+    if window is None:
+        return jsonify({"message": "Expected ISO 'from' and 'to' query parameters"}), 400
+    start, end = window
+    if (end - start).total_seconds() > int(os.getenv("EXPORT_MAX_SEC", 3600)):
+        return jsonify({"message": "Requested window is too long"}), 400
+
+    rows = await Recordings.select_range(cam_id, start, end, lookback=recording_lookback(), kinds=CONTINUOUS_KINDS)
+    out_path = get_export_path(cam_id, start, end, rows)
+    try:
+        await export_window(rows, start, end, out_path)
+    except ExportError as e:
+        return jsonify({"message": str(e)}), e.status
+    response = await send_file(out_path, mimetype='video/mp4', as_attachment=True,
+                               attachment_filename=os.path.basename(out_path), conditional=True)
+    response.response.buffer_size = 256 * 1024
+    return response
+
+
 @app.route("/save_camera_zone", methods=['POST'])
 @token_required
 async def save_camera_zone():
@@ -493,9 +703,11 @@ async def save_camera_zone():
         "coordinate_y1": f"{coordinates[0][0]}, {coordinates[0][1]}",
         "coordinate_x2": f"{coordinates[2][0]}, {coordinates[2][1]}",
         "coordinate_y2": f"{coordinates[2][0]}, {coordinates[2][1]}",
+        "zone": [[x, y] for x, y in coordinates],
     }
 
     result = await Cameras.update_coord(**update_data)
+    control_snapshot.invalidate()
 
     if result is False:
         return jsonify({"message": "Coordinate update error"}), 500
@@ -508,19 +720,28 @@ async def save_camera_zone():
 @app.route("/start_recording_loop/<cam_id>", methods=["POST"])
 @token_required_camera
 async def start_recording_loop(cam_id):
-    """long recording in 30 second blocks"""
-    asyncio.create_task(camera_manager.start_continuous_recording(cam_id))
+    """continuous recording in wall-clock aligned segments"""
+    if not camera_manager.start_continuous_recording(cam_id):
+        if cam_id in camera_manager.cameras:
+            return jsonify({"status": "already_recording"})
+        return jsonify({"status": "camera_not_running"}), 404
     return jsonify({"status": "recording_started"})
 
 
 @app.route("/stop_recording_loop/<cam_id>", methods=["POST"])
 @token_required_camera
 async def stop_recording_loop(cam_id):
-    """stop entry"""
+    """stop entry, returns after the last segment is flushed"""
     await camera_manager.stop_continuous_recording(cam_id)
     return jsonify({"status": "recording_stopped"})
 
 
+@app.route("/recording_status", methods=["GET"])
+@token_required_camera
+async def recording_status():
+    """Status of continuous recordings: current segment, next rollover, counters"""
+    return jsonify(camera_manager.recording_status())
+
 
 @app.route("/force_stop_cam/<cam_id>", methods=["GET"])
 @token_required
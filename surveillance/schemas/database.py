@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, BigInteger
+from sqlalchemy import Column, Integer, String, Boolean, BigInteger, DateTime, Text, JSON
 from sqlalchemy.orm import DeclarativeBase
 
 
@@ -22,11 +22,12 @@ class DCamera(Model):
         coordinate_x2 (str): second X coordinate for detection zone
         coordinate_y1 (str): first Y coordinate for detection zone
         coordinate_y2 (str): second Y coordinate for detection zone
+        zone (list): detection zone as a list of [x, y] points
     """
     __tablename__ = "_camera"
     path_to_cam = Column(String(200), unique=True)
     status_cam = Column(Boolean, nullable=False)
-    visible_cam = Column(Boolean, nullable=True)
+    visible_cam = Column(Boolean, nullable=True, index=True)
     screen_cam = Column(Boolean, nullable=False)
     send_email = Column(Boolean, nullable=False)
     send_tg = Column(Boolean, nullable=False)
@@ -35,6 +36,7 @@ class DCamera(Model):
     coordinate_x2 = Column(String(12), default="0, 0")
     coordinate_y1 = Column(String(12), default="0, 0")
     coordinate_y2 = Column(String(12), default="0, 0")
+    zone = Column(JSON, nullable=True)
 
 
 class DUser(Model):
@@ -53,7 +55,7 @@ class DUser(Model):
     password = Column(String(100))
     status = Column(String(10))
     tg_id = Column(BigInteger, unique=True, nullable=True, default=0)
-    active = Column(Integer, default=0)
+    active = Column(Integer, default=0, index=True)
 
 
 class DFindCamera(Model):
@@ -80,3 +82,55 @@ class DOperationOldFiles(Model):
     __tablename__ = "_old_files"
     weekly_recordings_cleanup = Column(Boolean, nullable=False, default=False)
     old_logs_cleanup = Column(Boolean, nullable=False, default=False)
+
+
+class DRecording(Model):
+    """Represents a recorded video segment on disk.
+
+        Attributes:
+            cam_id (str): camera ID
+            path (str): path to the video file
+            size (int): file size in bytes
+            started_at (datetime): start of the recording
+            kind (str): recording kind (event, segment)
+            tier (str): storage tier (original, compact, timelapse)
+        """
+
+    __tablename__ = "_recording"
+    cam_id = Column(String(20), nullable=False, index=True)
+    path = Column(String(300), unique=True, nullable=False)
+    size = Column(BigInteger, nullable=False, default=0)
+    started_at = Column(DateTime, nullable=False, index=True)
+    kind = Column(String(20), nullable=False, default="segment")
+    tier = Column(String(20), nullable=False, default="original", server_default="original")
+
+
+class DNotification(Model):
+    """Represents an alert waiting in the notification outbox.
+
+        Attributes:
+            key (str): idempotency key, an alert is stored and delivered once
+            kind (str): delivery kind (email_screenshots, telegram_album, telegram_photo, telegram_video)
+            payload (str): JSON arguments of the delivery
+            status (str): pending, sending, sent or failed
+            attempts (int): number of delivery attempts
+            available_at (datetime): earliest time of the next attempt
+            claim (str): token of the drain that is delivering the alert
+            claimed_at (datetime): time the alert was claimed
+            created_at (datetime): time the alert was raised
+            sent_at (datetime): time the alert was delivered
+            last_error (str): error of the last attempt
+        """
+
+    __tablename__ = "_notification_outbox"
+    key = Column(String(64), unique=True, nullable=False)
+    kind = Column(String(30), nullable=False)
+    payload = Column(Text, nullable=False)
+    status = Column(String(10), nullable=False, default="pending", index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, nullable=False, index=True)
+    claim = Column(String(32), nullable=True)
+    claimed_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    sent_at = Column(DateTime, nullable=True)
+    last_error = Column(String(500), nullable=True)
@@ -1,16 +1,17 @@
 import logging
-import sqlite3
 import json
 from typing import Any
-from sqlalchemy import select, insert, delete, and_, update, Select
+from sqlalchemy import select, insert, delete, and_, update, Select, func
 from sqlalchemy.exc import NoResultFound, IntegrityError, SQLAlchemyError
-from surveillance.schemas.database import DCamera, DUser, DFindCamera, DOperationOldFiles
-import os
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from surveillance.schemas.database import DCamera, DUser, DFindCamera, DOperationOldFiles, DRecording, DNotification
 import re
-import asyncio
+import uuid
+from datetime import datetime, timedelta
 from logs.logging_config import get_logger
 logger = get_logger()
-from config.config import new_session
+from config.config import new_session, new_sync_session, run_sync, is_sqlite
 
 
 class User:
@@ -298,12 +299,13 @@ class Cameras:
 
                 q = (
                     update(DCamera)
-                    .where(DCamera.id == cam_id)
+                    .where(DCamera.id == int(cam_id))
                     .values(
                         coordinate_x1=coordinate_x1,
                         coordinate_y1=coordinate_y1,
                         coordinate_x2=coordinate_x2,
-                        coordinate_y2=coordinate_y2
+                        coordinate_y2=coordinate_y2,
+                        zone=kwargs.get("zone")
                     )
                 )
                 await session.execute(q)
@@ -504,40 +506,28 @@ class Cameras:
     @staticmethod
     def select_all_cameras_to_json():
         """Synchronous selection of all cameras from the _camera table in JSON dictionary format."""
-        path_to_database = os.path.join("", f"{os.getenv('DATABASE')}.db")
         try:
-            conn = sqlite3.connect(path_to_database)
-            cursor = conn.cursor()
-            q = "SELECT id, path_to_cam, visible_cam FROM _camera WHERE visible_cam = True"
-            cursor.execute(q)
-            result = cursor.fetchall()
-            json_result = {str(row[0]): row[1] for row in result}
-            conn.close()
-            return json.dumps(json_result, ensure_ascii=False)
-        except sqlite3.Error as e:
+            with new_sync_session() as session:
+                q = select(DCamera.id, DCamera.path_to_cam).where(DCamera.visible_cam == True)
+                result = session.execute(q).all()
+            return json.dumps({str(row.id): row.path_to_cam for row in result}, ensure_ascii=False)
+        except SQLAlchemyError as e:
             logger.error(f"[ERROR] Ошибка базы данных: {e}")
             return json.dumps({})
 
     @staticmethod
     def reinit_camera(cam_id):
         """Synchronous selection of one active camera by id, returns JSON."""
-        path_to_database = os.path.join("", f"{os.getenv('DATABASE')}.db")
         try:
-            with sqlite3.connect(path_to_database) as conn:
-                cursor = conn.cursor()
-                query = """
-                    SELECT id, path_to_cam, visible_cam
-                    FROM _camera 
-                    WHERE id = ? AND visible_cam = 1
-                """
-                cursor.execute(query, (cam_id,))
-                result = cursor.fetchone()
-                if result:
-                    return json.dumps({
-                        str(result[0]): result[1]
-                    }, ensure_ascii=False)
-                return json.dumps({})
-        except sqlite3.Error as e:
+            with new_sync_session() as session:
+                q = select(DCamera.id, DCamera.path_to_cam).where(
+                    DCamera.id == int(cam_id), DCamera.visible_cam == True
+                )
+                result = session.execute(q).first()
+            if result:
+                return json.dumps({str(result.id): result.path_to_cam}, ensure_ascii=False)
+            return json.dumps({})
+        except SQLAlchemyError as e:
             logger.error(f"[ERROR] Ошибка базы данных: {e}")
             return json.dumps({})
 
@@ -573,19 +563,19 @@ class Cameras:
         async with new_session() as session:
             try:
                 q = select(
+                    DCamera.zone,
                     DCamera.coordinate_x1, DCamera.coordinate_x2,
                     DCamera.coordinate_y1, DCamera.coordinate_y2
-                ).where(DCamera.id == cam_id)
+                ).where(DCamera.id == int(cam_id))
                 result = await session.execute(q)
                 row = result.first()
-                if row and all(row):
-                    def parse(coord_str):
-                        return tuple(map(int, coord_str.split(',')))
-                    x1 = parse(row[0])
-                    x2 = parse(row[1])
-                    y1 = parse(row[2])
-                    y2 = parse(row[3])
-                    return [x1, x2, y1, y2]
+                if row is None:
+                    return []
+                if row.zone:
+                    return [tuple(point) for point in row.zone]
+                # The zone was never saved since the zone column was added
+                if all(row[1:]):
+                    return [tuple(map(int, coord_str.split(','))) for coord_str in row[1:]]
                 return []
             except Exception as e:
                 logger.error(f"[ERROR] Failed to fetch coordinates: {e}")
@@ -705,20 +695,14 @@ class TaskCelery:
         Synchronously retrieve all camera IDs from the database.
 
         This method provides a synchronous wrapper around the async method.
-        It handles event loop creation/retrieval to ensure proper execution
-        in synchronous contexts like Celery tasks.
+        It runs on the process-wide database loop, so it is safe in
+        synchronous contexts like Celery tasks.
 
         Returns:
             List[int]: A list of all camera IDs
         """
 
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-
-        return loop.run_until_complete(cls.select_cameras_ids())
+        return run_sync(cls.select_cameras_ids())
 
     @classmethod
     async def select_cameras_ids(cls):
@@ -832,3 +816,423 @@ class OldFiles:
                 await session.rollback()
                 logger.error(f"[ERROR] Error updating old_logs_cleanup: {e}")
                 return False
+
+
+class ControlPanel:
+    """Queries of the control panel page."""
+
+    @classmethod
+    async def select_snapshot(cls, page_size=50):
+        """Everything the control panel renders, read in one transaction.
+
+        Counts and cleanup settings come from one aggregate query, the
+        camera and user lists are limited to their first page.
+
+        Args:
+            cls: Class reference (unused).
+            page_size: int - cameras and users on the first page
+
+        Returns:
+            dict: cameras, cameras_total, users, users_total, current_range,
+                old_files_weekly, old_files_logs
+        """
+        async with new_session() as session:
+            async with session.begin():
+                summary = (await session.execute(select(
+                    select(func.count()).select_from(DCamera).scalar_subquery().label("cameras_total"),
+                    select(func.count()).select_from(DUser).scalar_subquery().label("users_total"),
+                    select(DOperationOldFiles.weekly_recordings_cleanup).order_by(DOperationOldFiles.id)
+                    .limit(1).scalar_subquery().label("old_files_weekly"),
+                    select(DOperationOldFiles.old_logs_cleanup).order_by(DOperationOldFiles.id)
+                    .limit(1).scalar_subquery().label("old_files_logs"),
+                ))).one()
+                routes = (await session.execute(select(DFindCamera.cam_host, DFindCamera.subnet_mask))).all()
+                cameras = (await session.execute(
+                    select(DCamera).order_by(DCamera.id).limit(page_size))).scalars().all()
+                users = (await session.execute(
+                    select(DUser.id, DUser.user, DUser.status).order_by(DUser.id).limit(page_size))).all()
+
+        current_range = ','.join(f"{row.cam_host}/{row.subnet_mask}" for row in routes)
+        return {
+            "cameras": cameras,
+            "cameras_total": summary.cameras_total,
+            "users": users,
+            "users_total": summary.users_total,
+            "current_range": current_range or None,
+            "old_files_weekly": summary.old_files_weekly,
+            "old_files_logs": summary.old_files_logs,
+        }
+
+    @classmethod
+    async def select_cameras_page(cls, offset=0, limit=50):
+        """One page of cameras ordered by id.
+
+        Returns:
+            tuple[list[DCamera], int]: cameras of the page and the total number of cameras.
+        """
+        async with new_session() as session:
+            total = (await session.execute(select(func.count()).select_from(DCamera))).scalar()
+            result = await session.execute(select(DCamera).order_by(DCamera.id).offset(offset).limit(limit))
+            return result.scalars().all(), total
+
+    @classmethod
+    async def select_users_page(cls, offset=0, limit=50):
+        """One page of users (id, user, status) ordered by id.
+
+        Returns:
+            tuple[list, int]: users of the page and the total number of users.
+        """
+        async with new_session() as session:
+            total = (await session.execute(select(func.count()).select_from(DUser))).scalar()
+            result = await session.execute(
+                select(DUser.id, DUser.user, DUser.status).order_by(DUser.id).offset(offset).limit(limit))
+            return result.all(), total
+
+
+class Recordings:
+    """Index of recorded video files used by retention and playback."""
+
+    @classmethod
+    async def add_recording(cls, cam_id, path, size, started_at, kind="segment"):
+        """Register a finished recording in the index.
+
+        Args:
+            cls: Class reference (unused).
+            cam_id: str
+            path: str
+            size: int (bytes)
+            started_at: datetime
+            kind: str (event, segment)
+
+        Returns:
+            bool: True if successful, False if error
+        """
+        async with new_session() as session:
+            try:
+                q = insert(DRecording).values(cam_id=str(cam_id), path=path, size=int(size),
+                                              started_at=started_at, kind=kind)
+                await session.execute(q)
+                await session.commit()
+                return True
+            except IntegrityError as e:
+                await session.rollback()
+                logger.error(f"[ERROR] Recording {path} already indexed: {e}")
+                return False
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"[ERROR] Error indexing recording {path}: {e}")
+                return False
+
+    @classmethod
+    async def select_total_size(cls):
+        """Total size in bytes of all indexed recordings."""
+        async with new_session() as session:
+            q = select(func.coalesce(func.sum(DRecording.size), 0))
+            result = await session.execute(q)
+            return int(result.scalar())
+
+    @classmethod
+    async def select_oldest(cls, limit=100, offset=0):
+        """Select the oldest recordings, ordered by start time.
+
+        Args:
+            cls: Class reference (unused).
+            limit: int - batch size
+            offset: int - number of oldest rows to skip (e.g. protected ones)
+
+        Returns:
+            List of DRecording instances.
+        """
+        async with new_session() as session:
+            q = (select(DRecording)
+                 .order_by(DRecording.started_at, DRecording.id)
+                 .offset(offset)
+                 .limit(limit))
+            result = await session.execute(q)
+            return result.scalars().all()
+
+    @classmethod
+    async def select_older_than(cls, cam_id, before, limit=100):
+        """Select recordings of a camera started before `before`."""
+        async with new_session() as session:
+            q = (select(DRecording)
+                 .where(DRecording.cam_id == str(cam_id), DRecording.started_at < before)
+                 .order_by(DRecording.started_at)
+                 .limit(limit))
+            result = await session.execute(q)
+            return result.scalars().all()
+
+    @classmethod
+    async def select_for_tiering(cls, before, tier="original", limit=100, offset=0):
+        """Select recordings of the given tier started before `before`, oldest first.
+
+        Args:
+            cls: Class reference (unused).
+            before: datetime
+            tier: str - current tier of the rows
+            limit: int - batch size
+            offset: int - number of rows to skip (e.g. failed to transcode)
+
+        Returns:
+            List of DRecording instances.
+        """
+        async with new_session() as session:
+            q = (select(DRecording)
+                 .where(DRecording.tier == tier, DRecording.started_at < before)
+                 .order_by(DRecording.started_at, DRecording.id)
+                 .offset(offset)
+                 .limit(limit))
+            result = await session.execute(q)
+            return result.scalars().all()
+
+    @classmethod
+    async def update_tier(cls, rec_id, size, tier):
+        """Move a recording to another tier.
+
+        Args:
+            cls: Class reference (unused).
+            rec_id: int
+            size: int (bytes) - size of the new file
+            tier: str (original, compact, timelapse)
+
+        Returns:
+            bool: True if successful, False if error
+        """
+        async with new_session() as session:
+            try:
+                q = update(DRecording).where(DRecording.id == rec_id).values(size=int(size), tier=tier)
+                await session.execute(q)
+                await session.commit()
+                return True
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"[ERROR] Error moving recording {rec_id} to tier {tier}: {e}")
+                return False
+
+    @classmethod
+    async def select_range(cls, cam_id, start, end, lookback, limit=500, kinds=None):
+        """Select recordings of a camera overlapping a time window.
+
+        Rows started inside the window are returned together with the last
+        one started up to `lookback` before it, which may still cover the
+        window start.
+
+        Args:
+            cls: Class reference (unused).
+            cam_id: str
+            start: datetime
+            end: datetime
+            lookback: timedelta - longest recording duration
+            limit: int - max number of rows
+            kinds: Optional[tuple] - only recordings of these kinds, all by default
+
+        Returns:
+            List of DRecording instances ordered by start time.
+        """
+        conditions = [DRecording.cam_id == str(cam_id)]
+        if kinds is not None:
+            conditions.append(DRecording.kind.in_(kinds))
+        async with new_session() as session:
+            previous = await session.execute(
+                select(DRecording)
+                .where(*conditions, DRecording.started_at < start, DRecording.started_at >= start - lookback)
+                .order_by(DRecording.started_at.desc())
+                .limit(1))
+            inside = await session.execute(
+                select(DRecording)
+                .where(*conditions, DRecording.started_at >= start, DRecording.started_at < end)
+                .order_by(DRecording.started_at, DRecording.id)
+                .limit(limit))
+            return list(previous.scalars().all()) + list(inside.scalars().all())
+
+    @classmethod
+    async def select_by_id(cls, rec_id):
+        """Select one recording by ID, None if it is not indexed."""
+        async with new_session() as session:
+            result = await session.execute(select(DRecording).where(DRecording.id == rec_id))
+            return result.scalars().first()
+
+    @classmethod
+    async def select_camera_ids(cls):
+        """Distinct camera IDs present in the index."""
+        async with new_session() as session:
+            result = await session.execute(select(DRecording.cam_id).distinct())
+            return result.scalars().all()
+
+    @classmethod
+    async def delete_by_ids(cls, ids):
+        """Remove recordings from the index.
+
+        Returns:
+            bool: True if successful, False if error
+        """
+        if not ids:
+            return True
+        async with new_session() as session:
+            try:
+                await session.execute(delete(DRecording).where(DRecording.id.in_(ids)))
+                await session.commit()
+                return True
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"[ERROR] Error deleting recordings from index: {e}")
+                return False
+
+    @classmethod
+    async def delete_started_before(cls, before):
+        """Remove index rows of recordings started before `before` (folders deleted by age).
+
+        Returns:
+            bool: True if successful, False if error
+        """
+        async with new_session() as session:
+            try:
+                await session.execute(delete(DRecording).where(DRecording.started_at < before))
+                await session.commit()
+                return True
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"[ERROR] Error pruning recordings index: {e}")
+                return False
+
+
+class Notifications:
+    """Outbox of alerts, written by the web server and drained by the notification worker."""
+
+    @classmethod
+    async def insert_many(cls, rows):
+        """Store alerts in the outbox in one transaction, skipping idempotency keys already stored.
+
+        Args:
+            cls: Class reference (unused).
+            rows: list of dict (key, kind, payload, available_at, created_at)
+
+        Returns:
+            bool: True if successful, False if error
+        """
+        if not rows:
+            return True
+        async with new_session() as session:
+            try:
+                dialect_insert = sqlite_insert if is_sqlite() else postgresql_insert
+                q = dialect_insert(DNotification).on_conflict_do_nothing(index_elements=["key"])
+                await session.execute(q, rows)
+                await session.commit()
+                return True
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"[ERROR] Error writing {len(rows)} notifications to the outbox: {e}")
+                return False
+
+    @classmethod
+    async def claim(cls, limit=50, lease=timedelta(minutes=5), kinds=None):
+        """Claim due alerts for delivery.
+
+        Pending rows whose `available_at` has passed are claimed, and rows
+        left in `sending` by a drain that died longer than `lease` ago.
+
+        Args:
+            cls: Class reference (unused).
+            limit: int - batch size
+            lease: timedelta - time after which a claim is considered abandoned
+            kinds: Optional list of str - claim only these delivery kinds
+
+        Returns:
+            tuple[str, list[DNotification]]: claim token and the claimed rows.
+        """
+        token = uuid.uuid4().hex
+        now = datetime.now()
+        async with new_session() as session:
+            due = (select(DNotification.id)
+                   .where(((DNotification.status == "pending") & (DNotification.available_at <= now)) |
+                          ((DNotification.status == "sending") & (DNotification.claimed_at < now - lease)))
+                   .order_by(DNotification.available_at, DNotification.id)
+                   .limit(limit)
+                   # Concurrent drains on PostgreSQL skip each other's rows, SQLite serializes writers anyway
+                   .with_for_update(skip_locked=True))
+            if kinds is not None:
+                due = due.where(DNotification.kind.in_(kinds))
+            await session.execute(
+                update(DNotification)
+                .where(DNotification.id.in_(due))
+                .values(status="sending", claim=token, claimed_at=now, attempts=DNotification.attempts + 1))
+            await session.commit()
+            result = await session.execute(
+                select(DNotification).where(DNotification.claim == token).order_by(DNotification.id))
+            return token, result.scalars().all()
+
+    @classmethod
+    async def renew(cls, notification_id, token):
+        """Extend the lease of a claimed alert that is still being delivered.
+
+        Returns:
+            bool: True if the claim is still ours
+        """
+        async with new_session() as session:
+            result = await session.execute(
+                update(DNotification)
+                .where(DNotification.id == notification_id, DNotification.claim == token)
+                .values(claimed_at=datetime.now()))
+            await session.commit()
+            return result.rowcount == 1
+
+    @classmethod
+    async def mark_sent(cls, notification_id, token, error=None):
+        """Mark a claimed alert as delivered, only if the claim is still ours.
+
+        Returns:
+            bool: True if the row was marked
+        """
+        async with new_session() as session:
+            result = await session.execute(
+                update(DNotification)
+                .where(DNotification.id == notification_id, DNotification.claim == token)
+                .values(status="sent", sent_at=datetime.now(), last_error=error))
+            await session.commit()
+            return result.rowcount == 1
+
+    @classmethod
+    async def reschedule(cls, notification_id, token, delay, error, payload=None, failed=False):
+        """Release a claimed alert for a later attempt, or give up on it.
+
+        Args:
+            cls: Class reference (unused).
+            notification_id: int
+            token: str - claim token of the caller
+            delay: float - seconds until the next attempt
+            error: str - reason of the failed attempt
+            payload: Optional[str] - new JSON arguments (e.g. only the chats still to notify)
+            failed: bool - mark the alert as failed instead of pending
+
+        Returns:
+            bool: True if the row was updated
+        """
+        values = {"status": "failed" if failed else "pending", "claim": None,
+                  "available_at": datetime.now() + timedelta(seconds=delay), "last_error": error[:500]}
+        if payload is not None:
+            values["payload"] = payload
+        async with new_session() as session:
+            result = await session.execute(
+                update(DNotification)
+                .where(DNotification.id == notification_id, DNotification.claim == token)
+                .values(**values))
+            await session.commit()
+            return result.rowcount == 1
+
+    @classmethod
+    async def delete_finished_before(cls, before):
+        """Remove sent and failed alerts created before `before`.
+
+        Returns:
+            bool: True if successful, False if error
+        """
+        async with new_session() as session:
+            try:
+                await session.execute(delete(DNotification).where(
+                    DNotification.status.in_(["sent", "failed"]), DNotification.created_at < before))
+                await session.commit()
+                return True
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"[ERROR] Error pruning notification outbox: {e}")
+                return False
@@ -0,0 +1,115 @@
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+
+from logs.logging_config import get_logger
+
+logger = get_logger()
+
+
+class AlertBatch:
+    """Screenshots of one camera collected during a coalescing window."""
+
+    def __init__(self, cam_id: str, context: dict):
+        self.cam_id = cam_id
+        self.context = context
+        self.paths: list[str] = []
+        self.suppressed = 0
+        self.opened_at = time.monotonic()
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class AlertCoalescer:
+    """Per-camera coalescing of motion alerts with a global rate cap.
+
+    The first screenshot of a camera opens a window of `window` seconds;
+    everything arriving until it closes is sent as one batch (one Telegram
+    media group, one digest email). A batch is flushed early once it holds
+    `max_batch` images; later images only increase its `suppressed` count.
+    At most `max_per_minute` batches are dispatched per minute over all
+    cameras, a batch due while the cap is reached waits for a free slot and
+    keeps collecting.
+    """
+
+    def __init__(self, dispatch: Callable[[str, list[str], int, dict], None],
+                 window: Optional[float] = None, max_batch: Optional[int] = None,
+                 max_per_minute: Optional[int] = None):
+        """Create an empty coalescer.
+
+        Args:
+            dispatch (Callable): Called as dispatch(cam_id, paths, suppressed, context) per batch.
+            window (Optional[float]): Coalescing window in seconds.
+            max_batch (Optional[int]): Images per batch (Telegram media groups hold up to 10).
+            max_per_minute (Optional[int]): Hard cap on dispatched batches per minute.
+        """
+        self.dispatch = dispatch
+        self.window = window or float(os.getenv("ALERT_WINDOW_SEC", 10))
+        self.max_batch = min(10, max_batch or int(os.getenv("ALERT_MAX_BATCH", 10)))
+        self.max_per_minute = max_per_minute or int(os.getenv("ALERT_MAX_PER_MINUTE", 20))
+        self.batches: Dict[str, AlertBatch] = {}
+        self.sent_at: Deque[float] = deque()
+        self.dispatched = 0
+        self.suppressed = 0
+
+    def add(self, cam_id: str, path: str, **context) -> None:
+        """Add a screenshot to the camera's open batch, opening one if needed.
+
+        Args:
+            cam_id (str): Camera ID.
+            path (str): Screenshot path.
+            **context: Channel settings of the camera (e.g. send_email, send_tg, chat_ids),
+                taken from the first alert of a batch.
+        """
+        batch = self.batches.get(cam_id)
+        if batch is None:
+            batch = self.batches[cam_id] = AlertBatch(cam_id, context)
+            self._schedule(batch, self.window)
+
+        if len(batch.paths) < self.max_batch:
+            batch.paths.append(path)
+            if len(batch.paths) == self.max_batch:
+                self._schedule(batch, 0)
+        else:
+            batch.suppressed += 1
+            self.suppressed += 1
+
+    def _schedule(self, batch: AlertBatch, delay: float) -> None:
+        if batch.timer is not None:
+            batch.timer.cancel()
+        batch.timer = asyncio.get_running_loop().call_later(delay, self._flush, batch.cam_id)
+
+    def _slot_wait(self, now: float) -> float:
+        """Seconds until another batch may be dispatched under the per-minute cap."""
+        while self.sent_at and now - self.sent_at[0] >= 60:
+            self.sent_at.popleft()
+        if len(self.sent_at) < self.max_per_minute:
+            return 0.0
+        return 60 - (now - self.sent_at[0])
+
+    def _flush(self, cam_id: str) -> None:
+        batch = self.batches.get(cam_id)
+        if batch is None:
+            return
+        now = time.monotonic()
+        wait = self._slot_wait(now)
+        if wait > 0:
+            self._schedule(batch, wait)
+            return
+
+        del self.batches[cam_id]
+        self.sent_at.append(now)
+        self.dispatched += 1
+        try:
+            self.dispatch(cam_id, batch.paths, batch.suppressed, batch.context)
+        except Exception as e:
+            logger.error(f"[ERROR] Failed to dispatch alerts for camera {cam_id}: {e}")
+
+    def flush_all(self) -> None:
+        """Dispatch every open batch now, ignoring the rate cap (used on shutdown)."""
+        for cam_id, batch in list(self.batches.items()):
+            if batch.timer is not None:
+                batch.timer.cancel()
+            del self.batches[cam_id]
+            self.dispatch(cam_id, batch.paths, batch.suppressed, batch.context)
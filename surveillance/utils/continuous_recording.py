@@ -0,0 +1,64 @@
+import asyncio
+import os
+from datetime import datetime, time as dt_time, timedelta
+from typing import Optional
+
+
+class ContinuousRecording:
+    """State of one camera's 24/7 recording split into wall-clock segments.
+
+    Segment boundaries are multiples of `segment_sec` counted from local
+    midnight (e.g. 12:00:00, 12:01:00, ... for 60 s), and a boundary always
+    falls on midnight, so a segment never spans two date folders.
+    """
+
+    def __init__(self, cam_id: str, segment_sec: Optional[int] = None):
+        """Create a recording that has not written any segment yet.
+
+        Args:
+            cam_id (str): Camera ID.
+            segment_sec (Optional[int]): Segment length in seconds.
+        """
+        self.cam_id = cam_id
+        self.segment_sec = segment_sec or int(os.getenv("RECORDING_SEGMENT_SEC", 60))
+        self.started_at = datetime.now()
+        self.segment_path: Optional[str] = None
+        self.segment_started_at: Optional[datetime] = None
+        self.next_rollover: Optional[float] = None
+        self.segments = 0
+        self.frames = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.stop_event = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def _midnight(self, now: float) -> datetime:
+        return datetime.combine(datetime.fromtimestamp(now).date(), dt_time())
+
+    def segment_start(self, now: float) -> float:
+        """Latest boundary at or before `now`."""
+        midnight = self._midnight(now)
+        elapsed = now - midnight.timestamp()
+        return midnight.timestamp() + (elapsed // self.segment_sec) * self.segment_sec
+
+    def next_boundary(self, now: float) -> float:
+        """First boundary after `now`, never later than the next midnight."""
+        midnight = self._midnight(now)
+        next_midnight = (midnight + timedelta(days=1)).timestamp()
+        return min(self.segment_start(now) + self.segment_sec, next_midnight)
+
+    def status(self) -> dict:
+        return {
+            "cam_id": self.cam_id,
+            "running": self.task is not None and not self.task.done(),
+            "started_at": self.started_at.isoformat(),
+            "segment_sec": self.segment_sec,
+            "segment_path": self.segment_path,
+            "segment_started_at": self.segment_started_at.isoformat() if self.segment_started_at else None,
+            "next_rollover": (datetime.fromtimestamp(self.next_rollover).isoformat()
+                              if self.next_rollover else None),
+            "segments": self.segments,
+            "frames": self.frames,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
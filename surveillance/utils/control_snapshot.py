@@ -0,0 +1,57 @@
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Optional
+
+
+class SnapshotCache:
+    """Cached result of a loader, dropped on invalidation or after `ttl` seconds.
+
+    Writers of the same process call `invalidate()` after every change, so
+    the page never shows stale data after a save; the short TTL only covers
+    changes made by other processes (the Telegram bot, other nodes).
+    Concurrent requests for an expired snapshot share one load, and a load
+    that was overtaken by an invalidation is returned but not cached.
+    """
+
+    def __init__(self, load: Callable[[], Awaitable], ttl: Optional[float] = None):
+        """Create an empty cache.
+
+        Args:
+            load (Callable): Coroutine function returning a fresh snapshot.
+            ttl (Optional[float]): Seconds a snapshot is served without invalidation.
+        """
+        self.load = load
+        self.ttl = ttl if ttl is not None else float(os.getenv("CONTROL_CACHE_TTL_SEC", 5))
+        self.value = None
+        self.loaded_at = 0.0
+        self.version = 0
+        self.hits = 0
+        self.loads = 0
+        self._pending: Optional[asyncio.Task] = None
+
+    async def get(self):
+        """Return the cached snapshot, loading it if it is missing or expired."""
+        if self.value is not None and time.monotonic() - self.loaded_at < self.ttl:
+            self.hits += 1
+            return self.value
+        if self._pending is None:
+            self._pending = asyncio.get_running_loop().create_task(self._load(self.version))
+        return await asyncio.shield(self._pending)
+
+    async def _load(self, version: int):
+        try:
+            value = await self.load()
+            self.loads += 1
+            if version == self.version:
+                self.value, self.loaded_at = value, time.monotonic()
+            return value
+        finally:
+            if version == self.version:
+                self._pending = None
+
+    def invalidate(self) -> None:
+        """Drop the snapshot, the next `get()` loads a new one."""
+        self.version += 1
+        self.value = None
+        self._pending = None
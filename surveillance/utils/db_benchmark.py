@@ -0,0 +1,121 @@
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from config.config import make_engine
+from surveillance.schemas.database import Model, DCamera, DRecording, DNotification
+from surveillance.utils.notification_outbox import notification_key
+
+
+async def run_workers(concurrency: int, jobs: int, job) -> float:
+    """Run `jobs` calls of `job(i)` on `concurrency` workers.
+
+    Returns:
+        float: Jobs per second.
+    """
+    counter = iter(range(jobs))
+
+    async def worker():
+        for i in counter:
+            await job(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return jobs / (time.perf_counter() - started)
+
+
+async def bench_config_writes(sessions, prefix: str, cameras: int, rounds: int, concurrency: int) -> float:
+    """Camera settings saved one by one, as the control panel does."""
+    async with sessions() as session:
+        await session.execute(insert(DCamera), [
+            {"path_to_cam": f"{prefix}/{i}", "status_cam": True, "visible_cam": True, "screen_cam": True,
+             "send_email": False, "send_tg": False, "send_video_tg": False}
+            for i in range(cameras)
+        ])
+        await session.commit()
+
+    async def save(i):
+        async with sessions() as session:
+            await session.execute(update(DCamera)
+                                  .where(DCamera.path_to_cam == f"{prefix}/{i % cameras}")
+                                  .values(send_tg=bool(i // cameras % 2)))
+            await session.commit()
+
+    return await run_workers(concurrency, cameras * rounds, save)
+
+
+async def bench_recording_writes(sessions, prefix: str, events: int, concurrency: int) -> float:
+    """Recordings indexed one per transaction, as the segment writers do."""
+    async def index(i):
+        async with sessions() as session:
+            await session.execute(insert(DRecording).values(
+                cam_id="1", path=f"{prefix}/{i}.mp4", size=1024, started_at=datetime.now(), kind="segment"))
+            await session.commit()
+
+    return await run_workers(concurrency, events, index)
+
+
+async def bench_outbox_writes(sessions, prefix: str, events: int, batch: int, concurrency: int) -> float:
+    """Alerts written in batches, as NotificationOutbox.flush() does."""
+    async def flush(i):
+        now = datetime.now()
+        rows = []
+        for j in range(batch):
+            payload = {"cam_id": "1", "path": f"{prefix}/{i}/{j}.jpg", "chat_ids": [1]}
+            rows.append({"key": notification_key("telegram_photo", payload), "kind": "telegram_photo",
+                         "payload": json.dumps(payload), "status": "sent", "available_at": now, "created_at": now})
+        async with sessions() as session:
+            await session.execute(insert(DNotification), rows)
+            await session.commit()
+
+    return await run_workers(concurrency, events // batch, flush) * batch
+
+
+async def main(url: str, cameras: int, rounds: int, events: int, batch: int, concurrency: int) -> None:
+    engine = make_engine(url)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    prefix = f"bench-{uuid.uuid4().hex[:8]}"
+    async with engine.begin() as conn:
+        await conn.run_sync(Model.metadata.create_all)
+        # The benchmark inserts visible cameras, which a live service would start serving
+        if (await conn.execute(select(func.count()).select_from(DCamera))).scalar():
+            await engine.dispose()
+            raise SystemExit(f"{engine.url.render_as_string(hide_password=True)} is not empty, use a scratch database")
+
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}, concurrency {concurrency}")
+    try:
+        rate = await bench_config_writes(sessions, prefix, cameras, rounds, concurrency)
+        print(f"Config writes:    {rate:10.0f} transactions/s ({cameras} cameras x {rounds} saves)")
+        rate = await bench_recording_writes(sessions, prefix, events, concurrency)
+        print(f"Recording writes: {rate:10.0f} rows/s ({events} rows, one per transaction)")
+        rate = await bench_outbox_writes(sessions, prefix, events, batch, concurrency)
+        print(f"Outbox writes:    {rate:10.0f} rows/s ({events} rows, {batch} per transaction)")
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(delete(DCamera).where(DCamera.path_to_cam.startswith(prefix)))
+            await conn.execute(delete(DRecording).where(DRecording.path.startswith(prefix)))
+            await conn.execute(delete(DNotification).where(DNotification.payload.contains(prefix)))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Config and event write throughput of the database")
+    parser.add_argument("--url", default=None,
+                        help="Empty scratch database, e.g. postgresql+asyncpg://postgres@localhost/bench "
+                             "(default: a temporary SQLite file)")
+    parser.add_argument("--cameras", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    url = args.url or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'db_benchmark.db')}"
+    asyncio.run(main(url, args.cameras, args.rounds, args.events, args.batch, args.concurrency))
@@ -0,0 +1,70 @@
+import os
+from collections import deque
+from typing import Deque, Optional
+
+
+class EventRecorder:
+    """Per-camera state machine that turns motion into one clip per event.
+
+    A clip is opened on the first motion, kept open while motion continues,
+    closed `post_roll` seconds after the last motion and never exceeds
+    `max_length` seconds. Motion during the post-roll merges into the
+    current clip instead of starting a new one.
+    """
+
+    IDLE = "idle"
+    RECORDING = "recording"
+
+    def __init__(self, cam_id: str, post_roll: Optional[float] = None,
+                 max_length: Optional[float] = None):
+        """Create an idle recorder.
+
+        Args:
+            cam_id (str): Camera ID.
+            post_roll (Optional[float]): Seconds to keep recording after the last motion.
+            max_length (Optional[float]): Hard cap on the clip length in seconds.
+        """
+        self.cam_id = cam_id
+        self.post_roll = (post_roll if post_roll is not None
+                          else float(os.getenv("EVENT_POST_ROLL", os.getenv("BOT_SEND_VIDEO", 5))))
+        self.max_length = max_length if max_length is not None else float(os.getenv("EVENT_MAX_LENGTH", 60))
+        self.state = self.IDLE
+        self.clip_path: Optional[str] = None
+        self.started_at = 0.0
+        self.last_motion = 0.0
+        self.completed: Deque[str] = deque(maxlen=16)
+
+    def motion(self, now: float) -> bool:
+        """Register motion at `now`.
+
+        Returns:
+            bool: True if a new clip has to be opened, False if the current one was extended.
+        """
+        if self.state == self.RECORDING:
+            self.last_motion = now
+            return False
+        self.state = self.RECORDING
+        self.started_at = now
+        self.last_motion = now
+        return True
+
+    def deadline(self) -> float:
+        """Wall-clock time at which the current clip has to be closed."""
+        return min(self.last_motion + self.post_roll, self.started_at + self.max_length)
+
+    def should_stop(self, now: float) -> bool:
+        return self.state == self.RECORDING and now >= self.deadline()
+
+    def finish(self, path: Optional[str]) -> None:
+        """Close the current event and publish the clip path if it was written."""
+        if path:
+            self.completed.append(path)
+        self.state = self.IDLE
+        self.clip_path = None
+
+    def pop_completed(self) -> Optional[str]:
+        """Return the oldest finished clip path, if any."""
+        try:
+            return self.completed.popleft()
+        except IndexError:
+            return None
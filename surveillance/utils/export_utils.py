@@ -0,0 +1,208 @@
+import asyncio
+import hashlib
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from logs.logging_config import get_logger
+
+logger = get_logger()
+
+base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+exports_dir = os.path.join(base_dir, "media", "exports")
+
+# Continuous footage; event clips and digests overlap it and are not exported
+CONTINUOUS_KINDS = ("segment", "timelapse")
+
+_exports: dict[str, asyncio.Task] = {}
+
+
+class ExportError(Exception):
+    """Raised when a time window cannot be exported.
+
+    Attributes:
+        status (int): HTTP status to answer with.
+    """
+
+    def __init__(self, message: str, status: int = 500):
+        super().__init__(message)
+        self.status = status
+
+
+def get_export_path(cam_id: str, start: datetime, end: datetime, rows) -> str:
+    """Path of the cached export of a window, exports are grouped by creation date.
+
+    The name includes a digest of the recordings it is cut from, so a window
+    that still grows (a segment closed or re-encoded since) gets a new
+    export instead of the cached partial one.
+    """
+    digest = hashlib.sha1(",".join(f"{row.id}:{row.size}:{row.tier}" for row in rows).encode()).hexdigest()[:10]
+    name = f"cam_{cam_id}_{start.strftime('%Y%m%d_%H%M%S')}_{end.strftime('%Y%m%d_%H%M%S')}_{digest}.mp4"
+    return os.path.join(exports_dir, datetime.now().strftime('%Y-%m-%d'), name)
+
+
+def _write_concat_list(list_path: str, paths: list[str]) -> None:
+    os.makedirs(os.path.dirname(list_path), exist_ok=True)
+    with open(list_path, "w") as f:
+        for path in paths:
+            escaped = path.replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+
+async def concat_recordings(paths: list[str], out_path: str, offset: Optional[float] = None,
+                            duration: Optional[float] = None) -> str:
+    """Join recordings into `out_path` with the ffmpeg concat demuxer and stream copy.
+
+    Args:
+        paths (list[str]): Absolute paths of the recordings, in playback order.
+        out_path (str): Destination file, written under a temporary name first.
+        offset (Optional[float]): Seconds to skip at the start, snapped to the preceding keyframe.
+        duration (Optional[float]): Length of the result in seconds.
+
+    Returns:
+        str: `out_path`.
+
+    Raises:
+        ExportError: ffmpeg is missing or failed.
+    """
+    seek = ["-ss", f"{offset:.3f}"] if offset is not None else []
+    limit = ["-t", f"{duration:.3f}"] if duration is not None else []
+    tmp_path = f"{out_path}.tmp.mp4"
+    list_path = f"{out_path}.txt"
+    await asyncio.to_thread(_write_concat_list, list_path, paths)
+
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-y", "-v", "error", "-nostdin",
+            "-f", "concat", "-safe", "0", *seek, "-i", list_path,
+            *limit, "-c", "copy", "-movflags", "+faststart", tmp_path,
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE,
+        )
+        _, stderr = await process.communicate()
+    except FileNotFoundError:
+        raise ExportError("ffmpeg is not installed")
+    finally:
+        await asyncio.to_thread(os.remove, list_path)
+
+    if process.returncode != 0:
+        if await asyncio.to_thread(os.path.exists, tmp_path):
+            await asyncio.to_thread(os.remove, tmp_path)
+        logger.error(f"[ERROR] Export {out_path} failed: {stderr.decode(errors='replace').strip()}")
+        raise ExportError("ffmpeg failed to join the recordings")
+
+    await asyncio.to_thread(os.replace, tmp_path, out_path)
+    logger.info(f"[INFO] Exported {len(paths)} recordings into {out_path}")
+    return out_path
+
+
+async def probe_duration(path: str) -> Optional[float]:
+    """Length of a recording in seconds read from its container, None if ffprobe cannot tell."""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+        )
+        stdout, _ = await process.communicate()
+        return float(stdout)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def window_on_timeline(rows, lengths: list[float], start: datetime, end: datetime):
+    """Locate a wall-clock window in the recordings joined back to back.
+
+    The concat demuxer drops the time between recordings (the camera was
+    offline, a segment failed), so the window is mapped through the length
+    of every recording instead of measured from the first one.
+
+    Args:
+        rows (List[DRecording]): Recordings ordered by start time.
+        lengths (list[float]): Seconds of footage in each recording.
+        start (datetime): Window start.
+        end (datetime): Window end.
+
+    Returns:
+        tuple: offset and duration in the joined file (None if nothing is covered),
+            and the (start, end) gaps of the window without footage.
+    """
+    offset = end_position = None
+    gaps = []
+    position = 0.0
+    covered_until = start
+    for row, length in zip(rows, lengths):
+        row_end = row.started_at + timedelta(seconds=length)
+        first, last = max(start, row.started_at), min(end, row_end)
+        if last > first:
+            if offset is None:
+                offset = position + (first - row.started_at).total_seconds()
+            end_position = position + (last - row.started_at).total_seconds()
+        if min(row.started_at, end) > covered_until:
+            gaps.append((covered_until, min(row.started_at, end)))
+        covered_until = max(covered_until, row_end)
+        position += length
+    if covered_until < end:
+        gaps.append((covered_until, end))
+    if offset is None:
+        return None, None, [(start, end)]
+    return offset, end_position - offset, gaps
+
+
+async def export_window(rows, start: datetime, end: datetime, out_path: str) -> str:
+    """Cut a time window out of indexed recordings without re-encoding.
+
+    The recordings are joined with the ffmpeg concat demuxer and copied
+    stream by stream, so the cut starts at the keyframe preceding `start`.
+    ffmpeg runs as an asyncio subprocess and the result is renamed into
+    place only when complete, so the event loop is never blocked and a
+    concurrent request never serves a partial file. Concurrent requests for
+    the same window share one export. Only continuous recordings are used,
+    event clips overlap them and would repeat the footage. Gaps between
+    recordings are skipped: the export is shorter than the window by the
+    time nothing was recorded.
+
+    Args:
+        rows (List[DRecording]): Recordings covering the window, ordered by start time.
+        start (datetime): Window start.
+        end (datetime): Window end.
+        out_path (str): Destination file, from `get_export_path()` of the same rows.
+
+    Returns:
+        str: `out_path`.
+
+    Raises:
+        ExportError: No recordings, mixed storage tiers or ffmpeg failure.
+    """
+    rows = [row for row in rows if row.kind in CONTINUOUS_KINDS]
+    if not rows:
+        raise ExportError("No recordings in the requested window", status=404)
+    if len({row.tier for row in rows}) > 1:
+        raise ExportError("Window spans recordings of different storage tiers", status=409)
+
+    if await asyncio.to_thread(os.path.exists, out_path):
+        return out_path
+    task = _exports.get(out_path)
+    if task is None:
+        task = _exports[out_path] = asyncio.get_running_loop().create_task(_run_export(rows, start, end, out_path))
+        task.add_done_callback(lambda _: _exports.pop(out_path, None))
+    return await asyncio.shield(task)
+
+
+async def _run_export(rows, start: datetime, end: datetime, out_path: str) -> str:
+    paths = [os.path.join(base_dir, row.path) for row in rows]
+    if any(row.kind == "timelapse" or row.tier == "timelapse" for row in rows):
+        # Decimated segments and keyframe-only tiers have no linear timeline, export them whole
+        return await concat_recordings(paths, out_path)
+
+    probed = await asyncio.gather(*(probe_duration(path) for path in paths))
+    # Without a readable duration a recording is assumed to last until the next one starts
+    next_starts = [row.started_at for row in rows[1:]] + [max(end, rows[-1].started_at)]
+    lengths = [length if length is not None else (next_start - row.started_at).total_seconds()
+               for row, length, next_start in zip(rows, probed, next_starts)]
+    offset, duration, gaps = window_on_timeline(rows, lengths, start, end)
+    if offset is None:
+        raise ExportError("No recordings in the requested window", status=404)
+    if gaps:
+        missing = sum((gap_end - gap_start).total_seconds() for gap_start, gap_end in gaps)
+        logger.warning(f"[WARNING] Export {out_path}: {len(gaps)} gaps, {missing:.0f} s of the window not recorded")
+
+    return await concat_recordings(paths, out_path, offset, duration)
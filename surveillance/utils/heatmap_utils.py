@@ -0,0 +1,137 @@
+import os
+import threading
+import time
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from logs.logging_config import get_logger
+
+logger = get_logger()
+
+HEATMAP_DIR = os.path.join("media", "heatmaps")
+
+
+def get_heatmap_size() -> Tuple[int, int]:
+    """Accumulator resolution (width, height) from HEATMAP_SIZE, e.g. "64,36"."""
+    width, height = map(int, os.getenv("HEATMAP_SIZE", "64,36").split(","))
+    return width, height
+
+
+class MotionHeatmap:
+    """Low-resolution activity accumulator for one camera.
+
+    Foreground masks are downscaled into a preallocated buffer and added to a
+    float32 accumulator in place, so `update()` does not allocate per frame.
+    The accumulator decays exponentially with the configured half-life.
+    Updates come from the detection executor threads while the persister
+    and the overlay endpoint read, so the buffers are guarded by a lock.
+    """
+
+    def __init__(self, cam_id: str, size: Optional[Tuple[int, int]] = None,
+                 half_life_sec: Optional[float] = None):
+        """Allocate accumulator and scratch buffers for a camera.
+
+        Args:
+            cam_id (str): Camera ID.
+            size (Optional[Tuple[int, int]]): Accumulator (width, height).
+            half_life_sec (Optional[float]): Time for the heat to halve.
+        """
+        self.cam_id = cam_id
+        self.width, self.height = size or get_heatmap_size()
+        self.half_life_sec = half_life_sec or float(os.getenv("HEATMAP_HALF_LIFE", 3600))
+        self.accumulator = np.zeros((self.height, self.width), dtype=np.float32)
+        self._small_mask = np.zeros((self.height, self.width), dtype=np.uint8)
+        self._small_float = np.zeros((self.height, self.width), dtype=np.float32)
+        self.last_update = time.time()
+        self._lock = threading.Lock()
+        self.load()
+
+    @property
+    def path(self) -> str:
+        return os.path.join(HEATMAP_DIR, f"camera_{self.cam_id}.npz")
+
+    def _decay(self, since: float, now: float) -> float:
+        """Factor the heat decays by between `since` and `now`."""
+        return 0.5 ** (max(now - since, 0.0) / self.half_life_sec)
+
+    def snapshot(self) -> Tuple[np.ndarray, float]:
+        """Copy of the accumulator with its last update time, taken under the lock."""
+        with self._lock:
+            return self.accumulator.copy(), self.last_update
+
+    def update(self, fg_mask: np.ndarray) -> None:
+        """Decay the accumulator and add the downscaled foreground mask.
+
+        Args:
+            fg_mask (np.ndarray): uint8 mask produced by the background subtractor.
+        """
+        with self._lock:
+            now = time.time()
+            decay = self._decay(self.last_update, now)
+            self.last_update = now
+
+            cv2.resize(fg_mask, (self.width, self.height), dst=self._small_mask,
+                       interpolation=cv2.INTER_AREA)
+            np.multiply(self._small_mask, 1.0 / 255.0, out=self._small_float, casting="unsafe")
+            np.multiply(self.accumulator, decay, out=self.accumulator, casting="unsafe")
+            np.add(self.accumulator, self._small_float, out=self.accumulator)
+
+    def render_overlay(self, width: int, height: int) -> Optional[bytes]:
+        """Render the heatmap as an RGBA PNG, alpha proportional to activity.
+
+        Colors are scaled to the peak at the last update and the heat is
+        decayed up to now, so the overlay of an idle camera fades out.
+
+        Args:
+            width (int): Output width in pixels.
+            height (int): Output height in pixels.
+
+        Returns:
+            Optional[bytes]: PNG data or None if encoding failed.
+        """
+        accumulator, last_update = self.snapshot()
+        peak = float(accumulator.max())
+        scale = 255.0 / peak if peak > 0 else 0.0
+        scale *= self._decay(last_update, time.time())
+        normalized = cv2.convertScaleAbs(accumulator, alpha=scale)
+        normalized = cv2.resize(normalized, (width, height), interpolation=cv2.INTER_LINEAR)
+
+        colored = cv2.applyColorMap(normalized, cv2.COLORMAP_JET)
+        overlay = cv2.cvtColor(colored, cv2.COLOR_BGR2BGRA)
+        overlay[:, :, 3] = normalized
+
+        ret, buf = cv2.imencode(".png", overlay)
+        if not ret:
+            return None
+        return buf.tobytes()
+
+    def save(self) -> None:
+        """Persist the accumulator and its update time atomically (temp file, then rename)."""
+        accumulator, last_update = self.snapshot()
+        os.makedirs(HEATMAP_DIR, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, accumulator=accumulator, last_update=np.float64(last_update))
+        os.replace(tmp_path, self.path)
+
+    def load(self) -> None:
+        """Restore a previously persisted accumulator if it matches the size.
+
+        The saved update time is kept, so the heat keeps decaying over the
+        time the service was down.
+        """
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path) as data:
+                accumulator = data["accumulator"]
+                last_update = float(data["last_update"])
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"[ERROR] Failed to load heatmap for {self.cam_id}: {e}")
+            return
+        if accumulator.shape == self.accumulator.shape:
+            with self._lock:
+                self.accumulator[:] = accumulator
+                self.last_update = min(last_update, time.time())
@@ -1,31 +1,26 @@
 import hashlib
-import sqlite3
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-name_db = os.getenv("DATABASE")
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from config.config import new_sync_session
+from surveillance.schemas.database import DUser
+
 password = hashlib.sha256(os.getenv("PASSWORD").encode()).hexdigest()
-user_info = ["user", f"{password}", "user"]
+user_info = {"user": "user", "password": password, "status": "user"}
 
 
 def insert_into_user():
     """Добавляем пользователя"""
-    user_table = "_user"
-    base_dir = os.path.dirname(
-        os.path.dirname(os.path.abspath(__file__)))
-    db_path = os.path.join(base_dir, f'{name_db}.db')
-    conn = sqlite3.connect(db_path)
     try:
-        sql = f'''INSERT INTO {user_table} (user, password, status) VALUES (?, ?, ?)'''
-        conn.execute(sql, user_info)
-        conn.commit()
-        print(f'Пользователь {user_info[0]} добавлен!')
-    except sqlite3.Error as e:
+        with new_sync_session() as session:
+            session.execute(insert(DUser).values(**user_info))
+            session.commit()
+        print(f'Пользователь {user_info["user"]} добавлен!')
+    except SQLAlchemyError as e:
         print(f'Ошибка при добавлении пользователя: {e}')
-    finally:
-        if conn:
-            conn.close()
 
 insert_into_user()
@@ -1,12 +1,11 @@
 import os
-import asyncio
 import hashlib
 import time
 from dotenv import load_dotenv
 from sqlalchemy.future import select
 from surveillance.schemas.database import Model, DUser, DFindCamera
 from logs.logging_config import get_logger
-from config.config import engine, new_session
+from config.config import engine, new_session, run_sync
 
 load_dotenv()
 logger = get_logger()
@@ -34,8 +33,8 @@ async def insert_into_user():
     """Adding a primary user"""
     async with new_session() as session:
         async with session.begin():
-            user_info["tg_id"] = os.getenv("TELEGRAM_CHAT_ID")
-            user_info["active"] = "1"
+            user_info["tg_id"] = int(os.getenv("TELEGRAM_CHAT_ID") or 0)
+            user_info["active"] = 1
             stmt = select(DUser).where(DUser.user == user_info["user"])
             result = await session.execute(stmt)
             if result.scalar():
@@ -59,8 +58,8 @@ async def insert_into_find_cam():
 
 
 if __name__ == "__main__":
-    asyncio.run(create_db())
+    run_sync(create_db())
     time.sleep(1)
-    asyncio.run(insert_into_user())
+    run_sync(insert_into_user())
     time.sleep(1)
-    asyncio.run(insert_into_find_cam())
+    run_sync(insert_into_find_cam())
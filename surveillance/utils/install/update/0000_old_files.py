@@ -1,8 +1,8 @@
-import asyncio
 import time
-from sqlalchemy import inspect, text
+from sqlalchemy import inspect, insert, text
 from logs.logging_config import get_logger
-from config.config import engine
+from config.config import engine, run_sync
+from surveillance.schemas.database import DOperationOldFiles
 
 logger = get_logger()
 
@@ -20,18 +20,8 @@ async def create_old_files_table():
             logger.info("[INFO] Table '_old_files' already exists!")
             return
 
-        await conn.execute(text("""
-            CREATE TABLE _old_files (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                weekly_recordings_cleanup BOOLEAN NOT NULL DEFAULT 0,
-                old_logs_cleanup BOOLEAN NOT NULL DEFAULT 0
-            )
-        """))
-
-        await conn.execute(text("""
-            INSERT INTO _old_files (weekly_recordings_cleanup, old_logs_cleanup) 
-            VALUES (0, 0)
-        """))
+        await conn.run_sync(lambda sync_conn: DOperationOldFiles.__table__.create(sync_conn))
+        await conn.execute(insert(DOperationOldFiles).values(weekly_recordings_cleanup=False, old_logs_cleanup=False))
 
         logger.info("[INFO] Table '_old_files' created successfully with default values!")
 
@@ -39,17 +29,20 @@ async def create_old_files_table():
 async def verify_table():
     """Verify that table was created correctly"""
     async with engine.connect() as conn:
-        result = await conn.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name='_old_files'"))
-        row = result.first()
+        def table_columns(sync_conn):
+            inspector = inspect(sync_conn)
+            if '_old_files' not in inspector.get_table_names():
+                return None
+            return inspector.get_columns('_old_files')
+
+        columns = await conn.run_sync(table_columns)
 
-        if row:
+        if columns is not None:
             logger.info("[INFO] Table '_old_files' exists")
 
-            result = await conn.execute(text("PRAGMA table_info(_old_files)"))
-            columns = result.fetchall()
             logger.info("[INFO] Table structure:")
             for col in columns:
-                logger.info(f"  - {col[1]} ({col[2]})")
+                logger.info(f"  - {col['name']} ({col['type']})")
 
             result = await conn.execute(text("SELECT COUNT(*) FROM _old_files"))
             count = result.scalar()
@@ -63,9 +56,9 @@ if __name__ == "__main__":
     logger.info("Creating _old_files table...")
     logger.info("=" * 50)
 
-    asyncio.run(create_old_files_table())
+    run_sync(create_old_files_table())
     time.sleep(1)
-    asyncio.run(verify_table())
+    run_sync(verify_table())
 
     logger.info("=" * 50)
     logger.info("Done!")
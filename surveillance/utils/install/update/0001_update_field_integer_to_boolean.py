@@ -1,8 +1,7 @@
-import asyncio
 import time
 from sqlalchemy import inspect, text
 from logs.logging_config import get_logger
-from config.config import engine
+from config.config import engine, is_sqlite, run_sync
 
 logger = get_logger()
 
@@ -10,6 +9,10 @@ logger = get_logger()
 async def fix_send_video_tg_column():
     """Change send_video_tg column from INTEGER to BOOLEAN"""
 
+    if not is_sqlite():
+        logger.info("[INFO] Only SQLite databases created by old versions need this fix")
+        return
+
     async with engine.begin() as conn:
         def table_exists(sync_conn):
             inspector = inspect(sync_conn)
@@ -104,14 +107,13 @@ async def verify_fix():
     """Verify that column was fixed correctly"""
 
     async with engine.connect() as conn:
-        result = await conn.execute(text("PRAGMA table_info(_camera)"))
-        columns = result.fetchall()
+        columns = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_columns('_camera'))
 
         logger.info("[INFO] Current _camera table structure:")
         send_video_tg_found = False
         for col in columns:
-            col_name = col[1]
-            col_type = col[2]
+            col_name = col['name']
+            col_type = str(col['type'])
             logger.info(f"  - {col_name} ({col_type})")
 
             if col_name == 'send_video_tg':
@@ -130,9 +132,9 @@ if __name__ == "__main__":
     logger.info("Fixing send_video_tg column type (INTEGER -> BOOLEAN)")
     logger.info("=" * 60)
 
-    asyncio.run(fix_send_video_tg_column())
+    run_sync(fix_send_video_tg_column())
     time.sleep(1)
-    asyncio.run(verify_fix())
+    run_sync(verify_fix())
 
     logger.info("=" * 60)
     logger.info("Done!")
@@ -0,0 +1,98 @@
+import os
+import re
+import time
+from datetime import datetime
+from sqlalchemy import inspect, text, insert
+from logs.logging_config import get_logger
+from config.config import engine, base_dir, run_sync
+from surveillance.schemas.database import DRecording
+
+logger = get_logger()
+
+recordings_dir = os.path.join(base_dir, "media", "recordings")
+FILENAME_PATTERN = re.compile(r"_(\d{8}_\d{6})\.mp4$")
+
+
+async def create_recordings_table():
+    """Create _recording table if it doesn't exist"""
+    async with engine.begin() as conn:
+        def table_exists(sync_conn):
+            inspector = inspect(sync_conn)
+            return '_recording' in inspector.get_table_names()
+
+        exists = await conn.run_sync(table_exists)
+
+        if exists:
+            logger.info("[INFO] Table '_recording' already exists!")
+            return
+
+        await conn.run_sync(lambda sync_conn: DRecording.__table__.create(sync_conn))
+        logger.info("[INFO] Table '_recording' created successfully!")
+
+
+def collect_existing_recordings():
+    """Walk media/recordings/<date>/<cam_id>/ once and collect files for the index"""
+    rows = []
+    if not os.path.isdir(recordings_dir):
+        return rows
+
+    for date_entry in os.scandir(recordings_dir):
+        if not date_entry.is_dir():
+            continue
+        for cam_entry in os.scandir(date_entry.path):
+            if not cam_entry.is_dir():
+                continue
+            for file_entry in os.scandir(cam_entry.path):
+                if not file_entry.is_file() or not file_entry.name.endswith(".mp4") \
+                        or file_entry.name.endswith(".part.mp4"):
+                    continue
+                stat = file_entry.stat()
+                match = FILENAME_PATTERN.search(file_entry.name)
+                if match:
+                    started_at = datetime.strptime(match.group(1), "%Y%m%d_%H%M%S")
+                else:
+                    started_at = datetime.fromtimestamp(stat.st_mtime)
+                rows.append({
+                    "cam_id": cam_entry.name,
+                    "path": os.path.relpath(file_entry.path, base_dir),
+                    "size": stat.st_size,
+                    "started_at": started_at,
+                    "kind": "segment",
+                })
+    return rows
+
+
+async def backfill_recordings():
+    """Index recordings written before the table existed"""
+    rows = collect_existing_recordings()
+    async with engine.begin() as conn:
+        result = await conn.execute(text("SELECT path FROM _recording"))
+        known = {row[0] for row in result.fetchall()}
+        new_rows = [row for row in rows if row["path"] not in known]
+        if new_rows:
+            await conn.execute(insert(DRecording), new_rows)
+    logger.info(f"[INFO] Indexed {len(new_rows)} existing recordings")
+
+
+async def verify_table():
+    """Verify that table was created correctly"""
+    async with engine.connect() as conn:
+        result = await conn.execute(text("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM _recording"))
+        count, total = result.first()
+        logger.info(f"[INFO] Records in '_recording': {count}, total size: {total} bytes")
+
+
+if __name__ == "__main__":
+    logger.info("=" * 50)
+    logger.info("Creating _recording table...")
+    logger.info("=" * 50)
+
+    run_sync(create_recordings_table())
+    time.sleep(1)
+    run_sync(backfill_recordings())
+    time.sleep(1)
+    run_sync(verify_table())
+
+    logger.info("=" * 50)
+    logger.info("Done!")
+    logger.info("=" * 50)
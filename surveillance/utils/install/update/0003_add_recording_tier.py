@@ -0,0 +1,56 @@
+import time
+from sqlalchemy import inspect, text
+from logs.logging_config import get_logger
+from config.config import engine, run_sync
+
+logger = get_logger()
+
+
+async def add_tier_column():
+    """Add tier column to _recording table"""
+
+    async with engine.begin() as conn:
+        def table_exists(sync_conn):
+            inspector = inspect(sync_conn)
+            return '_recording' in inspector.get_table_names()
+
+        exists = await conn.run_sync(table_exists)
+
+        if not exists:
+            logger.error("[ERROR] Table '_recording' does not exist! Run 0002_create_recordings_table first")
+            return
+
+        columns = await conn.run_sync(
+            lambda sync_conn: [col['name'] for col in inspect(sync_conn).get_columns('_recording')])
+
+        if 'tier' in columns:
+            logger.info("[INFO] Column 'tier' already exists")
+            return
+
+        await conn.execute(text(
+            "ALTER TABLE _recording ADD COLUMN tier VARCHAR(20) NOT NULL DEFAULT 'original'"
+        ))
+        logger.info("[INFO] Column 'tier' added to '_recording'")
+
+
+async def verify_column():
+    """Verify that column was added correctly"""
+
+    async with engine.connect() as conn:
+        result = await conn.execute(text("SELECT tier, COUNT(*) FROM _recording GROUP BY tier"))
+        for tier, count in result.fetchall():
+            logger.info(f"[INFO] Tier '{tier}': {count} recordings")
+
+
+if __name__ == "__main__":
+    logger.info("=" * 50)
+    logger.info("Adding tier column to _recording...")
+    logger.info("=" * 50)
+
+    run_sync(add_tier_column())
+    time.sleep(1)
+    run_sync(verify_column())
+
+    logger.info("=" * 50)
+    logger.info("Done!")
+    logger.info("=" * 50)
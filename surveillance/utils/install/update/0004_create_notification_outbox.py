@@ -0,0 +1,49 @@
+import time
+from sqlalchemy import inspect, text
+from logs.logging_config import get_logger
+from config.config import engine, run_sync
+from surveillance.schemas.database import DNotification
+
+logger = get_logger()
+
+
+async def create_outbox_table():
+    """Create _notification_outbox table if it doesn't exist"""
+    async with engine.begin() as conn:
+        def table_exists(sync_conn):
+            inspector = inspect(sync_conn)
+            return '_notification_outbox' in inspector.get_table_names()
+
+        exists = await conn.run_sync(table_exists)
+
+        if exists:
+            logger.info("[INFO] Table '_notification_outbox' already exists!")
+            return
+
+        await conn.run_sync(lambda sync_conn: DNotification.__table__.create(sync_conn))
+        logger.info("[INFO] Table '_notification_outbox' created successfully!")
+
+
+async def verify_table():
+    """Verify that table was created correctly"""
+    async with engine.connect() as conn:
+        result = await conn.execute(text("SELECT status, COUNT(*) FROM _notification_outbox GROUP BY status"))
+        rows = result.fetchall()
+        if not rows:
+            logger.info("[INFO] Table '_notification_outbox' is empty")
+        for status, count in rows:
+            logger.info(f"[INFO] Notifications '{status}': {count}")
+
+
+if __name__ == "__main__":
+    logger.info("=" * 50)
+    logger.info("Creating _notification_outbox table...")
+    logger.info("=" * 50)
+
+    run_sync(create_outbox_table())
+    time.sleep(1)
+    run_sync(verify_table())
+
+    logger.info("=" * 50)
+    logger.info("Done!")
+    logger.info("=" * 50)
@@ -0,0 +1,95 @@
+import time
+from sqlalchemy import inspect, select, text, update
+from logs.logging_config import get_logger
+from config.config import engine, run_sync
+from surveillance.schemas.database import DCamera, DUser
+
+logger = get_logger()
+
+# Created by an earlier revision of this update, `user` is unique on its own
+REDUNDANT_INDEXES = {"_user": ["ix__user_user_password"]}
+
+
+async def create_indexes():
+    """Create the indexes of _user and _camera that don't exist yet, drop the redundant ones"""
+    async with engine.begin() as conn:
+        def missing_indexes(sync_conn):
+            inspector = inspect(sync_conn)
+            missing, redundant = [], []
+            for table in (DUser.__table__, DCamera.__table__):
+                existing = {index['name'] for index in inspector.get_indexes(table.name)}
+                missing.extend(index for index in table.indexes if index.name not in existing)
+                redundant.extend(name for name in REDUNDANT_INDEXES.get(table.name, []) if name in existing)
+            return missing, redundant
+
+        indexes, redundant = await conn.run_sync(missing_indexes)
+        for name in redundant:
+            await conn.execute(text(f"DROP INDEX {name}"))
+            logger.info(f"[INFO] Redundant index '{name}' dropped")
+        if not indexes:
+            logger.info("[INFO] Indexes already exist")
+            return
+
+        for index in indexes:
+            await conn.run_sync(index.create)
+            logger.info(f"[INFO] Index '{index.name}' created")
+
+
+async def add_zone_column():
+    """Add zone column to _camera and fill it from the coordinate strings"""
+    async with engine.begin() as conn:
+        columns = await conn.run_sync(
+            lambda sync_conn: [col['name'] for col in inspect(sync_conn).get_columns('_camera')])
+
+        if 'zone' in columns:
+            logger.info("[INFO] Column 'zone' already exists")
+            return
+
+        await conn.execute(text(f"ALTER TABLE _camera ADD COLUMN zone {DCamera.zone.type.compile(conn.dialect)}"))
+        logger.info("[INFO] Column 'zone' added to '_camera'")
+
+        result = await conn.execute(select(
+            DCamera.id, DCamera.coordinate_x1, DCamera.coordinate_x2, DCamera.coordinate_y1, DCamera.coordinate_y2))
+        filled = 0
+        for cam_id, *coordinates in result.fetchall():
+            try:
+                zone = [[int(value) for value in coord_str.split(',')] for coord_str in coordinates]
+            except (AttributeError, ValueError):
+                logger.error(f"[ERROR] Camera {cam_id}: coordinates {coordinates} are not valid, zone left empty")
+                continue
+            await conn.execute(update(DCamera).where(DCamera.id == cam_id).values(zone=zone))
+            filled += 1
+        logger.info(f"[INFO] Zone filled for {filled} cameras")
+
+
+async def verify_migration():
+    """Verify that indexes and column were added correctly"""
+    async with engine.connect() as conn:
+        def describe(sync_conn):
+            inspector = inspect(sync_conn)
+            indexes = [index['name'] for table in ('_user', '_camera') for index in inspector.get_indexes(table)]
+            columns = [col['name'] for col in inspector.get_columns('_camera')]
+            return indexes, columns
+
+        indexes, columns = await conn.run_sync(describe)
+        logger.info(f"[INFO] Indexes: {', '.join(sorted(indexes))}")
+        if 'zone' in columns:
+            logger.info("[INFO] ✓ _camera has column 'zone'")
+        else:
+            logger.error("[ERROR] Column 'zone' not found!")
+
+
+if __name__ == "__main__":
+    logger.info("=" * 50)
+    logger.info("Adding indexes and zone column...")
+    logger.info("=" * 50)
+
+    run_sync(create_indexes())
+    time.sleep(1)
+    run_sync(add_zone_column())
+    time.sleep(1)
+    run_sync(verify_migration())
+
+    logger.info("=" * 50)
+    logger.info("Done!")
+    logger.info("=" * 50)
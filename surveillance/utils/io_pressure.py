@@ -0,0 +1,43 @@
+import os
+from typing import Optional
+
+import redis
+
+from logs.logging_config import get_logger
+
+logger = get_logger()
+
+WRITE_LATENCY_KEY = "surveillance:recording_write_latency_ms"
+
+_client: Optional[redis.Redis] = None
+
+
+def get_redis() -> redis.Redis:
+    """Shared Redis client (the one Celery already uses as broker)."""
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+                                       socket_timeout=1, socket_connect_timeout=1)
+    return _client
+
+
+def publish_write_latency(latency_ms: float, ttl: int = 10) -> None:
+    """Publish the current recording write latency for other processes.
+
+    Args:
+        latency_ms (float): Worst write latency of active recordings in milliseconds.
+        ttl (int): Seconds after which the value expires.
+    """
+    try:
+        get_redis().set(WRITE_LATENCY_KEY, f"{latency_ms:.2f}", ex=ttl)
+    except redis.RedisError as e:
+        logger.debug(f"[DEBUG] Could not publish write latency: {e}")
+
+
+def get_write_latency() -> Optional[float]:
+    """Latest published recording write latency in milliseconds, None if unknown."""
+    try:
+        value = get_redis().get(WRITE_LATENCY_KEY)
+    except redis.RedisError:
+        return None
+    return float(value) if value is not None else None
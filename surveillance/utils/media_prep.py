@@ -0,0 +1,168 @@
+import os
+import re
+import shutil
+import subprocess
+import threading
+from datetime import datetime
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from logs.logging_config import get_logger
+
+logger = get_logger()
+
+base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+alerts_dir = os.path.join(base_dir, "media", "alerts")
+
+# Prepared clip path -> (lock, number of callers holding or waiting for it)
+_clip_locks: dict[str, tuple[threading.Lock, int]] = {}
+_clip_locks_guard = threading.Lock()
+
+# Marker next to a prepared path: the source clip is already smaller than a re-encode
+ORIGINAL_MARKER = ".original"
+
+_SOURCE_DATE = re.compile(r"_(\d{8})_\d{6}")
+
+
+class MediaPrepPolicy:
+    """Size and quality of the media attached to notifications.
+
+    Attributes:
+        max_width (int): Maximum width of alert images and clips.
+        max_height (int): Maximum height of alert images and clips.
+        jpeg_quality (int): JPEG quality of alert images.
+        crop (bool): Crop alert images to the detected object.
+        crop_margin (float): Margin around the object, as a fraction of its size.
+        video_crf (int): x264 constant rate factor of alert clips.
+        video_preset (str): x264 preset of alert clips.
+    """
+
+    def __init__(self):
+        self.max_width = int(os.getenv("ALERT_MAX_WIDTH", 1280))
+        self.max_height = int(os.getenv("ALERT_MAX_HEIGHT", 720))
+        self.jpeg_quality = int(os.getenv("ALERT_JPEG_QUALITY", 80))
+        self.crop = os.getenv("ALERT_CROP_TO_OBJECT", "false").lower() == "true"
+        self.crop_margin = float(os.getenv("ALERT_CROP_MARGIN", 0.5))
+        self.video_crf = int(os.getenv("ALERT_VIDEO_CRF", 28))
+        self.video_preset = os.getenv("ALERT_VIDEO_PRESET", "veryfast")
+
+
+def get_alert_path(cam_id: str, source_path: str, ext: str) -> str:
+    """Path of the prepared copy of a screenshot or clip, grouped by date for retention.
+
+    The folder is the date in the source file name (YYYYMMDD_HHMMSS), so a
+    clip prepared again after midnight finds its cached copy.
+    """
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    match = _SOURCE_DATE.search(stem)
+    try:
+        day = datetime.strptime(match.group(1), "%Y%m%d") if match else datetime.now()
+    except ValueError:
+        day = datetime.now()
+    return os.path.join(alerts_dir, day.strftime('%Y-%m-%d'), f"camera_{cam_id}_{stem}{ext}")
+
+
+def crop_to_box(frame: np.ndarray, box: tuple[int, int, int, int], margin: float) -> np.ndarray:
+    """Cut the object's bounding box, grown by `margin` on every side, out of a frame."""
+    x, y, w, h = box
+    frame_h, frame_w = frame.shape[:2]
+    dx, dy = int(w * margin), int(h * margin)
+    x1, y1 = max(0, x - dx), max(0, y - dy)
+    x2, y2 = min(frame_w, x + w + dx), min(frame_h, y + h + dy)
+    if x2 - x1 < 2 or y2 - y1 < 2:
+        return frame
+    return frame[y1:y2, x1:x2]
+
+
+def fit_frame(frame: np.ndarray, max_width: int, max_height: int) -> np.ndarray:
+    """Downscale a frame to fit into max_width x max_height, never upscale."""
+    height, width = frame.shape[:2]
+    scale = min(max_width / width, max_height / height)
+    if scale >= 1:
+        return frame
+    size = (max(1, int(width * scale)), max(1, int(height * scale)))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+
+def prepare_image(frame: np.ndarray, policy: MediaPrepPolicy,
+                  box: Optional[tuple[int, int, int, int]] = None) -> Optional[bytes]:
+    """Encode the alert JPEG of a frame: optionally cropped to the object, downscaled, recompressed."""
+    if policy.crop and box is not None:
+        frame = crop_to_box(frame, box, policy.crop_margin)
+    frame = fit_frame(frame, policy.max_width, policy.max_height)
+    ret, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, policy.jpeg_quality])
+    return buf.tobytes() if ret else None
+
+
+def build_clip_command(policy: MediaPrepPolicy, source_path: str, out_path: str) -> list[str]:
+    scale = (f"scale='min({policy.max_width},iw)':'min({policy.max_height},ih)'"
+             f":force_original_aspect_ratio=decrease:force_divisible_by=2")
+    return ["ffmpeg", "-y", "-v", "error", "-nostdin", "-i", source_path,
+            "-vf", scale, "-c:v", "libx264", "-preset", policy.video_preset, "-crf", str(policy.video_crf),
+            "-pix_fmt", "yuv420p", "-an", "-movflags", "+faststart", out_path]
+
+
+def prepare_clip(cam_id: str, source_path: str, policy: Optional[MediaPrepPolicy] = None) -> str:
+    """Re-encode an event clip to H.264 for upload, once per clip.
+
+    The prepared clip is cached under media/alerts, so every channel and
+    every retry uploads the same file. Concurrent calls for one clip wait
+    for a single encode. If ffmpeg is missing or fails, or the result is not
+    smaller, the original clip is used; the latter is remembered with a
+    marker file, so the clip is not encoded again.
+
+    Args:
+        cam_id (str): Camera ID.
+        source_path (str): Finished mp4 clip.
+        policy (Optional[MediaPrepPolicy]): Encoding settings.
+
+    Returns:
+        str: Path of the file to upload.
+    """
+    out_path = get_alert_path(cam_id, source_path, ".mp4")
+    with _clip_locks_guard:
+        lock, users = _clip_locks.get(out_path, (None, 0))
+        lock = lock or threading.Lock()
+        _clip_locks[out_path] = (lock, users + 1)
+
+    try:
+        with lock:
+            return _prepare_clip(source_path, out_path, policy or MediaPrepPolicy())
+    finally:
+        with _clip_locks_guard:
+            lock, users = _clip_locks[out_path]
+            if users > 1:
+                _clip_locks[out_path] = (lock, users - 1)
+            else:
+                del _clip_locks[out_path]
+
+
+def _prepare_clip(source_path: str, out_path: str, policy: MediaPrepPolicy) -> str:
+    if os.path.exists(out_path):
+        return out_path
+    marker_path = out_path + ORIGINAL_MARKER
+    if os.path.exists(marker_path):
+        return source_path
+    if not os.path.exists(source_path) or shutil.which("ffmpeg") is None:
+        return source_path
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp_path = f"{out_path}.tmp.mp4"
+    command = build_clip_command(policy, source_path, tmp_path)
+    try:
+        subprocess.run(command, check=True, capture_output=True, timeout=300)
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+        stderr = getattr(e, "stderr", b"") or b""
+        logger.error(f"[ERROR] Failed to prepare clip {source_path}: {stderr.decode(errors='replace').strip()}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return source_path
+
+    if os.path.getsize(tmp_path) >= os.path.getsize(source_path):
+        os.remove(tmp_path)
+        open(marker_path, "wb").close()
+        return source_path
+    os.replace(tmp_path, out_path)
+    return out_path
@@ -0,0 +1,62 @@
+import os
+from typing import Optional
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Decides which frames of a continuous recording are written.
+
+    During motion every frame passes; while the scene is idle only one frame
+    every `idle_interval` seconds does, so quiet hours turn into a timelapse.
+    Motion is detected on a small grayscale copy of the frame by frame
+    differencing, which keeps the gate cheap enough for the recording loop
+    and independent of whether anybody watches the live stream. Detections
+    of the streaming pipeline can be fed in through `mark_motion()`.
+    """
+
+    def __init__(self, idle_interval: Optional[float] = None, hold: Optional[float] = None,
+                 threshold: Optional[float] = None, width: int = 160):
+        """Create a gate that starts idle.
+
+        Args:
+            idle_interval (Optional[float]): Seconds between written frames while idle.
+            hold (Optional[float]): Seconds full rate is kept after the last motion.
+            threshold (Optional[float]): Fraction of changed pixels that counts as motion.
+            width (int): Width of the downscaled copy used for differencing.
+        """
+        self.idle_interval = (idle_interval if idle_interval is not None
+                              else float(os.getenv("RECORDING_IDLE_INTERVAL", 1.0)))
+        self.hold = hold if hold is not None else float(os.getenv("RECORDING_MOTION_HOLD", 5.0))
+        self.threshold = (threshold if threshold is not None
+                          else float(os.getenv("RECORDING_MOTION_THRESHOLD", 0.01)))
+        self.width = width
+        self.last_motion = float("-inf")
+        self.last_written = float("-inf")
+        self.skipped = 0
+        self._previous: Optional[np.ndarray] = None
+
+    def mark_motion(self, now: float) -> None:
+        """Report motion detected elsewhere (e.g. by the streaming pipeline)."""
+        self.last_motion = max(self.last_motion, now)
+
+    def _has_motion(self, frame: np.ndarray) -> bool:
+        height = max(1, frame.shape[0] * self.width // frame.shape[1])
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_NEAREST)
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+        previous, self._previous = self._previous, gray
+        if previous is None or previous.shape != gray.shape:
+            return False
+        changed = cv2.countNonZero(cv2.threshold(cv2.absdiff(gray, previous), 25, 255, cv2.THRESH_BINARY)[1])
+        return changed > self.threshold * gray.size
+
+    def should_write(self, frame: np.ndarray, now: float) -> bool:
+        """Return True if the frame belongs into the recording."""
+        if self._has_motion(frame):
+            self.last_motion = now
+        if now - self.last_motion <= self.hold or now - self.last_written >= self.idle_interval:
+            self.last_written = now
+            return True
+        self.skipped += 1
+        return False
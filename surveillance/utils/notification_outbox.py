@@ -0,0 +1,145 @@
+import asyncio
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Callable, Optional
+
+from logs.logging_config import get_logger
+from surveillance.schemas.repository import Notifications
+
+logger = get_logger()
+
+
+def notification_key(kind: str, payload: dict) -> str:
+    """Idempotency key of an alert: the same delivery raised twice is stored once."""
+    data = json.dumps([kind, payload], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class NotificationOutbox:
+    """Batched writer of alerts into the SQLite outbox.
+
+    `put()` only appends to an in-memory list, so the streaming and
+    recording code never waits for the database or Redis. A background task
+    writes the list in one transaction every `flush_interval` seconds and
+    then calls `kick` in a thread to wake the notification worker; if the
+    kick fails (Redis down), the worker's periodic drain delivers the
+    alerts later. Alerts that could not be written stay in memory, up to
+    `max_pending`, and are written with the next batch.
+    """
+
+    def __init__(self, kick: Optional[Callable[[set[str]], None]] = None, flush_interval: Optional[float] = None,
+                 max_pending: Optional[int] = None):
+        """Create an idle writer, `start()` launches its background task.
+
+        Args:
+            kick (Optional[Callable]): Blocking call asking the notification workers to drain the outbox,
+                called with the delivery kinds just written.
+            flush_interval (Optional[float]): Seconds between batched writes.
+            max_pending (Optional[int]): Alerts kept in memory while the database is unavailable.
+        """
+        self.kick = kick
+        self.flush_interval = flush_interval or float(os.getenv("OUTBOX_FLUSH_SEC", 0.5))
+        self.max_pending = max_pending or int(os.getenv("OUTBOX_MAX_PENDING", 10000))
+        self.pending: list[dict] = []
+        self.written = 0
+        self.dropped = 0
+        self._wake = asyncio.Event()
+        self._flushing = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._kicking = False
+        self._kick_kinds: set[str] = set()
+
+    def put(self, kind: str, **payload) -> None:
+        """Queue an alert for the next batch.
+
+        Args:
+            kind (str): Delivery kind (email_screenshots, telegram_album, telegram_photo, telegram_video).
+            **payload: JSON-serializable arguments of the delivery.
+        """
+        now = datetime.now()
+        self.pending.append({
+            "key": notification_key(kind, payload),
+            "kind": kind,
+            "payload": json.dumps(payload),
+            "available_at": now,
+            "created_at": now,
+        })
+        if len(self.pending) > self.max_pending:
+            del self.pending[0]
+            self.dropped += 1
+            logger.error("[ERROR] Notification outbox is full, dropped the oldest alert")
+        self._wake.set()
+
+    async def flush(self) -> int:
+        """Write all queued alerts in one transaction.
+
+        Returns:
+            int: Number of alerts written.
+        """
+        async with self._flushing:
+            rows, self.pending = self.pending, []
+            if not rows:
+                return 0
+            if not await Notifications.insert_many(rows):
+                self.pending = rows + self.pending
+                return 0
+        self.written += len(rows)
+        self._kick({row["kind"] for row in rows})
+        return len(rows)
+
+    def _kick(self, kinds: set[str]) -> None:
+        if self.kick is None:
+            return
+        self._kick_kinds |= kinds
+        if self._kicking:
+            return
+
+        async def kick():
+            try:
+                while self._kick_kinds:
+                    pending_kinds, self._kick_kinds = self._kick_kinds, set()
+                    await asyncio.to_thread(self.kick, pending_kinds)
+            except Exception as e:
+                logger.warning(f"[WARNING] Could not wake the notification workers: {e}")
+            finally:
+                self._kicking = False
+
+        self._kicking = True
+        asyncio.get_running_loop().create_task(kick())
+
+    async def _run(self) -> None:
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            await asyncio.sleep(self.flush_interval)
+            try:
+                written = await self.flush()
+            except Exception as e:
+                written = 0
+                logger.error(f"[ERROR] Notification outbox flush failed: {e}")
+            if self.pending:
+                if not written:
+                    await asyncio.sleep(5)
+                self._wake.set()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background task and write what is still queued.
+
+        The task is cancelled only between flushes, a batch being written is
+        never lost half way.
+        """
+        if self._task is not None:
+            async with self._flushing:
+                self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
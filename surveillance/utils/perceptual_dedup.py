@@ -0,0 +1,77 @@
+import os
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+
+def dhash(frame: np.ndarray) -> int:
+    """64-bit difference hash of a frame.
+
+    The frame is sampled down to 144x128 (nearest neighbour, so the cost
+    does not depend on the resolution), then area-averaged to a 9x8
+    grayscale thumbnail, which averages sensor noise out; each bit tells
+    whether a pixel is brighter than its left neighbour. About 80 us.
+    """
+    small = cv2.resize(frame, (144, 128), interpolation=cv2.INTER_NEAREST)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    tiny = cv2.resize(small, (9, 8), interpolation=cv2.INTER_AREA)
+    return int.from_bytes(np.packbits(tiny[:, 1:] > tiny[:, :-1]).tobytes(), "big")
+
+
+class PerceptualDeduplicator:
+    """Per-camera index of recently alerted screenshots.
+
+    A screenshot whose hash is within `threshold` bits of a hash alerted in
+    the last `ttl` seconds is a near-duplicate (a swaying tree, a flickering
+    light) and is suppressed. Every camera keeps at most `max_entries`
+    hashes; the least recently matched one is evicted first, expired ones
+    on every lookup.
+    """
+
+    def __init__(self, threshold: Optional[int] = None, ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None):
+        """Create an empty index.
+
+        Args:
+            threshold (Optional[int]): Maximum Hamming distance of a near-duplicate (0-64).
+            ttl (Optional[float]): Seconds a hash suppresses near-duplicates.
+            max_entries (Optional[int]): Hashes kept per camera.
+        """
+        self.threshold = threshold if threshold is not None else int(os.getenv("ALERT_DEDUP_HAMMING", 4))
+        self.ttl = ttl if ttl is not None else float(os.getenv("ALERT_DEDUP_TTL_SEC", 300))
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("ALERT_DEDUP_MAX_HASHES", 32))
+        self.hashes: Dict[str, OrderedDict[int, float]] = defaultdict(OrderedDict)
+        self.suppressed: Dict[str, int] = defaultdict(int)
+
+    def is_duplicate(self, cam_id: str, frame_hash: int, now: Optional[float] = None) -> bool:
+        """Check a screenshot against the camera's index and remember it if it is new.
+
+        Args:
+            cam_id (str): Camera ID.
+            frame_hash (int): dhash() of the screenshot.
+            now (Optional[float]): Monotonic time, time.monotonic() by default.
+
+        Returns:
+            bool: True if the screenshot should be suppressed.
+        """
+        now = time.monotonic() if now is None else now
+        index = self.hashes[cam_id]
+        while index and now - next(iter(index.values())) > self.ttl:
+            index.popitem(last=False)
+
+        for known in index:
+            if (known ^ frame_hash).bit_count() <= self.threshold:
+                # Refresh: a scene that keeps flickering stays suppressed
+                index[known] = now
+                index.move_to_end(known)
+                self.suppressed[cam_id] += 1
+                return True
+
+        index[frame_hash] = now
+        if len(index) > self.max_entries:
+            index.popitem(last=False)
+        return False
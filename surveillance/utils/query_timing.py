@@ -0,0 +1,153 @@
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from config.config import make_engine
+from surveillance.schemas.database import Model, DCamera, DUser, DRecording, DNotification
+
+# Indexes added by update/0005_add_indexes_and_zone
+NEW_INDEXES = [index for table in (DUser.__table__, DCamera.__table__) for index in table.indexes]
+
+
+def parse_coordinates(row) -> list[tuple[int, ...]]:
+    return [tuple(map(int, coord_str.split(','))) for coord_str in row]
+
+
+async def populate(engine: AsyncEngine, cameras: int, users: int, events: int) -> None:
+    """Fill the tables: 10% of cameras visible, 5% of users active in the bot."""
+    now = datetime.now()
+    async with engine.begin() as conn:
+        await conn.execute(insert(DCamera), [
+            {"path_to_cam": f"rtsp://10.0.{i // 250}.{i % 250}:554", "status_cam": True,
+             "visible_cam": i % 10 == 0, "screen_cam": True, "send_email": False, "send_tg": True,
+             "send_video_tg": False, "coordinate_x1": "230, 440", "coordinate_x2": "485, 575",
+             "coordinate_y1": "230, 440", "coordinate_y2": "485, 575",
+             "zone": [[230, 440], [485, 575], [230, 440], [485, 575]]}
+            for i in range(cameras)
+        ])
+        await conn.execute(insert(DUser), [
+            {"user": f"user{i}", "password": f"{i:064x}", "status": "user", "tg_id": 100000 + i,
+             "active": int(i % 20 == 0)}
+            for i in range(users)
+        ])
+        await conn.execute(insert(DRecording), [
+            {"cam_id": str(i % cameras + 1), "path": f"/media/recordings/{i}.mp4", "size": 1024,
+             "started_at": now - timedelta(seconds=events - i), "kind": "segment"}
+            for i in range(events)
+        ])
+        await conn.execute(insert(DNotification), [
+            {"key": f"{i:064x}", "kind": "telegram_photo", "payload": "{}",
+             "status": "pending" if i % 100 == 0 else "sent", "available_at": now, "created_at": now}
+            for i in range(events)
+        ])
+
+
+def queries(cameras: int, users: int) -> dict:
+    """Statements of the hot repository queries, each taking a random argument."""
+    return {
+        "auth_user (unique user)": lambda: select(DUser).where(
+            DUser.user == f"user{(n := random.randrange(users))}", DUser.password == f"{n:064x}"),
+        "get_allowed_chat_ids (active)": lambda: select(DUser.tg_id).where(DUser.active == True),
+        "visible cameras (visible_cam)": lambda: select(DCamera.id, DCamera.path_to_cam).where(
+            DCamera.visible_cam == True),
+        "recordings of a camera (cam_id, started_at)": lambda: select(DRecording.path).where(
+            DRecording.cam_id == str(random.randrange(cameras) + 1),
+            DRecording.started_at >= datetime.now() - timedelta(hours=1)),
+        "due notifications (status, available_at)": lambda: select(DNotification.id).where(
+            DNotification.status == "pending", DNotification.available_at <= datetime.now()).limit(50),
+    }
+
+
+async def explain(engine: AsyncEngine, statement) -> str:
+    """Query plan of a statement, in one line."""
+    compiled = statement.compile(engine.sync_engine, compile_kwargs={"literal_binds": True})
+    prefix = "EXPLAIN QUERY PLAN" if engine.dialect.name == "sqlite" else "EXPLAIN"
+    async with engine.connect() as conn:
+        rows = (await conn.execute(text(f"{prefix} {compiled}"))).fetchall()
+    return "; ".join(str(row[-1]) for row in rows)
+
+
+async def time_query(engine: AsyncEngine, make_statement, repeat: int, transform=None) -> float:
+    """Average milliseconds of a query, with the rows fetched (and transformed)."""
+    async with engine.connect() as conn:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            rows = (await conn.execute(make_statement())).fetchall()
+            if transform is not None:
+                for row in rows:
+                    transform(row)
+        return (time.perf_counter() - started) / repeat * 1000
+
+
+async def measure(engine: AsyncEngine, cameras: int, users: int, repeat: int) -> dict:
+    results = {}
+    for name, make_statement in queries(cameras, users).items():
+        results[name] = (await time_query(engine, make_statement, repeat),
+                         await explain(engine, make_statement()))
+
+    def zone_strings():
+        return select(DCamera.coordinate_x1, DCamera.coordinate_x2, DCamera.coordinate_y1,
+                      DCamera.coordinate_y2).where(DCamera.id == random.randrange(cameras) + 1)
+
+    def zone_json():
+        return select(DCamera.zone).where(DCamera.id == random.randrange(cameras) + 1)
+
+    results["zone from coordinate strings"] = (await time_query(engine, zone_strings, repeat, parse_coordinates), "")
+    results["zone from JSON column"] = (
+        await time_query(engine, zone_json, repeat, lambda row: [tuple(point) for point in row.zone]), "")
+    return results
+
+
+async def main(url: str, cameras: int, users: int, events: int, repeat: int) -> None:
+    engine = make_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Model.metadata.create_all)
+        count = (await conn.execute(select(func.count()).select_from(DCamera))).scalar()
+        if count:
+            raise SystemExit(f"{engine.url.render_as_string(hide_password=True)} is not empty, use a scratch database")
+        for index in NEW_INDEXES:
+            await conn.run_sync(index.drop)
+
+    try:
+        print(f"Populating {cameras} cameras, {users} users, {events} recordings and notifications...")
+        await populate(engine, cameras, users, events)
+        async with engine.begin() as conn:
+            await conn.execute(text("ANALYZE"))
+
+        before = await measure(engine, cameras, users, repeat)
+        async with engine.begin() as conn:
+            for index in NEW_INDEXES:
+                await conn.run_sync(index.create)
+            await conn.execute(text("ANALYZE"))
+        after = await measure(engine, cameras, users, repeat)
+
+        print(f"{'query':45} {'before, ms':>11} {'after, ms':>10}")
+        for name, (before_ms, plan_before) in before.items():
+            after_ms, plan_after = after[name]
+            print(f"{name:45} {before_ms:11.3f} {after_ms:10.3f}")
+            if plan_before != plan_after:
+                print(f"    before: {plan_before}\n    after:  {plan_after}")
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Model.metadata.drop_all)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Timing of the hot queries before and after update 0005")
+    parser.add_argument("--url", default=None,
+                        help="Empty scratch database, its tables are dropped afterwards (default: a temporary SQLite file)")
+    parser.add_argument("--cameras", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    url = args.url or f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'query_timing.db')}"
+    asyncio.run(main(url, args.cameras, args.users, args.events, args.repeat))
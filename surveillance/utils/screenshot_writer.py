@@ -0,0 +1,145 @@
+import os
+import queue
+import threading
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional
+
+import cv2
+import numpy as np
+
+from logs.logging_config import get_logger
+from surveillance.utils.media_prep import MediaPrepPolicy, crop_to_box, get_alert_path, prepare_image
+from surveillance.utils.perceptual_dedup import PerceptualDeduplicator, dhash
+
+logger = get_logger()
+
+
+class ScreenshotWriter:
+    """Bounded background writer for motion screenshots.
+
+    The detection job only enqueues the frame; JPEG encoding and disk I/O run
+    in a dedicated thread. Files are written to a temporary name and renamed,
+    so a path is reported through `pop_ready()` only once it is complete.
+
+    Next to the full-resolution screenshot the thread writes the alert copy
+    (downscaled, optionally cropped to the detected object) from the frame
+    still in memory; `pop_ready()` reports that copy, which every
+    notification channel then attaches. Screenshots that look like one
+    alerted recently (perceptual hash of the object's surroundings) are
+    archived but not reported.
+    """
+
+    def __init__(self, max_queue_size: Optional[int] = None, quality: Optional[int] = None,
+                 prep: Optional[MediaPrepPolicy] = None, dedup: Optional[PerceptualDeduplicator] = None):
+        """Start the writer thread.
+
+        Args:
+            max_queue_size (Optional[int]): Maximum number of pending screenshots.
+            quality (Optional[int]): JPEG quality (0-100).
+            prep (Optional[MediaPrepPolicy]): Settings of the alert copy.
+            dedup (Optional[PerceptualDeduplicator]): Near-duplicate filter, built from env when omitted.
+        """
+        self.quality = quality or int(os.getenv("SCREENSHOT_JPEG_QUALITY", 90))
+        self.prep = prep or MediaPrepPolicy()
+        if dedup is None and os.getenv("ALERT_DEDUP_ENABLED", "true").lower() == "true":
+            dedup = PerceptualDeduplicator()
+        self.dedup = dedup
+        self.queue: queue.Queue = queue.Queue(
+            maxsize=max_queue_size or int(os.getenv("SCREENSHOT_QUEUE_SIZE", 16)))
+        self.ready: Dict[str, Deque[str]] = defaultdict(lambda: deque(maxlen=32))
+        self.created_dirs: set[str] = set()
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._thread = threading.Thread(target=self._run, name="screenshot-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, cam_id: str, frame: np.ndarray, path: str,
+               box: Optional[tuple[int, int, int, int]] = None) -> bool:
+        """Hand a frame over to the writer without blocking.
+
+        Args:
+            cam_id (str): Camera ID.
+            frame (np.ndarray): Frame to save; must not be modified afterwards.
+            path (str): Destination path of the JPEG file.
+            box (Optional[tuple]): Bounding box (x, y, w, h) of the object that triggered the screenshot.
+
+        Returns:
+            bool: True if accepted, False if the queue is full.
+        """
+        try:
+            self.queue.put_nowait((cam_id, frame, path, box))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def pop_ready(self, cam_id: str) -> Optional[str]:
+        """Return the oldest completed screenshot path for a camera, if any."""
+        try:
+            return self.ready[cam_id].popleft()
+        except IndexError:
+            return None
+
+    def _ensure_dir(self, directory: str) -> None:
+        if directory in self.created_dirs:
+            return
+        os.makedirs(directory, exist_ok=True)
+        self.created_dirs.add(directory)
+
+    def _write_file(self, data: bytes, path: str) -> None:
+        self._ensure_dir(os.path.dirname(path))
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _is_duplicate(self, cam_id: str, frame: np.ndarray, box: Optional[tuple[int, int, int, int]]) -> bool:
+        if self.dedup is None:
+            return False
+        # A small object hardly changes the hash of the whole frame, hash its surroundings instead
+        region = crop_to_box(frame, box, 1.0) if box is not None else frame
+        return self.dedup.is_duplicate(cam_id, dhash(region))
+
+    def _write(self, cam_id: str, frame: np.ndarray, path: str,
+               box: Optional[tuple[int, int, int, int]], alert: bool = True) -> Optional[str]:
+        ret, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ret:
+            return None
+        self._write_file(buf.tobytes(), path)
+        if not alert:
+            return path
+
+        alert_image = prepare_image(frame, self.prep, box)
+        if alert_image is None:
+            return path
+        alert_path = get_alert_path(cam_id, path, ".jpg")
+        self._write_file(alert_image, alert_path)
+        return alert_path
+
+    def close(self) -> None:
+        """Write the screenshots still queued and stop the thread (blocking)."""
+        self.queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                return
+            cam_id, frame, path, box = item
+            try:
+                duplicate = self._is_duplicate(cam_id, frame, box)
+                ready_path = self._write(cam_id, frame, path, box, alert=not duplicate)
+                if ready_path:
+                    self.written += 1
+                    if not duplicate:
+                        self.ready[cam_id].append(ready_path)
+                else:
+                    self.failed += 1
+            except (OSError, cv2.error) as e:
+                self.failed += 1
+                logger.error(f"[ERROR] Failed to write screenshot {path}: {e}")
+            finally:
+                self.queue.task_done()
@@ -0,0 +1,164 @@
+import os
+import queue
+import struct
+import threading
+from typing import Optional
+
+import cv2
+
+from logs.logging_config import get_logger
+
+logger = get_logger()
+
+STRIP_MAGIC = b"THMB"
+HEADER = struct.Struct("<4sI")
+ENTRY = struct.Struct("<III")
+
+
+def get_strip_path(video_path: str) -> str:
+    """Path of the thumbnail strip stored next to a recording."""
+    return f"{os.path.splitext(video_path)[0]}.thumbs"
+
+
+def read_strip_index(strip_path: str) -> list[tuple[int, int, int]]:
+    """Read the offset index of a strip.
+
+    Returns:
+        list[tuple[int, int, int]]: (time_ms, offset, length) per thumbnail.
+    """
+    with open(strip_path, "rb") as f:
+        magic, count = HEADER.unpack(f.read(HEADER.size))
+        if magic != STRIP_MAGIC:
+            raise ValueError(f"{strip_path} is not a thumbnail strip")
+        data = f.read(ENTRY.size * count)
+    return [ENTRY.unpack_from(data, i * ENTRY.size) for i in range(count)]
+
+
+def read_thumbnail(strip_path: str, index: int) -> Optional[bytes]:
+    """Read one JPEG out of a strip, None if the index is out of range."""
+    with open(strip_path, "rb") as f:
+        magic, count = HEADER.unpack(f.read(HEADER.size))
+        if magic != STRIP_MAGIC or not 0 <= index < count:
+            return None
+        f.seek(HEADER.size + index * ENTRY.size)
+        _, offset, length = ENTRY.unpack(f.read(ENTRY.size))
+        f.seek(offset)
+        return f.read(length)
+
+
+class ThumbnailStripWriter:
+    """Bounded background pool building a thumbnail strip per finished recording.
+
+    A strip is a single file: a header, an index of (time, offset, length)
+    entries and the concatenated JPEGs, so a whole segment costs one file on
+    disk and any thumbnail is served with one seek.
+    """
+
+    def __init__(self, interval: Optional[float] = None, width: Optional[int] = None,
+                 quality: Optional[int] = None, workers: Optional[int] = None,
+                 max_queue_size: Optional[int] = None):
+        """Start the worker threads.
+
+        Args:
+            interval (Optional[float]): Seconds between thumbnails.
+            width (Optional[int]): Thumbnail width in pixels, height keeps the aspect ratio.
+            quality (Optional[int]): JPEG quality (0-100).
+            workers (Optional[int]): Number of worker threads.
+            max_queue_size (Optional[int]): Maximum number of recordings waiting for a strip.
+        """
+        self.interval = interval or float(os.getenv("THUMBNAIL_INTERVAL_SEC", 5))
+        self.width = width or int(os.getenv("THUMBNAIL_WIDTH", 160))
+        self.quality = quality or int(os.getenv("THUMBNAIL_JPEG_QUALITY", 70))
+        self.queue: queue.Queue = queue.Queue(
+            maxsize=max_queue_size or int(os.getenv("THUMBNAIL_QUEUE_SIZE", 32)))
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._threads = [
+            threading.Thread(target=self._run, name=f"thumbnail-strip-{i}", daemon=True)
+            for i in range(workers or int(os.getenv("THUMBNAIL_WORKERS", 1)))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, video_path: str) -> bool:
+        """Queue a finished recording without blocking.
+
+        Returns:
+            bool: True if accepted, False if the queue is full.
+        """
+        try:
+            self.queue.put_nowait(video_path)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _grab_thumbnails(self, video_path: str) -> list[tuple[int, bytes]]:
+        cap = cv2.VideoCapture(video_path)
+        try:
+            if not cap.isOpened():
+                return []
+            fps = cap.get(cv2.CAP_PROP_FPS) or 0
+            frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0
+            duration_ms = int(frame_count / fps * 1000) if fps else 0
+
+            thumbnails = []
+            for time_ms in range(0, max(duration_ms, 1), int(self.interval * 1000)):
+                cap.set(cv2.CAP_PROP_POS_MSEC, time_ms)
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                height = max(1, frame.shape[0] * self.width // frame.shape[1])
+                small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+                ret, buf = cv2.imencode(".jpg", small, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+                if ret:
+                    thumbnails.append((time_ms, buf.tobytes()))
+            return thumbnails
+        finally:
+            cap.release()
+
+    def build_strip(self, video_path: str) -> Optional[str]:
+        """Decode a recording and write its strip, return the strip path."""
+        thumbnails = self._grab_thumbnails(video_path)
+        if not thumbnails:
+            return None
+
+        offset = HEADER.size + ENTRY.size * len(thumbnails)
+        index = []
+        for time_ms, jpeg in thumbnails:
+            index.append(ENTRY.pack(time_ms, offset, len(jpeg)))
+            offset += len(jpeg)
+
+        strip_path = get_strip_path(video_path)
+        tmp_path = f"{strip_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(STRIP_MAGIC, len(thumbnails)))
+            f.write(b"".join(index))
+            f.write(b"".join(jpeg for _, jpeg in thumbnails))
+        os.replace(tmp_path, strip_path)
+        return strip_path
+
+    def close(self) -> None:
+        """Build the strips still queued and stop the worker threads (blocking)."""
+        for _ in self._threads:
+            self.queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def _run(self) -> None:
+        while True:
+            video_path = self.queue.get()
+            if video_path is None:
+                self.queue.task_done()
+                return
+            try:
+                if self.build_strip(video_path):
+                    self.written += 1
+                else:
+                    self.failed += 1
+            except (OSError, cv2.error) as e:
+                self.failed += 1
+                logger.error(f"[ERROR] Failed to build thumbnail strip for {video_path}: {e}")
+            finally:
+                self.queue.task_done()
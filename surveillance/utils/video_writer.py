@@ -0,0 +1,93 @@
+import os
+import queue
+import threading
+import time
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from logs.logging_config import get_logger
+
+logger = get_logger()
+
+
+class ThreadedVideoWriter:
+    """cv2.VideoWriter with its own writer thread and a bounded frame queue.
+
+    `write()` never blocks the caller: when the queue is full the oldest
+    pending frame is dropped. Encoding cost is therefore isolated from the
+    capture and detection executor.
+
+    Frames go to a `.part` file that is renamed to `path` by `release()`, so
+    a file at `path` is always complete and playable.
+    """
+
+    def __init__(self, path: str, fps: float, size: Tuple[int, int],
+                 fourcc: str = "mp4v", max_queue_size: Optional[int] = None):
+        """Open the underlying writer and start the writer thread.
+
+        Args:
+            path (str): Output file path.
+            fps (float): Frames per second of the output.
+            size (Tuple[int, int]): Frame (width, height).
+            fourcc (str): Codec FourCC.
+            max_queue_size (Optional[int]): Maximum number of pending frames.
+        """
+        self.path = path
+        root, ext = os.path.splitext(path)
+        self.part_path = f"{root}.part{ext}"
+        self.queue: queue.Queue = queue.Queue(
+            maxsize=max_queue_size or int(os.getenv("RECORDING_QUEUE_SIZE", 60)))
+        self.writer = cv2.VideoWriter(self.part_path, cv2.VideoWriter.fourcc(*fourcc), fps, size)
+        self.written = 0
+        self.dropped = 0
+        self.write_latency = 0.0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=f"writer-{os.path.basename(path)}",
+                                        daemon=True)
+        self._thread.start()
+
+    def write(self, frame: np.ndarray) -> None:
+        """Queue a frame, dropping the oldest pending one if the queue is full."""
+        with self._lock:
+            while True:
+                try:
+                    self.queue.put_nowait(frame)
+                    return
+                except queue.Full:
+                    try:
+                        self.queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def release(self) -> bool:
+        """Flush pending frames, stop the thread, release the writer and publish the file (blocking).
+
+        Returns:
+            bool: True if the file was moved to `path`, False if nothing was written.
+        """
+        with self._lock:
+            self.queue.put(None)
+        self._thread.join()
+        self.writer.release()
+        published = self.written > 0 and os.path.exists(self.part_path)
+        if published:
+            os.replace(self.part_path, self.path)
+        elif os.path.exists(self.part_path):
+            os.remove(self.part_path)
+        if self.dropped:
+            logger.warning(f"[WARNING] {self.path}: {self.dropped} frames dropped, {self.written} written")
+        return published
+
+    def _run(self) -> None:
+        while True:
+            frame = self.queue.get()
+            if frame is None:
+                return
+            started = time.monotonic()
+            self.writer.write(frame)
+            elapsed = time.monotonic() - started
+            self.write_latency = elapsed if not self.written else 0.9 * self.write_latency + 0.1 * elapsed
+            self.written += 1
@@ -0,0 +1,27 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Scratch database, set before config.config builds its engines
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'tests.db')}"
+os.environ.pop("DATABASE_SYNC_URL", None)
+
+
+@pytest.fixture
+def recordings_index():
+    """Empty recording index in the scratch database."""
+    from sqlalchemy import delete
+
+    from config.config import new_sync_session, sync_engine
+    from surveillance.schemas.database import DRecording, Model
+
+    Model.metadata.create_all(sync_engine)
+    yield
+    with new_sync_session() as session:
+        session.execute(delete(DRecording))
+        session.commit()
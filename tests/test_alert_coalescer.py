@@ -0,0 +1,56 @@
+import asyncio
+
+from surveillance.utils.alert_coalescer import AlertCoalescer
+
+
+def collect(coalescer_args: dict, feed) -> tuple[list, AlertCoalescer]:
+    dispatched = []
+
+    async def run():
+        coalescer = AlertCoalescer(lambda *batch: dispatched.append(batch), **coalescer_args)
+        await feed(coalescer)
+        return coalescer
+
+    return dispatched, asyncio.run(run())
+
+
+def test_alerts_of_a_window_are_sent_as_one_batch_per_camera():
+    async def feed(coalescer):
+        coalescer.add("1", "a.jpg", send_tg=True)
+        coalescer.add("2", "b.jpg", send_tg=False)
+        coalescer.add("1", "c.jpg", send_tg=False)
+        await asyncio.sleep(0.1)
+
+    dispatched, _ = collect({"window": 0.05, "max_batch": 10, "max_per_minute": 20}, feed)
+
+    assert sorted(dispatched) == [("1", ["a.jpg", "c.jpg"], 0, {"send_tg": True}),
+                                  ("2", ["b.jpg"], 0, {"send_tg": False})]
+
+
+def test_full_batch_is_sent_early_and_counts_the_rest():
+    async def feed(coalescer):
+        for i in range(5):
+            coalescer.add("1", f"{i}.jpg")
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+    dispatched, coalescer = collect({"window": 60, "max_batch": 2, "max_per_minute": 20}, feed)
+
+    assert dispatched == [("1", ["0.jpg", "1.jpg"], 3, {})]
+    assert coalescer.suppressed == 3
+
+
+def test_batches_over_the_rate_cap_wait_for_a_slot():
+    async def feed(coalescer):
+        coalescer.add("1", "a.jpg")
+        coalescer.add("2", "b.jpg")
+        await asyncio.sleep(0.1)
+        coalescer.add("2", "c.jpg")
+        assert list(coalescer.batches) == ["2"]
+        coalescer.flush_all()
+
+    dispatched, coalescer = collect({"window": 0.05, "max_batch": 10, "max_per_minute": 1}, feed)
+
+    assert len(dispatched) == 2
+    assert dispatched[1][1] == ["b.jpg", "c.jpg"]
+    assert coalescer.batches == {}
@@ -0,0 +1,105 @@
+import asyncio
+import os
+import threading
+from datetime import datetime, timedelta
+
+import cv2
+import numpy as np
+import pytest
+from sqlalchemy import delete
+
+from config.config import new_sync_session, sync_engine
+from surveillance.camera_manager import CameraManager
+from surveillance.schemas.database import DCamera, DRecording, Model
+from surveillance.schemas.repository import Recordings
+
+
+@pytest.fixture
+def camera(tmp_path, monkeypatch):
+    """One camera in the scratch database, reading a generated video file."""
+    video_path = str(tmp_path / "camera.avi")
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter.fourcc(*"MJPG"), 25, (160, 120))
+    for i in range(250):
+        frame = np.zeros((120, 160, 3), np.uint8)
+        frame[:, i % 140:i % 140 + 20] = 255
+        writer.write(frame)
+    writer.release()
+
+    Model.metadata.create_all(sync_engine)
+    with new_sync_session() as session:
+        session.add(DCamera(path_to_cam=video_path, status_cam=True, visible_cam=True, screen_cam=True,
+                            send_email=False, send_tg=False, send_video_tg=False))
+        session.commit()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("CONTINUOUS_RECORDING", "all")
+    yield
+    with new_sync_session() as session:
+        session.execute(delete(DCamera))
+        session.execute(delete(DRecording))
+        session.commit()
+
+
+def test_close_stops_recordings_readers_and_threads(camera):
+    threads_before = set(threading.enumerate())
+
+    async def run():
+        manager = CameraManager()
+        await manager.initialize()
+        await asyncio.sleep(0.5)
+        recording = manager.continuous_recordings["1"]
+        assert not recording.task.done()
+
+        await manager.close()
+        return manager, recording
+
+    manager, recording = asyncio.run(run())
+
+    assert recording.task.done()
+    assert manager.continuous_recordings == {}
+    assert manager.cameras == {}
+    assert manager.heatmap_task is None and manager.io_pressure_task is None
+    assert manager.executor._shutdown
+    leftover = {thread.name for thread in set(threading.enumerate()) - threads_before}
+    assert not {name for name in leftover if name.startswith(("screenshot-writer", "thumbnail-strip"))}
+
+
+def test_finished_recording_can_be_restarted(camera):
+    async def run():
+        manager = CameraManager()
+        await manager.initialize()
+        try:
+            manager.continuous_recordings["1"].task.cancel()
+            await asyncio.sleep(0.1)
+            restarted = manager.start_continuous_recording("1")
+            running_again = manager.start_continuous_recording("1")
+        finally:
+            await manager.close()
+        return restarted, running_again
+
+    assert asyncio.run(run()) == (True, False)
+
+
+def test_finished_event_clip_is_handed_over(camera, monkeypatch):
+    monkeypatch.setenv("EVENT_POST_ROLL", "0.5")
+    ready = []
+
+    async def on_clip_ready(cam_id, path):
+        ready.append((cam_id, path, os.path.getsize(path)))
+
+    async def run():
+        manager = CameraManager(on_clip_ready=on_clip_ready)
+        await manager.initialize()
+        try:
+            await asyncio.sleep(0.2)
+            manager._notify_event_motion("1")
+            await asyncio.wait_for(asyncio.gather(*manager.event_tasks), timeout=5)
+        finally:
+            await manager.close()
+        return await Recordings.select_range("1", datetime.now() - timedelta(minutes=1), datetime.now(),
+                                             lookback=timedelta(0), kinds=["event"])
+
+    events = asyncio.run(run())
+
+    ((cam_id, path, size),) = ready
+    assert cam_id == "1" and size > 0
+    assert [row.path for row in events] == [path]
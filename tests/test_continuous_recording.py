@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from surveillance.utils.continuous_recording import ContinuousRecording
+
+
+def ts(*args) -> float:
+    return datetime(*args).timestamp()
+
+
+def test_boundaries_are_aligned_to_the_segment_length():
+    recording = ContinuousRecording("1", segment_sec=60)
+    now = ts(2026, 1, 1, 12, 0, 42)
+
+    assert recording.segment_start(now) == ts(2026, 1, 1, 12, 0, 0)
+    assert recording.next_boundary(now) == ts(2026, 1, 1, 12, 1, 0)
+    assert recording.next_boundary(ts(2026, 1, 1, 12, 1, 0)) == ts(2026, 1, 1, 12, 2, 0)
+
+
+def test_last_segment_of_the_day_ends_at_midnight():
+    recording = ContinuousRecording("1", segment_sec=7 * 60)
+    now = ts(2026, 1, 1, 23, 58, 0)
+
+    assert recording.segment_start(now) == ts(2026, 1, 1, 23, 55, 0)
+    assert recording.next_boundary(now) == ts(2026, 1, 2, 0, 0, 0)
+    assert recording.segment_start(ts(2026, 1, 2, 0, 0, 30)) == ts(2026, 1, 2, 0, 0, 0)
@@ -0,0 +1,65 @@
+import os
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from celery_task import digest_service
+from celery_task.digest_service import build_motion_digests, get_digest_path
+from config.config import run_sync
+from surveillance.schemas.repository import Recordings
+
+DAY = date(2026, 1, 1)
+
+
+@pytest.fixture
+def joined(tmp_path, recordings_index, monkeypatch):
+    """Recordings under tmp_path, joined by a stand-in for ffmpeg."""
+    calls = []
+
+    async def concat(paths, out_path, offset=None, duration=None):
+        calls.append([os.path.basename(path) for path in paths])
+        with open(out_path, "wb") as f:
+            f.write(b"\0" * 50)
+        return out_path
+
+    monkeypatch.setattr(digest_service, "BASE_DIR", str(tmp_path))
+    monkeypatch.setattr(digest_service, "concat_recordings", concat)
+    return calls
+
+
+def add(cam_id: str, name: str, hour: int, kind: str = "event", tier: str = "original") -> None:
+    started_at = datetime.combine(DAY, datetime.min.time()) + timedelta(hours=hour)
+    assert run_sync(Recordings.add_recording(cam_id, name, 10, started_at, kind=kind))
+    if tier != "original":
+        row = run_sync(Recordings.select_range(cam_id, started_at, started_at + timedelta(seconds=1),
+                                               lookback=timedelta(0)))[0]
+        assert run_sync(Recordings.update_tier(row.id, 10, tier))
+
+
+def test_digest_joins_the_event_clips_of_each_camera(tmp_path, joined):
+    add("1", "event_a.mp4", 9)
+    add("1", "segment_a.mp4", 10, kind="segment")
+    add("1", "event_b.mp4", 11, tier="compact")
+    add("1", "event_c.mp4", 12)
+    add("2", "segment_b.mp4", 9, kind="segment")
+    add("1", "event_next_day.mp4", 25)
+
+    result = run_sync(build_motion_digests(DAY))
+
+    digest_path = get_digest_path("1", DAY)
+    assert digest_path.startswith(str(tmp_path))
+    assert result['created'] == [digest_path]
+    assert result['skipped'] == 1
+    assert joined == [["event_a.mp4", "event_c.mp4"]]
+    start = datetime.combine(DAY, datetime.min.time())
+    rows = run_sync(Recordings.select_range("1", start, start + timedelta(days=1), lookback=timedelta(0)))
+    assert [row.size for row in rows if row.kind == "digest"] == [50]
+
+
+def test_existing_digest_is_not_built_again(joined):
+    add("1", "event_a.mp4", 9)
+    run_sync(build_motion_digests(DAY))
+    result = run_sync(build_motion_digests(DAY))
+
+    assert result['created'] == [] and result['skipped'] == 1
+    assert len(joined) == 1
@@ -0,0 +1,52 @@
+import asyncio
+import threading
+
+import pytest
+from sqlalchemy import text
+
+from config.config import new_session, run_sync
+
+
+async def session_engine():
+    async with new_session() as session:
+        await session.execute(text("SELECT 1"))
+        return session.bind
+
+
+def test_each_loop_gets_its_own_engine():
+    async def twice():
+        return await session_engine(), await session_engine()
+
+    first, again = asyncio.run(twice())
+    other = asyncio.run(session_engine())
+
+    assert first is again
+    assert other is not first
+
+
+def test_loops_of_many_threads_share_no_connections():
+    engines, errors = [], []
+
+    def worker():
+        try:
+            engines.append(asyncio.run(session_engine()))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len({id(engine) for engine in engines}) == 4
+    assert run_sync(session_engine()) not in engines
+
+
+def test_run_sync_refuses_a_running_loop():
+    async def call():
+        run_sync(session_engine())
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(call())
@@ -0,0 +1,42 @@
+from surveillance.utils.event_recorder import EventRecorder
+
+
+def test_motion_during_post_roll_extends_the_clip():
+    recorder = EventRecorder("1", post_roll=5, max_length=60)
+
+    assert recorder.motion(0)
+    assert not recorder.motion(4)
+    assert not recorder.should_stop(8)
+    assert recorder.should_stop(9)
+
+
+def test_clip_never_exceeds_max_length():
+    recorder = EventRecorder("1", post_roll=5, max_length=10)
+    recorder.motion(0)
+    for now in range(1, 12):
+        recorder.motion(now)
+
+    assert recorder.deadline() == 10
+    assert recorder.should_stop(10)
+
+
+def test_finished_clips_are_published_in_order():
+    recorder = EventRecorder("1", post_roll=5, max_length=60)
+    recorder.motion(0)
+    recorder.finish("a.mp4")
+    assert recorder.motion(20)
+    recorder.finish(None)
+    recorder.motion(40)
+    recorder.finish("b.mp4")
+
+    assert recorder.state == EventRecorder.IDLE
+    assert [recorder.pop_completed(), recorder.pop_completed(), recorder.pop_completed()] == ["a.mp4", "b.mp4", None]
+
+
+def test_zero_post_roll_is_not_replaced_by_the_default(monkeypatch):
+    monkeypatch.setenv("EVENT_POST_ROLL", "30")
+    recorder = EventRecorder("1", post_roll=0, max_length=60)
+    recorder.motion(0)
+
+    assert recorder.post_roll == 0
+    assert recorder.should_stop(0)
@@ -0,0 +1,140 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from surveillance.utils import export_utils
+from surveillance.utils.export_utils import ExportError, export_window, get_export_path, window_on_timeline
+
+START = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def row(rec_id: int, started_at: datetime, kind: str = "segment", tier: str = "original", size: int = 100):
+    return SimpleNamespace(id=rec_id, path=f"media/recordings/{rec_id}.mp4", started_at=started_at,
+                           kind=kind, tier=tier, size=size)
+
+
+@pytest.fixture
+def concat_calls(monkeypatch):
+    calls = []
+
+    async def fake_concat(paths, out_path, offset=None, duration=None):
+        calls.append({"paths": paths, "offset": offset, "duration": duration})
+        return out_path
+
+    monkeypatch.setattr(export_utils, "concat_recordings", fake_concat)
+    return calls
+
+
+def test_export_uses_only_continuous_recordings(tmp_path, concat_calls):
+    rows = [
+        row(1, START - timedelta(seconds=30), kind="event"),
+        row(2, START - timedelta(seconds=20)),
+        row(3, START + timedelta(seconds=40)),
+        row(4, START, kind="digest"),
+        row(5, START + timedelta(seconds=45), kind="event"),
+    ]
+    asyncio.run(export_window(rows, START, START + timedelta(minutes=1), str(tmp_path / "out.mp4")))
+
+    (call,) = concat_calls
+    assert [path.rsplit("/", 1)[-1] for path in call["paths"]] == ["2.mp4", "3.mp4"]
+    # Offset and duration come from the first continuous segment, not the event clip
+    assert call["offset"] == 20
+    assert call["duration"] == 60
+
+
+def test_export_offset_is_zero_when_window_starts_before_the_recordings(tmp_path, concat_calls):
+    rows = [row(1, START + timedelta(seconds=10))]
+    asyncio.run(export_window(rows, START, START + timedelta(seconds=70), str(tmp_path / "out.mp4")))
+
+    assert concat_calls[0]["offset"] == 0
+    assert concat_calls[0]["duration"] == 60
+
+
+def test_gaps_between_recordings_are_not_counted_in_the_duration(tmp_path, concat_calls, monkeypatch):
+    lengths = {"1.mp4": 30.0, "2.mp4": 60.0}
+
+    async def probe(path):
+        return lengths[path.rsplit("/", 1)[-1]]
+
+    monkeypatch.setattr(export_utils, "probe_duration", probe)
+    rows = [row(1, START - timedelta(seconds=10)), row(2, START + timedelta(seconds=60))]
+    asyncio.run(export_window(rows, START, START + timedelta(seconds=100), str(tmp_path / "out.mp4")))
+
+    # 20 s of the first recording, nothing for 40 s, then 40 s of the second one
+    assert concat_calls[0]["offset"] == 10
+    assert concat_calls[0]["duration"] == 60
+
+
+def test_timeline_reports_the_gaps_of_the_window():
+    rows = [row(1, START - timedelta(seconds=10)), row(2, START + timedelta(seconds=60))]
+    offset, duration, gaps = window_on_timeline(rows, [30, 20], START, START + timedelta(seconds=100))
+
+    assert (offset, duration) == (10, 40)
+    assert gaps == [(START + timedelta(seconds=20), START + timedelta(seconds=60)),
+                    (START + timedelta(seconds=80), START + timedelta(seconds=100))]
+
+
+def test_window_after_the_last_recording_ended_is_not_found(tmp_path, concat_calls, monkeypatch):
+    async def probe(path):
+        return 30.0
+
+    monkeypatch.setattr(export_utils, "probe_duration", probe)
+    with pytest.raises(ExportError) as error:
+        asyncio.run(export_window([row(1, START - timedelta(minutes=5))], START, START + timedelta(minutes=1),
+                                  str(tmp_path / "out.mp4")))
+    assert error.value.status == 404
+    assert not concat_calls
+
+
+@pytest.mark.parametrize("timelapse", [{"kind": "timelapse"}, {"tier": "timelapse"}])
+def test_timelapse_recordings_are_exported_whole(tmp_path, concat_calls, timelapse):
+    rows = [row(1, START - timedelta(seconds=20), **timelapse)]
+    asyncio.run(export_window(rows, START, START + timedelta(minutes=1), str(tmp_path / "out.mp4")))
+
+    assert concat_calls[0]["offset"] is None
+    assert concat_calls[0]["duration"] is None
+
+
+def test_export_without_continuous_recordings_is_not_found(tmp_path, concat_calls):
+    with pytest.raises(ExportError) as error:
+        asyncio.run(export_window([row(1, START, kind="event")], START, START + timedelta(minutes=1),
+                                  str(tmp_path / "out.mp4")))
+    assert error.value.status == 404
+    assert not concat_calls
+
+
+def test_export_across_storage_tiers_is_refused(tmp_path, concat_calls):
+    rows = [row(1, START), row(2, START + timedelta(minutes=1), tier="compact")]
+    with pytest.raises(ExportError) as error:
+        asyncio.run(export_window(rows, START, START + timedelta(minutes=2), str(tmp_path / "out.mp4")))
+    assert error.value.status == 409
+
+
+def test_concurrent_exports_of_a_window_share_one_run(tmp_path, monkeypatch):
+    runs = []
+
+    async def slow_concat(paths, out_path, offset=None, duration=None):
+        runs.append(out_path)
+        await asyncio.sleep(0.05)
+        return out_path
+
+    monkeypatch.setattr(export_utils, "concat_recordings", slow_concat)
+    out_path = str(tmp_path / "out.mp4")
+
+    async def export_three_times():
+        return await asyncio.gather(*(export_window([row(1, START)], START, START + timedelta(minutes=1), out_path)
+                                      for _ in range(3)))
+
+    assert asyncio.run(export_three_times()) == [out_path] * 3
+    assert runs == [out_path]
+    assert export_utils._exports == {}
+
+
+def test_export_path_changes_when_the_window_gains_recordings():
+    end = START + timedelta(minutes=5)
+    first = get_export_path("1", START, end, [row(1, START)])
+    assert get_export_path("1", START, end, [row(1, START)]) == first
+    assert get_export_path("1", START, end, [row(1, START), row(2, START + timedelta(minutes=1))]) != first
+    assert get_export_path("1", START, end, [row(1, START, tier="compact", size=40)]) != first
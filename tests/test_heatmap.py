@@ -0,0 +1,60 @@
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from surveillance.utils.heatmap_utils import MotionHeatmap
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+def full_mask() -> np.ndarray:
+    return np.full((360, 640), 255, dtype=np.uint8)
+
+
+def test_update_adds_the_downscaled_mask():
+    heatmap = MotionHeatmap("1", size=(16, 9), half_life_sec=3600)
+    heatmap.update(full_mask())
+    heatmap.update(full_mask())
+
+    accumulator, _ = heatmap.snapshot()
+    assert accumulator.shape == (9, 16)
+    assert np.allclose(accumulator, 2, atol=1e-3)
+
+
+def test_heat_halves_after_the_half_life():
+    heatmap = MotionHeatmap("1", size=(16, 9), half_life_sec=60)
+    heatmap.update(full_mask())
+    heatmap.last_update -= 60
+    heatmap.update(np.zeros((360, 640), dtype=np.uint8))
+
+    assert np.allclose(heatmap.snapshot()[0], 0.5, atol=1e-3)
+
+
+def test_saved_heatmap_keeps_decaying_while_the_service_is_down():
+    heatmap = MotionHeatmap("1", size=(16, 9), half_life_sec=60)
+    heatmap.update(full_mask())
+    heatmap.last_update -= 600
+    heatmap.save()
+
+    restored = MotionHeatmap("1", size=(16, 9), half_life_sec=60)
+    accumulator, last_update = restored.snapshot()
+    assert np.allclose(accumulator, 1, atol=1e-3)
+    assert last_update == pytest.approx(time.time() - 600, abs=5)
+    assert MotionHeatmap("1", size=(8, 8)).snapshot()[0].max() == 0
+
+
+def test_overlay_of_an_idle_camera_fades_out():
+    heatmap = MotionHeatmap("1", size=(16, 9), half_life_sec=60)
+    heatmap.update(full_mask())
+    active = cv2.imdecode(np.frombuffer(heatmap.render_overlay(64, 36), np.uint8), cv2.IMREAD_UNCHANGED)
+    heatmap.last_update -= 3600
+    idle = cv2.imdecode(np.frombuffer(heatmap.render_overlay(64, 36), np.uint8), cv2.IMREAD_UNCHANGED)
+
+    assert active.shape == (36, 64, 4)
+    assert active[:, :, 3].min() > 250
+    assert idle[:, :, 3].max() == 0
@@ -0,0 +1,72 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import pytest
+
+from surveillance.utils import media_prep
+from surveillance.utils.media_prep import MediaPrepPolicy, get_alert_path, prepare_clip, prepare_image
+
+
+@pytest.fixture(autouse=True)
+def alerts_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(media_prep, "alerts_dir", str(tmp_path / "alerts"))
+
+
+@pytest.fixture
+def encoder(tmp_path, monkeypatch):
+    """Stand-in for ffmpeg writing `size` bytes to the output, counting the encodes."""
+    state = {"size": 10, "encodes": 0}
+
+    def run(command, **kwargs):
+        state["encodes"] += 1
+        time.sleep(0.05)
+        with open(command[-1], "wb") as f:
+            f.write(b"\0" * state["size"])
+
+    monkeypatch.setattr(media_prep.shutil, "which", lambda name: f"/usr/bin/{name}")
+    monkeypatch.setattr(media_prep.subprocess, "run", run)
+    source = tmp_path / "camera_1_20260101_235959.mp4"
+    source.write_bytes(b"\0" * 100)
+    state["source"] = str(source)
+    return state
+
+
+def test_alert_copy_is_downscaled_and_cropped(monkeypatch):
+    monkeypatch.setenv("ALERT_MAX_WIDTH", "320")
+    monkeypatch.setenv("ALERT_MAX_HEIGHT", "180")
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+
+    whole = cv2.imdecode(np.frombuffer(prepare_image(frame, MediaPrepPolicy()), np.uint8), cv2.IMREAD_COLOR)
+    monkeypatch.setenv("ALERT_CROP_TO_OBJECT", "true")
+    monkeypatch.setenv("ALERT_CROP_MARGIN", "0")
+    cropped = cv2.imdecode(np.frombuffer(prepare_image(frame, MediaPrepPolicy(), box=(100, 100, 200, 100)),
+                                         np.uint8), cv2.IMREAD_COLOR)
+
+    assert whole.shape == (180, 320, 3)
+    assert cropped.shape == (100, 200, 3)
+
+
+def test_alert_path_is_dated_by_the_source(tmp_path):
+    path = get_alert_path("1", "media/recordings/camera_1_20260101_235959.mp4", ".mp4")
+    assert path == str(tmp_path / "alerts" / "2026-01-01" / "camera_1_camera_1_20260101_235959.mp4")
+
+
+def test_clip_is_encoded_once_for_concurrent_callers(encoder):
+    with ThreadPoolExecutor(4) as pool:
+        paths = list(pool.map(lambda _: prepare_clip("1", encoder["source"]), range(4)))
+
+    assert len(set(paths)) == 1 and paths[0] != encoder["source"]
+    assert os.path.getsize(paths[0]) == 10
+    assert encoder["encodes"] == 1
+    assert media_prep._clip_locks == {}
+
+
+def test_clip_not_made_smaller_is_sent_as_is_and_not_encoded_again(encoder):
+    encoder["size"] = 200
+
+    assert prepare_clip("1", encoder["source"]) == encoder["source"]
+    assert prepare_clip("1", encoder["source"]) == encoder["source"]
+    assert encoder["encodes"] == 1
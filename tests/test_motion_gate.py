@@ -0,0 +1,43 @@
+import numpy as np
+
+from surveillance.utils.motion_gate import MotionGate
+
+
+def frame(offset: int = 0) -> np.ndarray:
+    image = np.zeros((360, 640, 3), dtype=np.uint8)
+    image[100:260, offset:offset + 160] = 255
+    return image
+
+
+def test_idle_scene_is_written_once_per_interval():
+    gate = MotionGate(idle_interval=1.0, hold=5.0, threshold=0.01)
+    written = [gate.should_write(frame(), now=i * 0.1) for i in range(25)]
+
+    assert [i for i, write in enumerate(written) if write] == [0, 10, 20]
+    assert gate.skipped == 22
+
+
+def test_motion_keeps_full_rate_for_the_hold_time():
+    gate = MotionGate(idle_interval=1.0, hold=0.5, threshold=0.01)
+    gate.should_write(frame(0), now=0.0)
+    assert gate.should_write(frame(200), now=0.1)
+
+    written = [gate.should_write(frame(200), now=0.1 + i * 0.1) for i in range(1, 10)]
+    assert written == [True] * 5 + [False] * 4
+
+
+def test_motion_reported_by_the_stream_opens_the_gate():
+    gate = MotionGate(idle_interval=10.0, hold=2.0, threshold=0.01)
+    gate.should_write(frame(), now=0.0)
+    assert not gate.should_write(frame(), now=1.0)
+
+    gate.mark_motion(1.5)
+    assert gate.should_write(frame(), now=3.0)
+    assert not gate.should_write(frame(), now=3.6)
+
+
+def test_zero_hold_is_not_replaced_by_the_default(monkeypatch):
+    monkeypatch.setenv("RECORDING_MOTION_HOLD", "5")
+    gate = MotionGate(idle_interval=10.0, hold=0, threshold=0.01)
+
+    assert gate.hold == 0
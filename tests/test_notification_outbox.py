@@ -0,0 +1,95 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import delete, func, select
+
+from celery_task import outbox_service
+from config.config import new_sync_session, sync_engine
+from surveillance.schemas.database import DNotification, Model
+from surveillance.schemas.repository import Notifications
+from surveillance.utils.notification_outbox import NotificationOutbox
+
+
+@pytest.fixture
+def outbox():
+    """Empty notification outbox in the scratch database."""
+    Model.metadata.create_all(sync_engine)
+    yield
+    with new_sync_session() as session:
+        session.execute(delete(DNotification))
+        session.commit()
+
+
+def stored() -> int:
+    with new_sync_session() as session:
+        return session.scalar(select(func.count()).select_from(DNotification))
+
+
+def test_same_alert_is_stored_once(outbox):
+    async def run():
+        writer = NotificationOutbox()
+        writer.put("telegram_photo", cam_id="1", path="a.jpg", chat_ids=[1])
+        writer.put("telegram_photo", cam_id="1", path="a.jpg", chat_ids=[1])
+        await writer.flush()
+
+    asyncio.run(run())
+    assert stored() == 1
+
+
+def test_claim_is_taken_over_only_after_the_lease(outbox):
+    async def run():
+        writer = NotificationOutbox()
+        writer.put("telegram_photo", cam_id="1", path="a.jpg", chat_ids=[1])
+        await writer.flush()
+
+        token, rows = await Notifications.claim(lease=timedelta(minutes=5))
+        _, while_leased = await Notifications.claim(lease=timedelta(minutes=5))
+        _, abandoned = await Notifications.claim(lease=timedelta(0))
+        late = await Notifications.mark_sent(rows[0].id, token)
+        return rows, while_leased, abandoned, late
+
+    rows, while_leased, abandoned, late = asyncio.run(run())
+
+    assert len(rows) == 1 and rows[0].attempts == 1
+    assert while_leased == []
+    assert [row.id for row in abandoned] == [rows[0].id] and abandoned[0].attempts == 2
+    assert not late
+
+
+def test_slow_delivery_keeps_its_claim(outbox, monkeypatch):
+    lease = timedelta(seconds=1)
+
+    async def slow_upload(worker, row, payload):
+        await asyncio.sleep(1.6)
+
+    monkeypatch.setitem(outbox_service.DELIVERIES, "telegram_video", slow_upload)
+
+    async def run():
+        writer = NotificationOutbox()
+        writer.put("telegram_video", cam_id="1", path="clip.mp4", chat_ids=[1])
+        await writer.flush()
+
+        token, rows = await Notifications.claim(lease=lease)
+        delivery = asyncio.create_task(outbox_service.deliver(None, rows[0], lease))
+        await asyncio.sleep(1.3)
+        _, during_upload = await Notifications.claim(lease=lease)
+        await delivery
+        return during_upload
+
+    assert asyncio.run(run()) == []
+
+
+def test_stop_writes_the_queued_alerts(outbox):
+    async def run():
+        writer = NotificationOutbox(flush_interval=0.05)
+        writer.start()
+        writer.put("telegram_photo", cam_id="1", path="a.jpg", chat_ids=[1])
+        await asyncio.sleep(0.05)
+        writer.put("telegram_photo", cam_id="1", path="b.jpg", chat_ids=[1])
+        await writer.stop()
+        return writer
+
+    writer = asyncio.run(run())
+    assert writer.pending == []
+    assert stored() == 2
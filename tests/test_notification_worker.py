@@ -0,0 +1,109 @@
+import asyncio
+import threading
+from email.message import Message
+
+import aiosmtplib
+
+from celery_task.notification_worker import NotificationWorker, SMTPPool, is_transient_smtp_error
+
+
+class FakeSMTP:
+    """Stands in for aiosmtplib.SMTP, optionally failing the first send."""
+
+    def __init__(self, fail_with: Exception = None):
+        self.fail_with = fail_with
+        self.is_connected = False
+        self.connects = 0
+        self.sent = []
+
+    async def connect(self):
+        self.is_connected = True
+        self.connects += 1
+
+    async def send_message(self, message):
+        if self.fail_with is not None:
+            error, self.fail_with = self.fail_with, None
+            raise error
+        self.sent.append(message)
+
+    async def quit(self):
+        self.is_connected = False
+
+    def close(self):
+        self.is_connected = False
+
+
+def pool_with(*clients: FakeSMTP, **kwargs) -> tuple[SMTPPool, list[FakeSMTP]]:
+    opened = []
+    pending = list(clients)
+
+    def new_client():
+        opened.append(pending.pop(0) if pending else FakeSMTP())
+        return opened[-1]
+
+    pool = SMTPPool(size=2, **kwargs)
+    pool._new_client = new_client
+    return pool, opened
+
+
+def test_session_is_reused_across_messages():
+    async def run():
+        pool, opened = pool_with(idle_timeout=60)
+        for _ in range(3):
+            await pool.send(Message())
+        await pool.close()
+        return opened
+
+    (client,) = asyncio.run(run())
+    assert client.connects == 1 and len(client.sent) == 3
+    assert not client.is_connected
+
+
+def test_dropped_session_is_reopened_once():
+    async def run():
+        pool, opened = pool_with(FakeSMTP(fail_with=aiosmtplib.SMTPServerDisconnected("gone")), idle_timeout=60)
+        await pool.send(Message())
+        return pool, opened
+
+    pool, (stale, fresh) = asyncio.run(run())
+    assert stale.sent == [] and not stale.is_connected
+    assert len(fresh.sent) == 1
+    assert [client for client, _ in pool.idle] == [fresh]
+
+
+def test_idle_session_past_the_timeout_is_not_trusted():
+    async def run():
+        pool, opened = pool_with(idle_timeout=0.01)
+        await pool.send(Message())
+        await asyncio.sleep(0.05)
+        await pool.send(Message())
+        return opened
+
+    first, second = asyncio.run(run())
+    assert not first.is_connected
+    assert len(first.sent) == len(second.sent) == 1
+
+
+def test_only_connection_problems_and_4xx_are_transient():
+    assert is_transient_smtp_error(aiosmtplib.SMTPServerDisconnected("gone"))
+    assert is_transient_smtp_error(aiosmtplib.SMTPResponseException(451, "try later"))
+    assert is_transient_smtp_error(ConnectionRefusedError())
+    assert not is_transient_smtp_error(aiosmtplib.SMTPResponseException(550, "no such user"))
+    assert not is_transient_smtp_error(ValueError())
+
+
+def test_worker_runs_every_send_on_one_loop_and_client():
+    worker = NotificationWorker(max_connections=2)
+
+    async def where():
+        return threading.current_thread().name, worker.http
+
+    try:
+        first, second = worker.run(where()), worker.run(where())
+    finally:
+        worker.close()
+
+    assert first == second
+    assert first[0] == "notification-worker"
+    assert first[1].is_closed
+    assert not worker._thread.is_alive()
@@ -0,0 +1,49 @@
+import numpy as np
+
+from surveillance.utils.perceptual_dedup import PerceptualDeduplicator, dhash
+
+
+def scene(seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 256, (360, 640, 3), dtype=np.uint8)
+
+
+def test_dhash_ignores_sensor_noise():
+    frame = scene(1)
+    noisy = np.clip(frame.astype(np.int16) + np.random.default_rng(2).integers(-3, 4, frame.shape), 0, 255)
+    assert (dhash(frame) ^ dhash(noisy.astype(np.uint8))).bit_count() <= 4
+    assert (dhash(frame) ^ dhash(scene(3))).bit_count() > 16
+
+
+def test_near_duplicates_are_suppressed_per_camera():
+    dedup = PerceptualDeduplicator(threshold=4, ttl=300, max_entries=8)
+    frame_hash = dhash(scene(1))
+
+    assert not dedup.is_duplicate("1", frame_hash, now=0)
+    assert dedup.is_duplicate("1", frame_hash ^ 0b101, now=10)
+    assert not dedup.is_duplicate("2", frame_hash, now=10)
+    assert not dedup.is_duplicate("1", dhash(scene(3)), now=20)
+    assert dedup.suppressed == {"1": 1}
+
+
+def test_hashes_expire_after_ttl():
+    dedup = PerceptualDeduplicator(threshold=4, ttl=300, max_entries=8)
+    assert not dedup.is_duplicate("1", 0xFF, now=0)
+    assert not dedup.is_duplicate("1", 0xFF, now=301)
+
+
+def test_least_recently_matched_hash_is_evicted():
+    dedup = PerceptualDeduplicator(threshold=0, ttl=300, max_entries=2)
+    dedup.is_duplicate("1", 1, now=0)
+    dedup.is_duplicate("1", 2, now=1)
+    dedup.is_duplicate("1", 1, now=2)
+    dedup.is_duplicate("1", 4, now=3)
+
+    assert list(dedup.hashes["1"]) == [1, 4]
+
+
+def test_zero_max_entries_disables_suppression(monkeypatch):
+    monkeypatch.setenv("ALERT_DEDUP_MAX_HASHES", "32")
+    dedup = PerceptualDeduplicator(threshold=4, ttl=300, max_entries=0)
+
+    assert not dedup.is_duplicate("1", 0xFF, now=0)
+    assert not dedup.is_duplicate("1", 0xFF, now=1)
@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+
+from config.config import make_engine
+from surveillance.schemas.database import DUser, Model
+from surveillance.utils.query_timing import explain, queries
+
+
+@pytest.fixture
+def plans(tmp_path):
+    """Query plans of the hot repository queries on an empty SQLite schema."""
+    async def run():
+        engine = make_engine(f"sqlite+aiosqlite:///{tmp_path / 'plans.db'}")
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Model.metadata.create_all)
+            return {name: await explain(engine, make_statement())
+                    for name, make_statement in queries(cameras=10, users=10).items()}
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(run())
+
+
+def test_user_lookup_uses_the_unique_index(plans):
+    assert "USING INDEX sqlite_autoindex__user_1 (user=?)" in plans["auth_user (unique user)"]
+    assert {index.name for index in DUser.__table__.indexes} == {"ix__user_active"}
+
+
+def test_bot_and_camera_lookups_use_their_indexes(plans):
+    assert "USING INDEX ix__user_active" in plans["get_allowed_chat_ids (active)"]
+    assert "USING INDEX ix__camera_visible_cam" in plans["visible cameras (visible_cam)"]
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from celery_task.rate_limiter import TAKE_TOKENS, Bucket, RateLimited, RateLimiter
+
+
+def limiter(redis_client=None) -> RateLimiter:
+    rate_limiter = RateLimiter(url="redis://localhost:1/0")
+    if redis_client is None:
+        # Local buckets only, as while Redis is unreachable
+        rate_limiter._redis_retry_at = float("inf")
+    else:
+        rate_limiter.redis = redis_client
+        rate_limiter.take_tokens = redis_client.register_script(TAKE_TOKENS)
+    return rate_limiter
+
+
+async def chat_token_survives_an_empty_global_bucket(rate_limiter: RateLimiter) -> None:
+    chat_a = Bucket("telegram:chat:1", rate=1, capacity=1)
+    chat_b = Bucket("telegram:chat:2", rate=1, capacity=1)
+    global_bucket = Bucket("telegram:global", rate=0.001, capacity=1)
+
+    assert await rate_limiter.acquire([chat_a, global_bucket]) == 0
+    with pytest.raises(RateLimited) as limited:
+        await rate_limiter.acquire([chat_b, global_bucket], max_wait=1)
+    assert limited.value.retry_after > 900
+    # The refused send did not use up the token of chat 2
+    assert await rate_limiter.acquire([chat_b], max_wait=0.01) == 0
+
+
+def test_local_buckets_take_all_tokens_or_none():
+    asyncio.run(chat_token_survives_an_empty_global_bucket(limiter()))
+
+
+def test_redis_script_takes_all_tokens_or_none():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    asyncio.run(chat_token_survives_an_empty_global_bucket(limiter(fakeredis.FakeAsyncRedis())))
+
+
+def test_blocked_bucket_waits_for_retry_after():
+    rate_limiter = limiter()
+    bucket = Bucket("smtp", rate=10, capacity=5)
+
+    async def run():
+        await rate_limiter.block(bucket, 30)
+        with pytest.raises(RateLimited) as limited:
+            await rate_limiter.acquire([bucket], max_wait=5)
+        return limited.value.retry_after
+
+    assert 29 < asyncio.run(run()) <= 30
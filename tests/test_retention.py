@@ -0,0 +1,87 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from celery_task.cleanup_service import DateFolderLayout, RetentionLayout, sweep_layouts
+from celery_task.retention_service import RetentionPolicy, enforce_disk_quota
+from celery_task.throttled_delete import ThrottledDeleter
+from config.config import run_sync
+from surveillance.schemas.repository import Recordings
+
+
+def unthrottled() -> ThrottledDeleter:
+    return ThrottledDeleter(bytes_per_sec=0, files_per_sec=0, latency_threshold_ms=0)
+
+
+def add_recording(tmp_path, cam_id: str, age: timedelta, size: int, kind: str = "segment") -> str:
+    started_at = datetime.now() - age
+    path = os.path.join(tmp_path, cam_id, f"segment_{cam_id}_{started_at.strftime('%Y%m%d_%H%M%S')}.mp4")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    assert run_sync(Recordings.add_recording(cam_id, path, size, started_at, kind=kind))
+    return path
+
+
+def test_quota_deletes_oldest_until_within_budget(tmp_path, recordings_index):
+    oldest = add_recording(tmp_path, "1", timedelta(days=3), 100)
+    older = add_recording(tmp_path, "2", timedelta(days=2), 100)
+    newest = add_recording(tmp_path, "1", timedelta(days=1, hours=1), 100)
+
+    policy = RetentionPolicy(max_bytes=150, min_age_hours=24, max_age_days=0, camera_policy={})
+    result = run_sync(enforce_disk_quota(policy, deleter=unthrottled()))
+
+    assert result['deleted_count'] == 2
+    assert result['freed_bytes'] == 200
+    assert result['total_bytes'] == 100
+    assert not os.path.exists(oldest) and not os.path.exists(older)
+    assert os.path.exists(newest)
+    assert run_sync(Recordings.select_total_size()) == 100
+
+
+def test_quota_keeps_recordings_younger_than_min_age(tmp_path, recordings_index):
+    protected = add_recording(tmp_path, "1", timedelta(hours=1), 100)
+    old = add_recording(tmp_path, "1", timedelta(days=2), 100)
+    fresh = add_recording(tmp_path, "2", timedelta(minutes=5), 100)
+
+    policy = RetentionPolicy(max_bytes=50, min_age_hours=0, max_age_days=0,
+                             camera_policy={"1": {"min_age_hours": 6}, "2": {"min_age_hours": 6}})
+    result = run_sync(enforce_disk_quota(policy, deleter=unthrottled()))
+
+    assert result['deleted_count'] == 1
+    assert not os.path.exists(old)
+    assert os.path.exists(protected) and os.path.exists(fresh)
+    assert result['total_bytes'] == 200
+
+
+def test_max_age_applies_per_camera(tmp_path, recordings_index):
+    expired = add_recording(tmp_path, "1", timedelta(days=10), 10)
+    kept_by_override = add_recording(tmp_path, "2", timedelta(days=10), 10)
+
+    policy = RetentionPolicy(max_bytes=0, min_age_hours=24, max_age_days=7,
+                             camera_policy={"2": {"max_age_days": 30}})
+    result = run_sync(enforce_disk_quota(policy, deleter=unthrottled()))
+
+    assert result['deleted_count'] == 1
+    assert not os.path.exists(expired)
+    assert os.path.exists(kept_by_override)
+
+
+def test_sweep_deletes_only_folders_past_their_age(tmp_path):
+    now = datetime(2026, 1, 10)
+    for day in ("2026-01-01", "2026-01-08", "not-a-date"):
+        os.makedirs(tmp_path / day / "1")
+        (tmp_path / day / "1" / "clip.mp4").write_bytes(b"\0" * 10)
+
+    result = sweep_layouts([DateFolderLayout("recordings", str(tmp_path), days=7)], now=now,
+                           deleter=unthrottled())
+
+    assert [item['name'] for item in result['deleted']] == ["2026-01-01"]
+    assert result['freed_bytes'] == 10
+    assert sorted(os.listdir(tmp_path)) == ["2026-01-08", "not-a-date"]
+
+
+def test_retention_layout_is_abstract():
+    with pytest.raises(TypeError):
+        RetentionLayout("base", "/tmp", 1)
@@ -0,0 +1,71 @@
+import os
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+from surveillance.utils import media_prep
+from surveillance.utils.perceptual_dedup import PerceptualDeduplicator
+from surveillance.utils.screenshot_writer import ScreenshotWriter
+
+
+@pytest.fixture(autouse=True)
+def alerts_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(media_prep, "alerts_dir", str(tmp_path / "alerts"))
+    monkeypatch.setenv("ALERT_MAX_WIDTH", "320")
+    monkeypatch.setenv("ALERT_MAX_HEIGHT", "180")
+
+
+def frame(seed: int = 1) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 256, (720, 1280, 3), dtype=np.uint8)
+
+
+def test_screenshot_and_downscaled_alert_copy_are_written(tmp_path):
+    writer = ScreenshotWriter(dedup=PerceptualDeduplicator(threshold=4, ttl=300, max_entries=8))
+    path = str(tmp_path / "screens" / "screenshot_1_20260101_120000.jpg")
+    assert writer.submit("1", frame(), path)
+    writer.close()
+
+    alert_path = writer.pop_ready("1")
+    assert alert_path == str(tmp_path / "alerts" / "2026-01-01" / "camera_1_screenshot_1_20260101_120000.jpg")
+    assert cv2.imread(path).shape == (720, 1280, 3)
+    assert cv2.imread(alert_path).shape == (180, 320, 3)
+    assert not [name for name in os.listdir(tmp_path / "screens") if name.endswith(".tmp")]
+    assert writer.pop_ready("1") is None
+
+
+def test_near_duplicate_is_archived_but_not_reported(tmp_path):
+    writer = ScreenshotWriter(dedup=PerceptualDeduplicator(threshold=4, ttl=300, max_entries=8))
+    first = str(tmp_path / "screenshot_1_20260101_120000.jpg")
+    second = str(tmp_path / "screenshot_1_20260101_120001.jpg")
+    writer.submit("1", frame(), first)
+    writer.submit("1", frame(), second)
+    writer.close()
+
+    assert writer.written == 2
+    assert os.path.exists(second)
+    assert writer.pop_ready("1").endswith("120000.jpg")
+    assert writer.pop_ready("1") is None
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    writer = ScreenshotWriter(max_queue_size=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocked_write(*args, **kwargs):
+        started.set()
+        release.wait()
+        return None
+
+    writer._write = blocked_write
+    writer.submit("1", frame(), str(tmp_path / "a.jpg"))
+    started.wait(5)
+    assert writer.submit("1", frame(), str(tmp_path / "b.jpg"))
+    assert not writer.submit("1", frame(), str(tmp_path / "c.jpg"))
+    release.set()
+    writer.close()
+
+    assert writer.dropped == 1
+    assert writer.failed == 2
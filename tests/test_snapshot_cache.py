@@ -0,0 +1,63 @@
+import asyncio
+
+from surveillance.utils.control_snapshot import SnapshotCache
+
+
+def counting_loader(delay: float = 0.0):
+    calls = []
+
+    async def load():
+        calls.append(len(calls))
+        await asyncio.sleep(delay)
+        return {"version": len(calls)}
+
+    return load, calls
+
+
+def test_concurrent_gets_share_one_load():
+    load, calls = counting_loader(delay=0.05)
+    cache = SnapshotCache(load, ttl=60)
+
+    async def run():
+        return await asyncio.gather(*(cache.get() for _ in range(5)))
+
+    assert asyncio.run(run()) == [{"version": 1}] * 5
+    assert len(calls) == 1
+
+
+def test_snapshot_is_served_until_invalidated():
+    load, calls = counting_loader()
+    cache = SnapshotCache(load, ttl=60)
+
+    async def run():
+        first = await cache.get()
+        cached = await cache.get()
+        cache.invalidate()
+        return first, cached, await cache.get()
+
+    assert asyncio.run(run()) == ({"version": 1}, {"version": 1}, {"version": 2})
+    assert cache.hits == 1
+
+
+def test_expired_snapshot_is_reloaded():
+    load, calls = counting_loader()
+    cache = SnapshotCache(load, ttl=0)
+
+    async def run():
+        await cache.get()
+        return await cache.get()
+
+    assert asyncio.run(run()) == {"version": 2}
+
+
+def test_load_overtaken_by_invalidation_is_not_cached():
+    load, calls = counting_loader(delay=0.05)
+    cache = SnapshotCache(load, ttl=60)
+
+    async def run():
+        stale = asyncio.ensure_future(cache.get())
+        await asyncio.sleep(0.01)
+        cache.invalidate()
+        return await stale, await cache.get()
+
+    assert asyncio.run(run()) == ({"version": 1}, {"version": 2})
@@ -0,0 +1,84 @@
+import asyncio
+import re
+from types import SimpleNamespace
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+
+from celery_task.messages_utils import telegram_media_fanout
+from celery_task.rate_limiter import RateLimiter
+
+
+@pytest.fixture
+def screenshot(tmp_path, monkeypatch):
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "token")
+    monkeypatch.setenv("TELEGRAM_CHAT_RATE", "100")
+    monkeypatch.setenv("TELEGRAM_GLOBAL_RATE", "100")
+    path = tmp_path / "screenshot.jpg"
+    path.write_bytes(b"\xff\xd8jpeg")
+    return str(path)
+
+
+def form(request: httpx.Request) -> tuple[bool, dict]:
+    """Whether a Bot API request uploads a file, and its plain form fields."""
+    body = request.content.decode(errors="replace")
+    if request.headers["content-type"].startswith("multipart/"):
+        return True, dict(re.findall(r'name="(\w+)"\r\n\r\n([^\r]*)', body))
+    return False, {key: values[0] for key, values in parse_qs(body).items()}
+
+
+def fanout(screenshot: str, answer, chat_ids: list[int]) -> tuple[dict, list]:
+    """Run the fan-out against a stand-in Bot API answering with `answer(chat_id, upload)`."""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        upload, fields = form(request)
+        chat_id = int(fields["chat_id"])
+        requests.append((chat_id, upload, fields))
+        return answer(chat_id, upload)
+
+    async def run():
+        limiter = RateLimiter(url="redis://localhost:1/0")
+        limiter._redis_retry_at = float("inf")
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+            worker = SimpleNamespace(limiter=limiter, http=http)
+            return await telegram_media_fanout(worker, "1", screenshot, chat_ids, kind="photo")
+
+    return asyncio.run(run()), requests
+
+
+def sent(file_id: str = "FILE") -> httpx.Response:
+    return httpx.Response(200, json={"ok": True, "result": {"photo": [{"file_id": "small"}, {"file_id": file_id}]}})
+
+
+def test_media_is_uploaded_once_and_sent_by_file_id(screenshot):
+    result, requests = fanout(screenshot, lambda chat_id, upload: sent(), [1, 2, 3])
+
+    assert result['uploaded'] and sorted(result['sent']) == [1, 2, 3]
+    assert [upload for _, upload, _ in requests] == [True, False, False]
+    assert {form["photo"] for _, upload, form in requests if not upload} == {"FILE"}
+
+
+def test_upload_moves_on_when_the_first_chat_refuses(screenshot):
+    def answer(chat_id, upload):
+        return httpx.Response(403, json={"ok": False}) if chat_id == 1 else sent()
+
+    result, requests = fanout(screenshot, answer, [1, 2, 3])
+
+    assert [(chat_id, upload) for chat_id, upload, _ in requests] == [(1, True), (2, True), (3, False)]
+    assert sorted(result['sent']) == [2, 3]
+    assert list(result['errors']) == [1]
+
+
+def test_rate_limited_chat_is_handed_back_for_retry(screenshot):
+    def answer(chat_id, upload):
+        if chat_id == 2:
+            return httpx.Response(429, json={"ok": False, "parameters": {"retry_after": 60}})
+        return sent()
+
+    result, _ = fanout(screenshot, answer, [1, 2])
+
+    assert result['sent'] == [1]
+    assert result['retry'][2] == pytest.approx(60, abs=1)
+    assert result['errors'] == {}
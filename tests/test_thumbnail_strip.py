@@ -0,0 +1,50 @@
+import cv2
+import numpy as np
+import pytest
+
+from surveillance.utils.thumbnail_strip import (ThumbnailStripWriter, get_strip_path, read_strip_index,
+                                                read_thumbnail)
+
+
+@pytest.fixture
+def video(tmp_path) -> str:
+    """Ten seconds of 25 fps video."""
+    path = str(tmp_path / "segment_1.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter.fourcc(*"MJPG"), 25, (160, 120))
+    for i in range(250):
+        writer.write(np.full((120, 160, 3), i, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def test_strip_holds_one_thumbnail_per_interval(video):
+    writer = ThumbnailStripWriter(interval=2, width=80, workers=1)
+    try:
+        strip_path = writer.build_strip(video)
+    finally:
+        writer.close()
+
+    assert strip_path == get_strip_path(video)
+    assert [time_ms for time_ms, _, _ in read_strip_index(strip_path)] == [0, 2000, 4000, 6000, 8000]
+    thumbnail = cv2.imdecode(np.frombuffer(read_thumbnail(strip_path, 4), np.uint8), cv2.IMREAD_COLOR)
+    assert thumbnail.shape == (60, 80, 3)
+    assert read_thumbnail(strip_path, 5) is None
+
+
+def test_queued_recordings_are_built_before_close(video, tmp_path):
+    writer = ThumbnailStripWriter(interval=5, width=80, workers=2)
+    assert writer.submit(video)
+    assert writer.submit(str(tmp_path / "missing.avi"))
+    writer.close()
+
+    assert (writer.written, writer.failed) == (1, 1)
+    assert len(read_strip_index(get_strip_path(video))) == 2
+
+
+def test_other_files_are_not_read_as_strips(tmp_path):
+    path = tmp_path / "segment_1.thumbs"
+    path.write_bytes(b"JUNK" + b"\0" * 16)
+
+    with pytest.raises(ValueError):
+        read_strip_index(str(path))
+    assert read_thumbnail(str(path), 0) is None
@@ -0,0 +1,89 @@
+import os
+import subprocess
+from datetime import datetime, timedelta
+
+import pytest
+
+from celery_task import tiering_service
+from celery_task.tiering_service import TieringPolicy, tier_old_recordings
+from config.config import run_sync
+from surveillance.schemas.repository import Recordings
+
+
+def policy(mode: str) -> TieringPolicy:
+    return TieringPolicy(after_days=7, mode=mode, max_height=480, bitrate="300k", timelapse_fps=25,
+                         workers=1, nice=19)
+
+
+def test_compact_tier_downscales_and_lowers_the_bitrate():
+    command = policy("compact").build_command("in.mp4", "out.mp4")
+
+    assert command[0] == "ffmpeg"
+    assert command[command.index("-i") + 1] == "in.mp4"
+    assert "scale=-2:min(480\\,ih)" in command[command.index("-filter_complex") + 1]
+    assert command[command.index("-b:v") + 1] == "300k"
+    assert "-skip_frame" not in command
+    assert command[command.index("-vcodec") + 1] == "libx264"
+    assert "out.mp4" in command
+
+
+def test_timelapse_tier_keeps_keyframes_only():
+    command = policy("timelapse").build_command("in.mp4", "out.mp4")
+
+    assert command[command.index("-skip_frame") + 1] == "nokey"
+    assert "setpts=N/25/TB" in command[command.index("-filter_complex") + 1]
+    assert command[command.index("-r") + 1] == "25"
+
+
+def test_unknown_mode_falls_back_to_compact():
+    assert policy("grayscale").mode == "compact"
+
+
+@pytest.fixture
+def old_recording(tmp_path, recordings_index, monkeypatch):
+    """A week-old 100-byte segment, re-encoded by a stand-in for ffmpeg into 10 bytes."""
+    path = str(tmp_path / "segment_1.mp4")
+    with open(path, "wb") as f:
+        f.write(b"\0" * 100)
+    assert run_sync(Recordings.add_recording("1", path, 100, datetime.now() - timedelta(days=8)))
+
+    def transcode(command, nice):
+        with open(next(arg for arg in command if arg.endswith(".tmp.mp4")), "wb") as f:
+            f.write(b"\1" * 10)
+
+    monkeypatch.setattr(tiering_service.shutil, "which", lambda name: f"/usr/bin/{name}")
+    monkeypatch.setattr(tiering_service, "_transcode", transcode)
+    return path
+
+
+def test_tiered_file_replaces_the_original(old_recording):
+    result = run_sync(tier_old_recordings(policy("compact")))
+
+    assert result['tiered_count'] == 1 and result['saved_bytes'] == 90
+    assert open(old_recording, "rb").read() == b"\1" * 10
+    assert os.listdir(os.path.dirname(old_recording)) == ["segment_1.mp4"]
+    assert run_sync(Recordings.select_total_size()) == 10
+
+
+def test_original_is_restored_if_the_index_update_fails(old_recording, monkeypatch):
+    async def update_tier(rec_id, size, tier):
+        return False
+
+    monkeypatch.setattr(Recordings, "update_tier", update_tier)
+    result = run_sync(tier_old_recordings(policy("compact")))
+
+    assert result['tiered_count'] == 0
+    assert open(old_recording, "rb").read() == b"\0" * 100
+    assert os.listdir(os.path.dirname(old_recording)) == ["segment_1.mp4"]
+
+
+def test_encoder_priority_is_set_with_nice(monkeypatch):
+    commands = []
+    monkeypatch.setattr(tiering_service.shutil, "which", lambda name: f"/usr/bin/{name}")
+    monkeypatch.setattr(subprocess, "run", lambda command, **kwargs: commands.append((command, kwargs)))
+
+    tiering_service._transcode(["ffmpeg", "-i", "in.mp4"], 19)
+
+    command, kwargs = commands[0]
+    assert command == ["nice", "-n", "19", "ffmpeg", "-i", "in.mp4"]
+    assert "preexec_fn" not in kwargs
@@ -0,0 +1,64 @@
+import os
+import threading
+
+import cv2
+import numpy as np
+
+from surveillance.utils.video_writer import ThreadedVideoWriter
+
+
+def frame(value: int) -> np.ndarray:
+    return np.full((120, 160, 3), value, dtype=np.uint8)
+
+
+class BlockedWriter:
+    """Stands in for cv2.VideoWriter, holding the first frame until released."""
+
+    def __init__(self):
+        self.frames = []
+        self.started = threading.Event()
+        self.unblock = threading.Event()
+
+    def write(self, image):
+        self.started.set()
+        self.unblock.wait()
+        self.frames.append(int(image[0, 0, 0]))
+
+    def release(self):
+        pass
+
+
+def test_file_is_published_only_on_release(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    writer = ThreadedVideoWriter(path, 25, (160, 120), fourcc="MJPG")
+    for i in range(10):
+        writer.write(frame(i * 20))
+    assert not os.path.exists(path)
+
+    assert writer.release()
+    assert os.listdir(tmp_path) == ["clip.avi"]
+    assert int(cv2.VideoCapture(path).get(cv2.CAP_PROP_FRAME_COUNT)) == 10
+
+
+def test_empty_recording_is_not_published(tmp_path):
+    writer = ThreadedVideoWriter(str(tmp_path / "clip.avi"), 25, (160, 120), fourcc="MJPG")
+
+    assert not writer.release()
+    assert os.listdir(tmp_path) == []
+
+
+def test_full_queue_drops_the_oldest_pending_frames(tmp_path):
+    writer = ThreadedVideoWriter(str(tmp_path / "clip.avi"), 25, (160, 120), fourcc="MJPG", max_queue_size=3)
+    writer.writer.release()
+    blocked = writer.writer = BlockedWriter()
+
+    writer.write(frame(0))
+    blocked.started.wait(5)
+    for i in range(1, 8):
+        writer.write(frame(i))
+    blocked.unblock.set()
+    writer.release()
+
+    assert blocked.frames == [0, 5, 6, 7]
+    assert writer.dropped == 4
+    assert writer.written == 4